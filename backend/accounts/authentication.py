@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def user_cache_key(user_id):
+    return f"accounts:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+# Só o necessário para autenticar e para o /me: o hash da senha nunca vai para o cache
+# compartilhado. Os demais campos ficam adiados e são lidos do banco se alguém os usar
+# (ex.: ``check_password`` na troca de senha); ``save()`` grava só os campos carregados.
+CACHED_USER_FIELDS = (
+    "id", "email", "nome", "telefone", "is_active", "is_staff", "is_superuser", "is_email_verified", "date_joined",
+)
+_CACHED_ATTNAMES = [f.attname for f in User._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+
+
+def dados_em_cache(user):
+    return {name: getattr(user, name) for name in _CACHED_ATTNAMES}
+
+
+def usuario_do_cache(dados):
+    """``User`` montado a partir de ``dados_em_cache``; ``None`` para entradas em outro formato."""
+    if not isinstance(dados, dict):
+        return None
+    return User.from_db("default", _CACHED_ATTNAMES, [dados[name] for name in _CACHED_ATTNAMES])
+
+
+def claims_user(user_id):
+    """``User`` não carregado do banco, só com o ``pk`` vindo do token."""
+    user = User(pk=user_id)
+    user._state.adding = False
+    user._state.db = "default"
+    return user
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT com o usuário resolvido a partir do cache compartilhado.
+
+    A entrada é removida sempre que o ``User`` é salvo ou excluído (ver
+    ``accounts.signals``), então desativação e troca de senha valem na hora;
+    ``JWT_USER_CACHE_TIMEOUT = 0`` volta a consultar o banco em toda requisição.
+    """
+
+    def get_user(self, validated_token):
+        timeout = settings.JWT_USER_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(validated_token)
+        user_id = _token_user_id(validated_token)
+
+        key = user_cache_key(user_id)
+        user = usuario_do_cache(cache.get(key))
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, dados_em_cache(user), timeout)
+        elif api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+
+class ReadJWTAuthentication(CachedJWTAuthentication):
+    """
+    Para endpoints de leitura que só usam ``request.user`` como filtro de dono.
+
+    Com ``JWT_STATELESS_READS`` ligado, requisições GET/HEAD/OPTIONS confiam no
+    ``user_id`` assinado do token e não tocam banco nem cache; o ``request.user``
+    é um ``User`` não carregado, com apenas ``pk``. Um usuário desativado segue
+    lendo até o token expirar. Métodos de escrita sempre resolvem o usuário real.
+    """
+
+    def get_user(self, validated_token):
+        request = getattr(self, "_request", None)
+        if not settings.JWT_STATELESS_READS or request is None or request.method not in SAFE_METHODS:
+            return super().get_user(validated_token)
+        return claims_user(_token_user_id(validated_token))
+
+    def authenticate(self, request):
+        self._request = request
+        return super().authenticate(request)
+
+
+async def aauthenticate(request, stateless=False):
+    """
+    Equivalente assíncrono do ``CachedJWTAuthentication`` para views async.
+
+    Retorna ``(user, token)`` ou ``None`` sem cabeçalho de autenticação; erros de
+    token levantam as mesmas exceções do DRF. ``stateless`` aplica a regra de
+    ``ReadJWTAuthentication`` (só vale com ``JWT_STATELESS_READS`` ligado).
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        return None
+    raw_token = auth.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = auth.get_validated_token(raw_token)
+    user_id = _token_user_id(validated_token)
+    if stateless and settings.JWT_STATELESS_READS:
+        return claims_user(user_id), validated_token
+
+    timeout = settings.JWT_USER_CACHE_TIMEOUT
+    key = user_cache_key(user_id)
+    user = usuario_do_cache(await cache.aget(key)) if timeout else None
+    if user is None:
+        try:
+            user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if timeout:
+            await cache.aset(key, dados_em_cache(user), timeout)
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user, validated_token
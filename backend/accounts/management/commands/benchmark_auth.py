@@ -0,0 +1,69 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from clientes.models import Cliente
+
+ENDPOINTS = ["/api/clientes/", "/api/agendamentos/", "/api/financeiro/", "/api/notificacoes/", "/api/dashboard/stats/"]
+
+# (nome, JWT_USER_CACHE_TIMEOUT, JWT_STATELESS_READS)
+MODOS = [
+    ("banco", 0, False),
+    ("cache", 300, False),
+    ("stateless", 300, True),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compara consultas e tempo por requisição autenticada com usuário do banco, do cache e stateless"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requisições por endpoint e modo")
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        # Dados temporários: tudo é desfeito ao final
+        try:
+            with transaction.atomic():
+                self.executar(total)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def executar(self, total):
+        user = User.objects.create_user(email="benchmark-auth@example.invalid", password=None)
+        Cliente.objects.create(usuario=user, nome="Cliente Benchmark")
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+        resultados = {}
+        for nome, timeout, stateless in MODOS:
+            with override_settings(JWT_USER_CACHE_TIMEOUT=timeout, JWT_STATELESS_READS=stateless, ALLOWED_HOSTS=["*"]):
+                cache.clear()
+                client.get(ENDPOINTS[0])  # aquece o cache de usuário
+                consultas = 0
+                inicio = time.perf_counter()
+                for _ in range(total):
+                    for url in ENDPOINTS:
+                        with CaptureQueriesContext(connection) as ctx:
+                            resp = client.get(url)
+                        assert resp.status_code == 200, f"{url}: {resp.status_code}"
+                        consultas += len(ctx.captured_queries)
+                duracao = time.perf_counter() - inicio
+            n = total * len(ENDPOINTS)
+            resultados[nome] = consultas / n
+            self.stdout.write(f"modo={nome} consultas_por_req={consultas / n:.2f} ms_por_req={duracao * 1000 / n:.2f}")
+
+        base = resultados["banco"]
+        for nome in ("cache", "stateless"):
+            self.stdout.write(f"{nome}: {base - resultados[nome]:.2f} consulta(s) a menos por requisição")
+        self.stdout.write(self.style.SUCCESS("Benchmark concluído."))
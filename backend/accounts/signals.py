@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_em_cache(sender, instance, **kwargs):
+    # Depois do commit: antes dele uma requisição concorrente leria a linha antiga do banco
+    # e a gravaria de volta no cache
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(pk))
@@ -1,10 +1,22 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.tokens import default_token_generator
 from django.urls import reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.testing import FakeRedis
+from config.throttling import AnonRateThrottle, ScopedRateThrottle
 
 User = get_user_model()
 
@@ -184,3 +196,122 @@ class AuthFlowTests(APITestCase):
         client = APIClient()
         resp = client.get(self.me_url)
         self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    url = "/api/clientes/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="cache@example.com", password="strongpass123")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [q["sql"] for q in ctx.captured_queries if "accounts_user" in q["sql"]]
+
+    def test_user_comes_from_cache_until_saved(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+        # O cache guarda só os campos de autenticação, nunca o hash da senha
+        dados = cache.get(f"accounts:user:{self.user.pk}")
+        self.assertNotIn("password", dados)
+        self.assertTrue(dados["is_active"])
+
+        # Desativação invalida o cache só depois do commit e é respeitada na requisição seguinte
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.is_active = False
+            self.user.save()
+            self.assertIsNotNone(cache.get(f"accounts:user:{self.user.pk}"))
+        self.assertTrue(callbacks)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_troca_de_senha_com_usuario_do_cache(self):
+        self.user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/auth/password-change/",
+                {"old_password": "strongpass123", "new_password": "outrasenha456"},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("outrasenha456"))
+        self.assertEqual(self.user.email, "cache@example.com")
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_trust_token_claims(self):
+        self.assertEqual(self.user_queries(), [])
+        self.assertIsNone(cache.get(f"accounts:user:{self.user.pk}"))
+
+        # Escritas continuam resolvendo o usuário real
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, {"nome": "Cliente S"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(any("accounts_user" in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(self.client.get(self.url).data["results"][0]["nome"], "Cliente S")
+
+
+class TresPorMinutoThrottle(AnonRateThrottle):
+    rate = "3/m"
+
+
+class ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [TresPorMinutoThrottle]
+
+    def get(self, request):
+        return Response({"ok": True})
+
+
+class RedisThrottleTests(APITestCase):
+    def setUp(self):
+        self.now = 1_000_040.0  # 20s dentro de uma janela de 60s
+        self.redis = FakeRedis(clock=lambda: self.now)
+        patcher = mock.patch("config.throttling.get_redis_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        timer = mock.patch.object(TresPorMinutoThrottle, "timer", lambda _: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+        self.factory = APIRequestFactory()
+        # Cada chamada cria uma view nova, como processos diferentes compartilhando o Redis
+        self.view = ThrottledView.as_view()
+
+    def get(self):
+        return self.view(self.factory.get("/", REMOTE_ADDR="10.0.0.1")).status_code
+
+    def test_parse_rate_accepts_period_multiplier(self):
+        self.assertEqual(ScopedRateThrottle().parse_rate("5/15m"), (5, 900))
+        self.assertEqual(ScopedRateThrottle().parse_rate("100/d"), (100, 86400))
+
+    def test_limit_is_shared_and_uses_one_round_trip(self):
+        self.assertEqual([self.get() for _ in range(3)], [200, 200, 200])
+        self.assertEqual(self.redis.round_trips, 3)
+
+        resp = self.view(self.factory.get("/", REMOTE_ADDR="10.0.0.1"))
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(resp["Retry-After"], "40")
+        # Outro cliente tem o próprio contador
+        self.assertEqual(self.view(self.factory.get("/", REMOTE_ADDR="10.0.0.2")).status_code, 200)
+
+        # Metade da janela seguinte: ainda pesa metade da anterior (3 * 0.5 + 1 <= 3)
+        self.now += 70
+        self.assertEqual(self.get(), 200)
+        self.assertEqual(self.get(), 429)
+        self.now += 60
+        self.assertEqual(self.get(), 200)
+
+    def test_redis_failure_lets_requests_through(self):
+        self.redis.pipeline = mock.Mock(side_effect=ConnectionError("redis down"))
+        self.assertEqual([self.get() for _ in range(5)], [200] * 5)
@@ -1,11 +1,14 @@
 from django.urls import path
 
+from config.async_views import read_route
+
 from .views import (
     csrf_view,
     email_verify_view,
     login_view,
     logout_view,
     me_view,
+    me_view_async,
     password_change_view,
     password_reset_confirm_view,
     password_reset_request_view,
@@ -20,7 +23,7 @@ urlpatterns = [
     path("login/", login_view, name="login"),
     path("refresh/", refresh_view, name="refresh"),
     path("logout/", logout_view, name="logout"),
-    path("me/", me_view, name="me"),
+    path("me/", read_route(me_view, me_view_async), name="me"),
     path("password-change/", password_change_view, name="password-change"),
     path("password-reset/", password_reset_request_view, name="password-reset-request"),
     path("password-reset/confirm/", password_reset_confirm_view, name="password-reset-confirm"),
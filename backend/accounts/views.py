@@ -1,20 +1,24 @@
 import logging
+import time
 
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db import transaction
 from django.middleware.csrf import get_token
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.http import urlsafe_base64_decode
 from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.throttling import ScopedRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from config.async_views import AsyncReadView, json_response, prepare_request
+from config.throttling import ScopedRateThrottle
+from notificacoes import emails
+from notificacoes.models import EmailOutbox
+
 from .serializers import (
     LoginSerializer,
     MeSerializer,
@@ -51,20 +55,11 @@ def csrf_view(request):
 def register_view(request):
     serializer = UserCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    user = serializer.save()
-
-    # Send verification email
-    token = default_token_generator.make_token(user)
-    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-    verify_link = f"{settings.FRONTEND_ORIGIN}/verify-email/{uidb64}/{token}"
-
-    send_mail(
-        "Verifique seu email",
-        f"Use o link a seguir para verificar seu endereço de email: {verify_link}",
-        "noreply@picineiros.com",
-        [user.email],
-        fail_silently=False,
-    )
+    with transaction.atomic():
+        user = serializer.save()
+        # Gravado na mesma transação do usuário e enviado pela fila (notificacoes.emails),
+        # que gera o link de verificação só na hora do envio
+        emails.enfileirar(f"verificacao-email:{user.pk}", EmailOutbox.Modelo.VERIFICACAO_EMAIL, user)
     return Response(
         {"detail": "Usuário registrado com sucesso. Verifique seu email para ativar sua conta."},
         status=status.HTTP_201_CREATED,
@@ -107,17 +102,9 @@ def password_reset_request_view(request):
         user = None
 
     if user:
-        token = default_token_generator.make_token(user)
-        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-        reset_link = f"{settings.FRONTEND_ORIGIN}/reset-password/{uidb64}/{token}"
-
-        send_mail(
-            "Seu link para redefinição de senha",
-            f"Use o link a seguir para redefinir sua senha: {reset_link}",
-            "noreply@picineiros.com",
-            [user.email],
-            fail_silently=False,
-        )
+        # Pedidos repetidos na mesma janela (reenvio do formulário) geram um único email
+        janela = int(time.time()) // settings.EMAIL_DEDUPLICACAO_JANELA
+        emails.enfileirar(f"redefinicao-senha:{user.pk}:{janela}", EmailOutbox.Modelo.REDEFINICAO_SENHA, user)
 
     return Response(
         {"detail": "Se um usuário com este email existir, um link de redefinição de senha foi enviado."},
@@ -220,6 +207,12 @@ def me_view(request):
     return Response(MeSerializer(request.user).data)
 
 
+async def me_view_async(request):
+    # Precisa do usuário completo: nunca usa o modo stateless
+    request = await prepare_request(request, AsyncReadView(), stateless=False)
+    return json_response(MeSerializer(request.user).data)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def password_change_view(request):
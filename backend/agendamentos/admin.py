@@ -1,17 +1,44 @@
 from django.contrib import admin
 
-from .models import Agendamento
+from .models import Agendamento, CalendarioFeed, Recorrencia
 
 
 @admin.register(Agendamento)
 class AgendamentoAdmin(admin.ModelAdmin):
     list_display = ("cliente", "data_hora", "status", "usuario", "ativo")
     list_filter = ("status", "ativo", "usuario")
+    list_select_related = ("cliente", "usuario")
     search_fields = ("cliente__nome", "observacoes")
     autocomplete_fields = ("cliente", "usuario")
-    readonly_fields = ("id", "criado_em", "atualizado_em")
+    readonly_fields = ("id", "recorrencia", "ocorrencia", "criado_em", "atualizado_em")
     fieldsets = (
         (None, {"fields": ("id", "usuario", "cliente", "data_hora", "status", "observacoes")}),
+        ("Recorrência", {"fields": ("recorrencia", "ocorrencia")}),
         ("Status", {"fields": ("ativo",)}),
         ("Datas", {"fields": ("criado_em", "atualizado_em")}),
     )
+
+
+@admin.register(Recorrencia)
+class RecorrenciaAdmin(admin.ModelAdmin):
+    list_display = ("cliente", "intervalo_semanas", "data_inicio", "hora", "data_fim", "usuario", "ativo")
+    list_filter = ("intervalo_semanas", "ativo", "usuario")
+    list_select_related = ("cliente", "usuario")
+    search_fields = ("cliente__nome", "observacoes")
+    autocomplete_fields = ("cliente", "usuario")
+    readonly_fields = ("id", "dia_semana", "criado_em", "atualizado_em")
+    fieldsets = (
+        (None, {"fields": ("id", "usuario", "cliente", "observacoes")}),
+        ("Série", {"fields": ("intervalo_semanas", "data_inicio", "hora", "data_fim", "dia_semana")}),
+        ("Status", {"fields": ("ativo",)}),
+        ("Datas", {"fields": ("criado_em", "atualizado_em")}),
+    )
+
+
+@admin.register(CalendarioFeed)
+class CalendarioFeedAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "criado_em")
+    list_select_related = ("usuario",)
+    search_fields = ("usuario__email",)
+    autocomplete_fields = ("usuario",)
+    readonly_fields = ("token", "criado_em")
@@ -0,0 +1,268 @@
+"""
+Feed iCalendar (``.ics``) da agenda do usuário, para assinatura em apps de
+calendário.
+
+Os apps consultam a URL a cada poucos minutos, então o feed é servido quase
+sempre do cache: o ETag é derivado das versões ``agendamentos``/``clientes`` do
+usuário (``config.conditional``) e do dia corrente (a janela é móvel). Um poll
+sem mudanças custa a busca do token e das versões no cache e recebe 304; com
+mudanças, o corpo gerado para aquela versão também fica no cache.
+
+O corpo é montado linha a linha a partir de ``values()``, sem instanciar
+modelos: agendamentos gravados da janela viram ``VEVENT`` simples e cada série
+recorrente vira um único ``VEVENT`` com ``RRULE`` e ``EXDATE`` para as
+ocorrências que ganharam linha própria, sem expandir ocorrências. As séries
+usam hora local (``TZID``), para não mudar de horário com o horário de verão;
+o ``VTIMEZONE`` correspondente descreve as mudanças de offset da janela.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from config.conditional import get_versions
+
+from .models import Agendamento, CalendarioFeed, Recorrencia
+
+CALENDARIO_RESOURCES = ("agendamentos", "clientes")
+# Mapeamento token -> usuário; removido quando o token é trocado
+TOKEN_TIMEOUT = 24 * 3600
+
+
+def _token_key(token):
+    return f"calendario:token:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def usuario_do_token(token):
+    key = _token_key(token)
+    usuario_id = cache.get(key)
+    if usuario_id is None:
+        usuario_id = (
+            CalendarioFeed.objects.filter(token=token, usuario__is_active=True)
+            .values_list("usuario_id", flat=True)
+            .first()
+        )
+        if usuario_id is None:
+            return None
+        cache.set(key, usuario_id, TOKEN_TIMEOUT)
+    return usuario_id
+
+
+def obter_feed(usuario):
+    feed, _ = CalendarioFeed.objects.get_or_create(usuario=usuario, defaults={"token": secrets.token_urlsafe(32)})
+    return feed
+
+
+def trocar_token(usuario):
+    """Invalida a URL atual (ex.: compartilhada por engano) e gera outra."""
+    feed = obter_feed(usuario)
+    cache.delete(_token_key(feed.token))
+    feed.token = secrets.token_urlsafe(32)
+    feed.save(update_fields=["token"])
+    return feed
+
+
+def versao(usuario_id):
+    """``(etag, last_modified)`` do feed: versões dos recursos mais o dia da janela."""
+    versions = get_versions(usuario_id, CALENDARIO_RESOURCES)
+    hoje = timezone.localdate()
+    raw = "|".join([str(usuario_id), hoje.isoformat()] + [token for token, _ in versions])
+    digest = hashlib.sha256(raw.encode()).hexdigest()[:32]
+    # A janela muda à meia-noite: o corpo de hoje é mais novo que qualquer escrita de ontem
+    virada = int(timezone.make_aware(datetime.combine(hoje, datetime.min.time())).timestamp())
+    return f'"{digest}"', max([virada] + [ts for _, ts in versions])
+
+
+def corpo_cacheado(usuario_id, etag):
+    key = "calendario:corpo:{}:{}".format(usuario_id, etag.strip('"'))
+    corpo = cache.get(key)
+    if corpo is None:
+        corpo = gerar(usuario_id)
+        cache.set(key, corpo, settings.CALENDARIO_CACHE_TIMEOUT)
+    return corpo
+
+
+# Formato (RFC 5545)
+
+
+def _escape(texto):
+    return (
+        str(texto)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _dobrar(linha):
+    """Quebra linhas com mais de 75 octetos (continuação começa com espaço)."""
+    dados = linha.encode("utf-8")
+    if len(dados) <= 75:
+        return linha
+    partes, atual = [], ""
+    for char in linha:
+        limite = 75 if not partes else 74
+        if len((atual + char).encode("utf-8")) > limite:
+            partes.append(atual)
+            atual = char
+        else:
+            atual += char
+    partes.append(atual)
+    return "\r\n ".join(partes)
+
+
+def _utc(momento):
+    return momento.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _local(momento):
+    return momento.strftime("%Y%m%dT%H%M%S")
+
+
+def _offset(delta):
+    segundos = int(delta.total_seconds())
+    sinal = "-" if segundos < 0 else "+"
+    horas, resto = divmod(abs(segundos), 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{sinal}{horas:02d}{minutos:02d}" + (f"{segundos:02d}" if segundos else "")
+
+
+def _transicoes(tz, inicio, fim):
+    """Instantes (UTC) em que o offset de ``tz`` muda entre ``inicio`` e ``fim``."""
+    transicoes = []
+    antes = inicio
+    while antes < fim:
+        depois = min(antes + timedelta(days=1), fim)
+        if antes.astimezone(tz).utcoffset() != depois.astimezone(tz).utcoffset():
+            # Busca binária até o minuto
+            a, b = antes, depois
+            while b - a > timedelta(minutes=1):
+                meio = a + (b - a) / 2
+                if meio.astimezone(tz).utcoffset() == a.astimezone(tz).utcoffset():
+                    a = meio
+                else:
+                    b = meio
+            transicoes.append(b.replace(second=0, microsecond=0))
+        antes = depois
+    return transicoes
+
+
+def _vtimezone(inicio, fim):
+    """``VTIMEZONE`` do fuso atual com os offsets vigentes entre ``inicio`` e ``fim``."""
+    tz = timezone.get_current_timezone()
+    linhas = ["BEGIN:VTIMEZONE", f"TZID:{timezone.get_current_timezone_name()}"]
+    local = inicio.astimezone(tz)
+    anterior = local.utcoffset()
+    # Offset vigente no começo da janela vale desde sempre; depois, uma observância por mudança
+    observancias = [(datetime(1970, 1, 1), anterior, local)]
+    for momento in _transicoes(tz, inicio, fim):
+        local = momento.astimezone(tz)
+        observancias.append(((momento + anterior).replace(tzinfo=None), local.utcoffset(), local))
+        anterior = local.utcoffset()
+    de = observancias[0][1]
+    for comeco, para, local in observancias:
+        tipo = "DAYLIGHT" if local.dst() else "STANDARD"
+        linhas += [
+            f"BEGIN:{tipo}",
+            f"DTSTART:{_local(comeco)}",
+            f"TZOFFSETFROM:{_offset(de)}",
+            f"TZOFFSETTO:{_offset(para)}",
+        ]
+        if nome := local.tzname():
+            linhas.append(f"TZNAME:{_escape(nome)}")
+        linhas.append(f"END:{tipo}")
+        de = para
+    linhas.append("END:VTIMEZONE")
+    return linhas
+
+
+def _evento(uid, duracao, resumo, descricao, carimbo, extras=()):
+    linhas = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@agenda",
+        f"DTSTAMP:{_utc(carimbo)}",
+        *extras,
+        f"DURATION:PT{duracao}M",
+        f"SUMMARY:{_escape(resumo)}",
+    ]
+    if descricao:
+        linhas.append(f"DESCRIPTION:{_escape(descricao)}")
+    linhas.append("END:VEVENT")
+    return linhas
+
+
+def _agendamentos(usuario_id, inicio, fim):
+    linhas = (
+        Agendamento.objects.filter(usuario_id=usuario_id, ativo=True, data_hora__gte=inicio, data_hora__lte=fim)
+        .exclude(status=Agendamento.Status.CANCELADO)
+        .order_by("data_hora", "id")
+        .values_list("id", "data_hora", "duracao_minutos", "status", "observacoes", "atualizado_em", "cliente__nome")
+    )
+    for pk, data_hora, duracao, status, observacoes, atualizado_em, cliente in linhas.iterator(chunk_size=500):
+        extras = [f"DTSTART:{_utc(data_hora)}"]
+        if status == Agendamento.Status.CONFIRMADO:
+            extras.append("STATUS:CONFIRMED")
+        yield from _evento(pk, duracao, f"Visita: {cliente}", observacoes, atualizado_em, extras)
+
+
+def _series(usuario_id, inicio):
+    series = list(
+        Recorrencia.objects.filter(usuario_id=usuario_id, ativo=True, cliente__ativo=True)
+        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=inicio.date()))
+        .order_by("data_inicio", "id")
+        .values_list(
+            "id", "data_inicio", "hora", "intervalo_semanas", "duracao_minutos", "data_fim",
+            "observacoes", "atualizado_em", "cliente__nome",
+        )
+    )
+    if not series:
+        return
+    # Ocorrências com linha própria (ativas ou não) saem da regra; as ativas da janela já
+    # estão entre os agendamentos
+    excecoes = {}
+    for recorrencia_id, ocorrencia in Agendamento.objects.filter(
+        recorrencia__in=[s[0] for s in series], ocorrencia__gte=inicio.date()
+    ).values_list("recorrencia_id", "ocorrencia"):
+        excecoes.setdefault(recorrencia_id, []).append(ocorrencia)
+
+    tzid = timezone.get_current_timezone_name()
+    for pk, data_inicio, hora, intervalo, duracao, data_fim, observacoes, atualizado_em, cliente in series:
+        primeiro = datetime.combine(data_inicio, hora)
+        regra = f"RRULE:FREQ=WEEKLY;INTERVAL={intervalo}"
+        if data_fim:
+            ultimo = timezone.make_aware(datetime.combine(data_fim, hora))
+            regra += f";UNTIL={_utc(ultimo)}"
+        extras = [f"DTSTART;TZID={tzid}:{_local(primeiro)}", regra]
+        for dia in sorted(excecoes.get(pk, [])):
+            extras.append(f"EXDATE;TZID={tzid}:{_local(datetime.combine(dia, hora))}")
+        yield from _evento(f"serie-{pk}", duracao, f"Visita: {cliente}", observacoes, atualizado_em, extras)
+
+
+def gerar(usuario_id):
+    agora = timezone.now()
+    inicio = agora - timedelta(days=settings.CALENDARIO_DIAS_PASSADOS)
+    fim = agora + timedelta(days=settings.CALENDARIO_DIAS_FUTUROS)
+    linhas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Agenda//Agendamentos//PT-BR",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:Agendamentos",
+        # Sugestão de intervalo de atualização para os apps que respeitam
+        "REFRESH-INTERVAL;VALUE=DURATION:PT15M",
+        "X-PUBLISHED-TTL:PT15M",
+    ]
+    series = list(_series(usuario_id, timezone.localtime(inicio)))
+    if series:
+        linhas.extend(_vtimezone(inicio, fim))
+    linhas.extend(_agendamentos(usuario_id, inicio, fim))
+    linhas.extend(series)
+    linhas.append("END:VCALENDAR")
+    return "\r\n".join(_dobrar(linha) for linha in linhas) + "\r\n"
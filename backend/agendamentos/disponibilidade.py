@@ -0,0 +1,136 @@
+"""
+Conflitos de horário e horários livres na agenda do usuário.
+
+Cada agendamento ocupa ``[data_hora, data_hora + duracao_minutos)``. Como a
+duração é limitada a ``AGENDAMENTO_DURACAO_MAXIMA``, só podem se sobrepor a
+``[inicio, fim)`` os agendamentos com ``data_hora`` em ``[inicio - máxima, fim)``:
+uma faixa do índice ``(usuario, ativo, data_hora)``, lida em O(log n) mais as
+linhas da faixa, sem varrer o histórico. As ocorrências das séries recorrentes
+(``agendamentos.recorrencia``) também ocupam a agenda; cancelados, não.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Agendamento
+from .recorrencia import excecoes, ocorrencias, series_no_periodo
+
+
+def fim(agendamento):
+    return agendamento.data_hora + timedelta(minutes=agendamento.duracao_minutos)
+
+
+def travar_agenda(usuario_id):
+    """
+    Serializa as escritas na agenda do usuário até o fim da transação, para que
+    duas requisições simultâneas não passem pela checagem de conflito juntas.
+    """
+    list(get_user_model().objects.select_for_update().filter(pk=usuario_id).values_list("pk"))
+
+
+def ocupados(usuario_id, janelas, ignorar=(), ignorar_serie=None):
+    """
+    Agendamentos gravados e ocorrências virtuais que podem se sobrepor a alguma
+    das ``janelas`` (``[(inicio, fim)]``), em ordem de início. ``ignorar`` são ids
+    que não contam (o próprio agendamento numa alteração); ``ignorar_serie``, uma
+    série cujas ocorrências virtuais não contam (a própria série numa alteração).
+    """
+    margem = timedelta(minutes=settings.AGENDAMENTO_DURACAO_MAXIMA)
+    faixas = [(inicio - margem, fim) for inicio, fim in janelas]
+    gravados = (
+        Agendamento.objects.filter(usuario_id=usuario_id, ativo=True)
+        .exclude(status=Agendamento.Status.CANCELADO)
+        .filter(reduce(or_, (Q(data_hora__gte=a, data_hora__lt=b) for a, b in faixas)))
+        .select_related("cliente")
+    )
+    itens = {a.pk: a for a in gravados}
+
+    dia_inicio = timezone.localdate(min(a for a, _ in faixas))
+    dia_fim = timezone.localdate(max(b for _, b in faixas))
+    series = [s for s in series_no_periodo(usuario_id, dia_inicio, dia_fim) if s.pk != ignorar_serie]
+    if series:
+        ja_gravadas = set(excecoes(series, dia_inicio, dia_fim))
+        for a, b in faixas:
+            for ocorrencia in ocorrencias(series, ja_gravadas, a, b):
+                if ocorrencia.data_hora < b:
+                    itens.setdefault(ocorrencia.pk, ocorrencia)
+
+    for pk in ignorar:
+        itens.pop(pk, None)
+    return sorted(itens.values(), key=lambda a: (a.data_hora, a.pk))
+
+
+def _sobreposto(lista, inicios, inicio, termino):
+    margem = timedelta(minutes=settings.AGENDAMENTO_DURACAO_MAXIMA)
+    for outro in lista[bisect_left(inicios, inicio - margem) : bisect_left(inicios, termino)]:
+        if fim(outro) > inicio:
+            return outro
+    return None
+
+
+def _mensagem(outro):
+    quando = timezone.localtime(outro.data_hora).strftime("%d/%m/%Y %H:%M")
+    return f"Conflito com o agendamento de {outro.cliente.nome} em {quando}."
+
+
+def conflitos(usuario_id, itens, ignorar_serie=None):
+    """
+    ``itens``: ``[(data_hora, duracao_minutos, id ou None)]``. Devolve
+    ``{posição: mensagem}`` para os itens que se sobrepõem à agenda gravada ou a
+    outro item da lista.
+    """
+    janelas = [(inicio, inicio + timedelta(minutes=duracao)) for inicio, duracao, _ in itens]
+    lista = ocupados(usuario_id, janelas, ignorar={pk for *_, pk in itens if pk}, ignorar_serie=ignorar_serie)
+    inicios = [a.data_hora for a in lista]
+    encontrados = {}
+    for posicao, (inicio, termino) in enumerate(janelas):
+        if outro := _sobreposto(lista, inicios, inicio, termino):
+            encontrados[posicao] = _mensagem(outro)
+
+    # Entre os próprios itens (lotes): ordenados por início, basta comparar com o maior fim anterior
+    maior_fim = None
+    for posicao in sorted(range(len(janelas)), key=lambda p: janelas[p]):
+        inicio, termino = janelas[posicao]
+        if maior_fim is not None and inicio < maior_fim:
+            encontrados.setdefault(posicao, "Conflito com outro item do lote.")
+        maior_fim = termino if maior_fim is None else max(maior_fim, termino)
+    return encontrados
+
+
+def horarios_livres(usuario_id, dia_inicio, dia_fim, duracao, expediente):
+    """
+    Intervalos livres de pelo menos ``duracao`` minutos dentro do ``expediente``
+    (``(time, time)`` locais) de cada dia entre ``dia_inicio`` e ``dia_fim``.
+    """
+    hora_inicio, hora_fim = expediente
+    agora = timezone.now()
+    primeiro = timezone.make_aware(datetime.combine(dia_inicio, hora_inicio))
+    ultimo = timezone.make_aware(datetime.combine(dia_fim, hora_fim))
+    lista = ocupados(usuario_id, [(primeiro, ultimo)])
+    minimo = timedelta(minutes=duracao)
+
+    livres = []
+    indice = 0
+    dia = dia_inicio
+    while dia <= dia_fim:
+        cursor = max(timezone.make_aware(datetime.combine(dia, hora_inicio)), agora)
+        termino = timezone.make_aware(datetime.combine(dia, hora_fim))
+        dia += timedelta(days=1)
+        # Os ocupados que terminam antes do expediente do dia não interessam mais
+        while indice < len(lista) and fim(lista[indice]) <= cursor and lista[indice].data_hora < cursor:
+            indice += 1
+        for ocupado in lista[indice:]:
+            if ocupado.data_hora >= termino:
+                break
+            if ocupado.data_hora - cursor >= minimo:
+                livres.append((cursor, ocupado.data_hora))
+            cursor = max(cursor, fim(ocupado))
+        if termino - cursor >= minimo:
+            livres.append((cursor, termino))
+    return livres
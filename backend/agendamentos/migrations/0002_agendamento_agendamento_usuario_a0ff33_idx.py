@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0001_initial'),
+        ('clientes', '0002_cliente_clientes_cl_usuario_98a971_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['usuario', 'ativo', 'data_hora', 'id'], name='agendamento_usuario_a0ff33_idx'),
+        ),
+    ]
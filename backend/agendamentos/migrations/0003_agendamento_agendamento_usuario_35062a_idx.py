@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_agendamento_agendamento_usuario_a0ff33_idx'),
+        ('clientes', '0003_cliente_clientes_cl_usuario_e6856f_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['usuario', 'atualizado_em', 'id'], name='agendamento_usuario_35062a_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0003_agendamento_agendamento_usuario_35062a_idx'),
+        ('clientes', '0003_cliente_clientes_cl_usuario_e6856f_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='ocorrencia',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Recorrencia',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('intervalo_semanas', models.PositiveSmallIntegerField(default=1)),
+                ('data_inicio', models.DateField()),
+                ('hora', models.TimeField()),
+                ('data_fim', models.DateField(blank=True, null=True)),
+                ('dia_semana', models.PositiveSmallIntegerField(editable=False)),
+                ('observacoes', models.TextField(blank=True)),
+                ('ativo', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recorrencias', to='clientes.cliente')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recorrencias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['data_inicio', 'hora'],
+            },
+        ),
+        migrations.AddField(
+            model_name='agendamento',
+            name='recorrencia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='excecoes', to='agendamentos.recorrencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='agendamento',
+            constraint=models.UniqueConstraint(condition=models.Q(('recorrencia__isnull', False)), fields=('recorrencia', 'ocorrencia'), name='agendamento_unico_por_ocorrencia'),
+        ),
+        migrations.AddIndex(
+            model_name='recorrencia',
+            index=models.Index(fields=['usuario', 'ativo', 'data_inicio'], name='agendamento_usuario_32a98e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recorrencia',
+            index=models.Index(fields=['dia_semana', 'ativo'], name='agendamento_dia_sem_a2e2e3_idx'),
+        ),
+    ]
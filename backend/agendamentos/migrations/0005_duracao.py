@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0004_recorrencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='duracao_minutos',
+            field=models.PositiveSmallIntegerField(default=60),
+        ),
+        migrations.AddField(
+            model_name='recorrencia',
+            name='duracao_minutos',
+            field=models.PositiveSmallIntegerField(default=60),
+        ),
+    ]
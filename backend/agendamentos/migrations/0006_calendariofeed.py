@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '__first__'),
+        ('agendamentos', '0005_duracao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarioFeed',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendario_feed', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
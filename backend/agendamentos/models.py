@@ -7,6 +7,53 @@ from accounts.models import User
 from clientes.models import Cliente
 
 
+DURACAO_PADRAO_MINUTOS = 60
+
+
+class Recorrencia(models.Model):
+    """
+    Série de visitas a cada ``intervalo_semanas`` a partir de ``data_inicio``.
+
+    As ocorrências não são gravadas: são calculadas para a janela pedida
+    (``agendamentos.recorrencia``). Só viram ``Agendamento`` as ocorrências
+    alteradas, canceladas, removidas ou concluídas.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recorrencias")
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name="recorrencias")
+    # 1 = semanal, 2 = quinzenal...
+    intervalo_semanas = models.PositiveSmallIntegerField(default=1)
+    data_inicio = models.DateField()
+    # Hora local (TIME_ZONE) de cada visita
+    hora = models.TimeField()
+    duracao_minutos = models.PositiveSmallIntegerField(default=DURACAO_PADRAO_MINUTOS)
+    data_fim = models.DateField(null=True, blank=True)
+    # Derivado de data_inicio; permite buscar só as séries de um dia da semana
+    dia_semana = models.PositiveSmallIntegerField(editable=False)
+    observacoes = models.TextField(blank=True)
+    ativo = models.BooleanField(default=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["usuario", "ativo", "data_inicio"]),
+            models.Index(fields=["dia_semana", "ativo"]),
+        ]
+        ordering = ["data_inicio", "hora"]
+
+    def save(self, *args, **kwargs):
+        self.dia_semana = self.data_inicio.weekday()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data_inicio" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "dia_semana"}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.cliente.nome} - a cada {self.intervalo_semanas} semana(s) às {self.hora.strftime('%H:%M')}"
+
+
 class Agendamento(models.Model):
     class Status(models.TextChoices):
         PENDENTE = "pendente", "Pendente"
@@ -18,23 +65,51 @@ class Agendamento(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="agendamentos")
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name="agendamentos")
     data_hora = models.DateTimeField()
+    # O agendamento ocupa [data_hora, data_hora + duracao_minutos) na agenda do usuário
+    duracao_minutos = models.PositiveSmallIntegerField(default=DURACAO_PADRAO_MINUTOS)
     status = models.CharField(
         max_length=15,
         choices=Status.choices,
         default=Status.PENDENTE,
     )
     observacoes = models.TextField(blank=True)
+    # Ocorrência de uma série que ganhou linha própria: ``ocorrencia`` é a data
+    # original, mesmo que ``data_hora`` tenha sido remarcada
+    recorrencia = models.ForeignKey(
+        Recorrencia, on_delete=models.CASCADE, null=True, blank=True, related_name="excecoes"
+    )
+    ocorrencia = models.DateField(null=True, blank=True)
     ativo = models.BooleanField(default=True)
     criado_em = models.DateTimeField(default=timezone.now)
     atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recorrencia", "ocorrencia"],
+                condition=models.Q(recorrencia__isnull=False),
+                name="agendamento_unico_por_ocorrencia",
+            ),
+        ]
         indexes = [
             models.Index(fields=["usuario", "ativo"]),
             models.Index(fields=["cliente", "ativo"]),
             models.Index(fields=["data_hora", "status"]),
+            models.Index(fields=["usuario", "ativo", "data_hora", "id"]),
+            models.Index(fields=["usuario", "atualizado_em", "id"]),
         ]
         ordering = ["data_hora"]
 
     def __str__(self):
         return f"{self.cliente.nome} - {self.data_hora.strftime('%d/%m/%Y %H:%M')} ({self.status})"
+
+
+class CalendarioFeed(models.Model):
+    """Token secreto da URL do feed ``.ics`` do usuário (apps de calendário não enviam JWT)."""
+
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="calendario_feed")
+    token = models.CharField(max_length=64, unique=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Feed de {self.usuario.email}"
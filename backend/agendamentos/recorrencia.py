@@ -0,0 +1,171 @@
+"""
+Expansão preguiçosa das séries recorrentes (``Recorrencia``).
+
+As ocorrências de uma janela são calculadas a partir da data inicial e do
+intervalo, sem percorrer o histórico: o custo é proporcional às ocorrências
+que caem na janela. Cada ocorrência virtual é um ``Agendamento`` não salvo com
+id determinístico (``ocorrencia_id``), então serializers, dashboard e
+lembretes a tratam como uma linha comum e a notificação de uma ocorrência
+continua valendo depois que ela vira uma linha (``materializar``).
+
+Uma ocorrência que já tem linha própria (remarcada, concluída, cancelada ou
+removida com ``ativo=False``) não é expandida: vale a linha.
+"""
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Agendamento, Recorrencia
+
+
+def ocorrencia_id(recorrencia_id, dia):
+    return uuid.uuid5(recorrencia_id, dia.isoformat())
+
+
+def datas(recorrencia, inicio, fim):
+    """Datas das ocorrências da série entre ``inicio`` e ``fim`` (datas, inclusive)."""
+    passo = 7 * recorrencia.intervalo_semanas
+    if recorrencia.data_fim and recorrencia.data_fim < fim:
+        fim = recorrencia.data_fim
+    # Primeira ocorrência >= inicio, calculada direto (sem iterar desde data_inicio)
+    saltos = max(0, -(-(inicio - recorrencia.data_inicio).days // passo))
+    dia = recorrencia.data_inicio + timedelta(days=saltos * passo)
+    while dia <= fim:
+        yield dia
+        dia += timedelta(days=passo)
+
+
+def data_hora(recorrencia, dia):
+    return timezone.make_aware(datetime.combine(dia, recorrencia.hora))
+
+
+def virtual(recorrencia, dia):
+    return Agendamento(
+        id=ocorrencia_id(recorrencia.pk, dia),
+        usuario_id=recorrencia.usuario_id,
+        cliente=recorrencia.cliente,
+        data_hora=data_hora(recorrencia, dia),
+        duracao_minutos=recorrencia.duracao_minutos,
+        status=Agendamento.Status.PENDENTE,
+        observacoes=recorrencia.observacoes,
+        recorrencia=recorrencia,
+        ocorrencia=dia,
+        criado_em=recorrencia.criado_em,
+        atualizado_em=recorrencia.atualizado_em,
+    )
+
+
+def _dias(inicio, fim):
+    return timezone.localdate(inicio), timezone.localdate(fim)
+
+
+def series_no_periodo(usuario_id, inicio, fim):
+    """Séries ativas do usuário com alguma data entre ``inicio`` e ``fim`` (datas)."""
+    return (
+        Recorrencia.objects.filter(usuario_id=usuario_id, ativo=True, cliente__ativo=True, data_inicio__lte=fim)
+        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=inicio))
+        .select_related("cliente")
+    )
+
+
+def excecoes(series, inicio, fim):
+    """``(recorrencia_id, ocorrencia)`` que já têm linha própria no período (ativas ou não)."""
+    return Agendamento.objects.filter(
+        recorrencia__in=[s.pk for s in series], ocorrencia__gte=inicio, ocorrencia__lte=fim
+    ).values_list("recorrencia_id", "ocorrencia")
+
+
+def ocorrencias(series, ja_gravadas, inicio, fim):
+    """Ocorrências virtuais com ``inicio <= data_hora <= fim`` (datetimes), em ordem."""
+    dia_inicio, dia_fim = _dias(inicio, fim)
+    resultado = []
+    for serie in series:
+        for dia in datas(serie, dia_inicio, dia_fim):
+            if (serie.pk, dia) in ja_gravadas:
+                continue
+            ocorrencia = virtual(serie, dia)
+            if inicio <= ocorrencia.data_hora <= fim:
+                resultado.append(ocorrencia)
+    resultado.sort(key=lambda a: (a.data_hora, a.id))
+    return resultado
+
+
+def expandir(usuario_id, inicio, fim):
+    dia_inicio, dia_fim = _dias(inicio, fim)
+    series = list(series_no_periodo(usuario_id, dia_inicio, dia_fim))
+    if not series:
+        return []
+    ja_gravadas = set(excecoes(series, dia_inicio, dia_fim))
+    return ocorrencias(series, ja_gravadas, inicio, fim)
+
+
+async def aexpandir(usuario_id, inicio, fim):
+    dia_inicio, dia_fim = _dias(inicio, fim)
+    series = [s async for s in series_no_periodo(usuario_id, dia_inicio, dia_fim)]
+    if not series:
+        return []
+    ja_gravadas = {par async for par in excecoes(series, dia_inicio, dia_fim)}
+    return ocorrencias(series, ja_gravadas, inicio, fim)
+
+
+def agenda(usuario_id, inicio, fim, limite=None):
+    """Agendamentos gravados e ocorrências virtuais do período, em ordem de ``data_hora``."""
+    gravados = (
+        Agendamento.objects.filter(usuario_id=usuario_id, ativo=True, data_hora__gte=inicio, data_hora__lte=fim)
+        .select_related("cliente")
+        .order_by("data_hora", "id")
+    )
+    if limite is not None:
+        gravados = gravados[:limite]
+    return mesclar(list(gravados), expandir(usuario_id, inicio, fim), limite)
+
+
+def mesclar(gravados, virtuais, limite=None):
+    itens = sorted([*gravados, *virtuais], key=lambda a: (a.data_hora, a.id))
+    return itens[:limite] if limite is not None else itens
+
+
+def materializar(recorrencia, dia, **campos):
+    """Grava a ocorrência ``dia`` da série como ``Agendamento`` (mesmo id da versão virtual)."""
+    agendamento = virtual(recorrencia, dia)
+    agendamento.criado_em = timezone.now()
+    for campo, valor in campos.items():
+        setattr(agendamento, campo, valor)
+    agendamento.save(force_insert=True)
+    return agendamento
+
+
+def e_ocorrencia(recorrencia, dia):
+    return next(datas(recorrencia, dia, dia), None) == dia
+
+
+def series_do_dia(dia):
+    """Séries ativas (de todos os usuários) que podem ter ocorrência em ``dia``."""
+    return (
+        Recorrencia.objects.filter(dia_semana=dia.weekday(), ativo=True, cliente__ativo=True, data_inicio__lte=dia)
+        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=dia))
+        .select_related("cliente")
+    )
+
+
+def ocorrencias_do_dia(series, dia, tamanho_lote):
+    """
+    Ocorrências virtuais de ``dia`` como dicts no formato de
+    ``values("id", "usuario_id", "data_hora", "cliente__nome")``, lidas em lotes.
+    """
+    it = series.order_by().iterator(chunk_size=tamanho_lote)
+    while lote := list(islice(it, tamanho_lote)):
+        lote = [serie for serie in lote if e_ocorrencia(serie, dia)]
+        ja_gravadas = set(excecoes(lote, dia, dia)) if lote else set()
+        for serie in lote:
+            if (serie.pk, dia) in ja_gravadas:
+                continue
+            yield {
+                "id": ocorrencia_id(serie.pk, dia),
+                "usuario_id": serie.usuario_id,
+                "data_hora": data_hora(serie, dia),
+                "cliente__nome": serie.cliente.nome,
+            }
@@ -0,0 +1,113 @@
+"""
+Ordem de visitas do dia que minimiza o deslocamento (caminho aberto).
+
+A matriz de distâncias (haversine, em km) é calculada uma vez por rota; o
+solver só consulta a matriz. Heurística: vizinho mais próximo a partir de
+cada ponto de partida possível, seguido de busca local com 2-opt (inverte um
+trecho) e or-opt (move trechos de 1 a 3 paradas) até não haver melhora.
+Para algumas dezenas de paradas o resultado sai em milissegundos.
+"""
+from math import asin, cos, radians, sin, sqrt
+
+RAIO_TERRA_KM = 6371.0088
+# Acima disto só o vizinho mais próximo (a busca local cresce ~n³)
+MAX_PARADAS_BUSCA_LOCAL = 200
+# Melhoras menores que isto (km) são tratadas como empate, evitando ciclos por arredondamento
+EPSILON = 1e-9
+
+
+def haversine(a, b):
+    lat1, lng1 = map(radians, a)
+    lat2, lng2 = map(radians, b)
+    h = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * asin(sqrt(h))
+
+
+def matriz_distancias(pontos):
+    n = len(pontos)
+    matriz = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            matriz[i][j] = matriz[j][i] = haversine(pontos[i], pontos[j])
+    return matriz
+
+
+def comprimento(rota, d):
+    return sum(d[a][b] for a, b in zip(rota, rota[1:]))
+
+
+def vizinho_mais_proximo(d, inicio):
+    restantes = set(range(len(d)))
+    restantes.discard(inicio)
+    rota = [inicio]
+    while restantes:
+        atual = d[rota[-1]]
+        proximo = min(restantes, key=atual.__getitem__)
+        restantes.remove(proximo)
+        rota.append(proximo)
+    return rota
+
+
+def _dois_opt(rota, d, fixo):
+    """Inverte ``rota[i:j+1]`` quando encurta o caminho; ``fixo`` mantém a primeira parada."""
+    n = len(rota)
+    melhorou = False
+    for i in range(1 if fixo else 0, n - 1):
+        for j in range(i + 1, n):
+            a, b = rota[i - 1] if i > 0 else None, rota[i]
+            c, e = rota[j], rota[j + 1] if j + 1 < n else None
+            antes = (d[a][b] if a is not None else 0) + (d[c][e] if e is not None else 0)
+            depois = (d[a][c] if a is not None else 0) + (d[b][e] if e is not None else 0)
+            if depois < antes - EPSILON:
+                rota[i : j + 1] = reversed(rota[i : j + 1])
+                melhorou = True
+    return melhorou
+
+
+def _or_opt(rota, d, fixo):
+    """Move um trecho de 1 a 3 paradas (mantendo ou invertendo o sentido) para outra posição."""
+    n = len(rota)
+    for tamanho in (1, 2, 3):
+        for i in range(1 if fixo else 0, n - tamanho + 1):
+            trecho = rota[i : i + tamanho]
+            anterior = rota[i - 1] if i > 0 else None
+            seguinte = rota[i + tamanho] if i + tamanho < n else None
+            ganho = (d[anterior][trecho[0]] if anterior is not None else 0) + (
+                d[trecho[-1]][seguinte] if seguinte is not None else 0
+            )
+            if anterior is not None and seguinte is not None:
+                ganho -= d[anterior][seguinte]
+            resto = rota[:i] + rota[i + tamanho :]
+            # Inserir entre resto[k-1] e resto[k]; k == len(resto) é o fim do caminho
+            for k in range(1 if fixo else 0, len(resto) + 1):
+                if k == i:
+                    continue
+                a = resto[k - 1] if k > 0 else None
+                b = resto[k] if k < len(resto) else None
+                base = d[a][b] if a is not None and b is not None else 0
+                for candidato in (trecho, trecho[::-1]):
+                    custo = (d[a][candidato[0]] if a is not None else 0) + (
+                        d[candidato[-1]][b] if b is not None else 0
+                    ) - base
+                    if custo < ganho - EPSILON:
+                        rota[:] = resto[:k] + candidato + resto[k:]
+                        return True
+    return False
+
+
+def otimizar(d, inicio=None):
+    """
+    Ordem dos índices da matriz ``d`` com menor caminho encontrado. Com
+    ``inicio`` (ex.: a base do técnico) o caminho parte obrigatoriamente dele.
+    """
+    n = len(d)
+    if n <= 2:
+        return list(range(n)) if inicio in (None, 0) else [inicio, *(i for i in range(n) if i != inicio)]
+    if n > MAX_PARADAS_BUSCA_LOCAL:
+        return vizinho_mais_proximo(d, inicio or 0)
+    partidas = [inicio] if inicio is not None else range(n)
+    rota = min((vizinho_mais_proximo(d, p) for p in partidas), key=lambda r: comprimento(r, d))
+    fixo = inicio is not None
+    while _dois_opt(rota, d, fixo) or _or_opt(rota, d, fixo):
+        pass
+    return rota
@@ -1,6 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Agendamento
+from config.bulk import PrefetchedRelatedField
+
+from .disponibilidade import conflitos
+from .models import DURACAO_PADRAO_MINUTOS, Agendamento, Recorrencia
+from .recorrencia import data_hora, datas, e_ocorrencia, ocorrencia_id
+
+DURACAO = {"min_value": 1, "max_value": settings.AGENDAMENTO_DURACAO_MAXIMA}
 
 
 class AgendamentoSerializer(serializers.ModelSerializer):
@@ -13,20 +23,168 @@ class AgendamentoSerializer(serializers.ModelSerializer):
             "cliente",
             "cliente_nome",
             "data_hora",
+            "duracao_minutos",
             "status",
             "observacoes",
+            "recorrencia",
+            "ocorrencia",
             "ativo",
             "criado_em",
             "atualizado_em",
         ]
-        read_only_fields = ["id", "criado_em", "atualizado_em"]
+        read_only_fields = ["id", "recorrencia", "ocorrencia", "criado_em", "atualizado_em"]
+
+
+class AgendaSerializer(AgendamentoSerializer):
+    """Item da agenda: ``virtual`` indica ocorrência de série ainda sem linha própria."""
+
+    virtual = serializers.SerializerMethodField()
+
+    class Meta(AgendamentoSerializer.Meta):
+        fields = AgendamentoSerializer.Meta.fields + ["virtual"]
+
+    def get_virtual(self, obj):
+        return obj._state.adding
 
 
 class AgendamentoCreateUpdateSerializer(serializers.ModelSerializer):
+    # Os endpoints em lote checam os conflitos do lote inteiro de uma vez
+    verificar_conflitos = True
+
     class Meta:
         model = Agendamento
-        fields = ["cliente", "data_hora", "status", "observacoes"]
+        fields = ["cliente", "data_hora", "duracao_minutos", "status", "observacoes"]
         extra_kwargs = {
             "cliente": {"required": True},
             "data_hora": {"required": True},
+            "duracao_minutos": DURACAO,
         }
+
+    def validate(self, attrs):
+        if not self.verificar_conflitos or not self._ocupa_novo_horario(attrs):
+            return attrs
+        instance = self.instance
+        inicio = attrs.get("data_hora", getattr(instance, "data_hora", None))
+        duracao = attrs.get("duracao_minutos", getattr(instance, "duracao_minutos", DURACAO_PADRAO_MINUTOS))
+        encontrados = conflitos(self.context["request"].user.pk, [(inicio, duracao, getattr(instance, "pk", None))])
+        if encontrados:
+            raise serializers.ValidationError({"data_hora": encontrados[0]})
+        return attrs
+
+    def _ocupa_novo_horario(self, attrs):
+        """Criação, ou alteração que mexe no horário/duração ou reativa um cancelado."""
+        status = attrs.get("status", getattr(self.instance, "status", Agendamento.Status.PENDENTE))
+        if status == Agendamento.Status.CANCELADO:
+            return False
+        if self.instance is None:
+            return True
+        return any(
+            campo in attrs and attrs[campo] != getattr(self.instance, campo)
+            for campo in ("data_hora", "duracao_minutos", "status")
+        )
+
+
+class AgendamentoBulkSerializer(AgendamentoCreateUpdateSerializer):
+    """Item dos endpoints em lote: FKs resolvidas sem uma consulta por item."""
+
+    verificar_conflitos = False
+    cliente = PrefetchedRelatedField()
+
+
+class RecorrenciaSerializer(serializers.ModelSerializer):
+    cliente_nome = serializers.CharField(source="cliente.nome", read_only=True)
+
+    class Meta:
+        model = Recorrencia
+        fields = [
+            "id",
+            "cliente",
+            "cliente_nome",
+            "intervalo_semanas",
+            "data_inicio",
+            "hora",
+            "duracao_minutos",
+            "data_fim",
+            "observacoes",
+            "ativo",
+            "criado_em",
+            "atualizado_em",
+        ]
+        read_only_fields = ["id", "ativo", "criado_em", "atualizado_em"]
+        extra_kwargs = {"intervalo_semanas": {"min_value": 1, "max_value": 52}, "duracao_minutos": DURACAO}
+
+    def validate_cliente(self, value):
+        if value.usuario_id != self.context["request"].user.pk or not value.ativo:
+            raise serializers.ValidationError("Cliente não encontrado.")
+        return value
+
+    def validate(self, attrs):
+        data_inicio = attrs.get("data_inicio", getattr(self.instance, "data_inicio", None))
+        data_fim = attrs.get("data_fim", getattr(self.instance, "data_fim", None))
+        if data_inicio and data_fim and data_fim < data_inicio:
+            raise serializers.ValidationError({"data_fim": "Deve ser igual ou posterior à data de início."})
+        if self._ocupa_novos_horarios(attrs):
+            self._verificar_conflitos(attrs)
+        return attrs
+
+    CAMPOS_DE_HORARIO = ("data_inicio", "hora", "intervalo_semanas", "duracao_minutos", "data_fim")
+
+    def _ocupa_novos_horarios(self, attrs):
+        if self.instance is None:
+            return True
+        return any(campo in attrs and attrs[campo] != getattr(self.instance, campo) for campo in self.CAMPOS_DE_HORARIO)
+
+    def _verificar_conflitos(self, attrs):
+        """
+        Ocorrências da série (como ficará) nos primeiros ``RECORRENCIA_CONFLITOS_DIAS``
+        a partir de hoje ou do início da série, contra a agenda; a série não é
+        expandida além disso.
+        """
+        instance = self.instance
+        campos = {campo: attrs.get(campo, getattr(instance, campo, None)) for campo in self.CAMPOS_DE_HORARIO}
+        # Campos omitidos na criação ficam com o padrão do modelo
+        serie = Recorrencia(**{campo: valor for campo, valor in campos.items() if valor is not None})
+        inicio = max(serie.data_inicio, timezone.localdate())
+        dias = datas(serie, inicio, inicio + timedelta(days=settings.RECORRENCIA_CONFLITOS_DIAS))
+        # Ocorrências que já têm linha própria não são expandidas; as virtuais atuais da série não contam
+        ja_gravadas = set(instance.excecoes.values_list("ocorrencia", flat=True)) if instance else set()
+        itens = [(data_hora(serie, dia), serie.duracao_minutos, None) for dia in dias if dia not in ja_gravadas]
+        if not itens:
+            return
+        encontrados = conflitos(
+            self.context["request"].user.pk, itens, ignorar_serie=getattr(instance, "pk", None)
+        )
+        if encontrados:
+            raise serializers.ValidationError({"hora": encontrados[min(encontrados)]})
+
+
+class OcorrenciaSerializer(serializers.Serializer):
+    """Ocorrência de uma série que passa a ter linha própria (remarcada, concluída...)."""
+
+    ocorrencia = serializers.DateField()
+    data_hora = serializers.DateTimeField(required=False)
+    duracao_minutos = serializers.IntegerField(required=False, **DURACAO)
+    status = serializers.ChoiceField(choices=Agendamento.Status.choices, required=False)
+    observacoes = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_ocorrencia(self, value):
+        recorrencia = self.context["recorrencia"]
+        if not e_ocorrencia(recorrencia, value):
+            raise serializers.ValidationError("Data fora da série.")
+        if recorrencia.excecoes.filter(ocorrencia=value).exists():
+            raise serializers.ValidationError("Esta ocorrência já foi registrada.")
+        return value
+
+    def validate(self, attrs):
+        recorrencia = self.context["recorrencia"]
+        dia = attrs["ocorrencia"]
+        if attrs.get("status") == Agendamento.Status.CANCELADO:
+            return attrs
+        inicio = attrs.get("data_hora", data_hora(recorrencia, dia))
+        duracao = attrs.get("duracao_minutos", recorrencia.duracao_minutos)
+        # A própria ocorrência virtual tem o mesmo id da linha que será criada
+        item = (inicio, duracao, ocorrencia_id(recorrencia.pk, dia))
+        encontrados = conflitos(recorrencia.usuario_id, [item])
+        if encontrados:
+            raise serializers.ValidationError({"data_hora": encontrados[0]})
+        return attrs
@@ -1,14 +1,29 @@
+import itertools
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from clientes.models import Cliente
-from .models import Agendamento
+from clientes.tasks import geocodificar_lista
+from config.testing import QueryCountAssertionsMixin
+from . import rotas
+from .models import Agendamento, Recorrencia
+from .recorrencia import datas, materializar, ocorrencia_id
 
 User = get_user_model()
 
 
-class AgendamentosCrudTests(APITestCase):
+class AgendamentosCrudTests(QueryCountAssertionsMixin, APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(email="owner@example.com", password="strongpass123")
         self.other = User.objects.create_user(email="other@example.com", password="strongpass123")
@@ -37,12 +52,12 @@ class AgendamentosCrudTests(APITestCase):
         # List owner-only
         resp2 = c.get(self.list_url)
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(resp2.data), 1)
+        self.assertGreaterEqual(len(resp2.data["results"]), 1)
 
         # Other user sees none
         c2 = self.auth(self.other)
         resp3 = c2.get(self.list_url)
-        self.assertEqual(len(resp3.data), 0)
+        self.assertEqual(len(resp3.data["results"]), 0)
 
         # Soft delete
         detail_url = f"{self.list_url}{aid}/"
@@ -51,4 +66,421 @@ class AgendamentosCrudTests(APITestCase):
 
         # Ensure not listed after delete
         resp4 = c.get(self.list_url)
-        self.assertTrue(all(it.get("id") != aid for it in resp4.data))
+        self.assertTrue(all(it.get("id") != aid for it in resp4.data["results"]))
+
+    def test_list_and_export_query_count_is_constant(self):
+        c = self.auth(self.user)
+
+        def add_rows(n):
+            for i in range(n):
+                cliente = Cliente.objects.create(usuario=self.user, nome=f"Cliente {i}")
+                Agendamento.objects.create(usuario=self.user, cliente=cliente, data_hora="2030-01-01T10:00:00Z")
+
+        self.assertConstantQueries(lambda: c.get(self.list_url), add_rows)
+        self.assertConstantQueries(lambda: c.get("/api/relatorios/agendamentos/csv/"), add_rows)
+
+
+class AgendamentoBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="bulk@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_criacao_em_lote_grava_eventos_na_outbox(self):
+        from notificacoes.models import NotificacaoOutbox
+
+        itens = [
+            {"cliente": str(self.cliente.id), "data_hora": f"2030-01-{dia:02d}T10:00:00Z"}
+            for dia in range(1, 6)
+        ]
+        resp = self.client.post("/api/agendamentos/bulk/", itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        ids = {item["id"] for item in resp.data["results"]}
+        eventos = NotificacaoOutbox.objects.filter(usuario=self.user)
+        self.assertEqual({str(e.agendamento_id) for e in eventos}, ids)
+        self.assertEqual(eventos.first().payload["cliente_nome"], "Cliente A")
+
+        # Id repetido no mesmo lote é recusado
+        primeiro = next(iter(ids))
+        resp = self.client.patch(
+            "/api/agendamentos/bulk/",
+            [{"id": primeiro, "status": "confirmado"}, {"id": primeiro, "status": "cancelado"}],
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data["errors"][0], {})
+        self.assertIn("id", resp.data["errors"][1])
+
+
+class RecorrenciaTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="serie@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def criar_serie(self, **dados):
+        payload = {"cliente": str(self.cliente.id), "data_inicio": "2030-01-07", "hora": "09:00", **dados}
+        resp = self.client.post("/api/agendamentos/recorrencias/", payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        return resp.data["id"]
+
+    def agenda(self, inicio, fim):
+        resp = self.client.get(f"/api/agendamentos/agenda/?inicio={inicio}&fim={fim}")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data["results"]
+
+    def test_ocorrencias_expandidas_so_na_janela(self):
+        self.criar_serie()
+        self.criar_serie(intervalo_semanas=2, hora="14:00", data_fim="2030-03-01")
+
+        itens = self.agenda("2030-02-01", "2030-02-28")
+        semanais = [i for i in itens if i["data_hora"].endswith("09:00:00Z")]
+        quinzenais = [i for i in itens if i["data_hora"].endswith("14:00:00Z")]
+        self.assertEqual([i["ocorrencia"] for i in semanais], ["2030-02-04", "2030-02-11", "2030-02-18", "2030-02-25"])
+        self.assertEqual([i["ocorrencia"] for i in quinzenais], ["2030-02-04", "2030-02-18"])
+        self.assertTrue(all(i["virtual"] for i in itens))
+        # Depois de data_fim a série quinzenal para; nada foi gravado
+        self.assertEqual(len(self.agenda("2030-03-02", "2030-03-31")), 4)
+        self.assertFalse(Agendamento.objects.exists())
+        # Ids estáveis entre leituras
+        self.assertEqual(itens[0]["id"], self.agenda("2030-02-01", "2030-02-28")[0]["id"])
+
+    def test_ocorrencia_materializada_substitui_a_virtual(self):
+        serie = self.criar_serie()
+        virtual = self.agenda("2030-01-14", "2030-01-14")[0]
+
+        url = f"/api/agendamentos/recorrencias/{serie}/ocorrencias/"
+        resp = self.client.post(url, {"ocorrencia": "2030-01-14", "data_hora": "2030-01-16T10:00:00Z"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(resp.data["id"], virtual["id"])
+        # Remarcada: some do dia 14 e aparece no dia 16 como linha gravada
+        self.assertEqual(self.agenda("2030-01-14", "2030-01-14"), [])
+        [remarcada] = self.agenda("2030-01-16", "2030-01-16")
+        self.assertFalse(remarcada["virtual"])
+
+        # A mesma ocorrência não é registrada duas vezes, nem datas fora da série
+        self.assertEqual(self.client.post(url, {"ocorrencia": "2030-01-14"}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(url, {"ocorrencia": "2030-01-15"}, format="json").status_code, 400)
+
+        # Excluir a linha cancela a ocorrência sem voltar a versão virtual
+        self.client.delete(f"/api/agendamentos/{remarcada['id']}/")
+        self.assertEqual(self.agenda("2030-01-14", "2030-01-16"), [])
+
+    def test_custo_da_agenda_nao_depende_do_historico(self):
+        for semanas in (1, 2):
+            self.criar_serie(data_inicio="2020-01-06", intervalo_semanas=semanas, hora=f"{8 + semanas:02d}:00")
+
+        historico = {serie.pk: datas(serie, serie.data_inicio, date(2029, 1, 1)) for serie in Recorrencia.objects.all()}
+
+        def add_rows(n):
+            # Histórico antigo de ocorrências concluídas
+            for serie in Recorrencia.objects.all():
+                for _ in range(n):
+                    materializar(serie, next(historico[serie.pk]), status="realizado")
+
+        total = self.assertConstantQueries(
+            lambda: self.client.get("/api/agendamentos/agenda/?inicio=2030-01-01&fim=2030-03-31"), add_rows
+        )
+        self.assertLessEqual(total, 3)
+
+    def test_dashboard_e_lembretes_incluem_ocorrencias(self):
+        from notificacoes.models import Notificacao
+        from notificacoes.tasks import criar_notificacao_lembrete_agendamento
+
+        amanha = timezone.localdate() + timedelta(days=1)
+        serie = self.criar_serie(data_inicio=(amanha - timedelta(weeks=3)).isoformat(), hora="23:59")
+        outra = self.criar_serie(data_inicio=(amanha - timedelta(weeks=2)).isoformat())
+
+        resp = self.client.get("/api/dashboard/stats/")
+        self.assertEqual(len(resp.data["proximos_agendamentos"]), 2)
+
+        # A ocorrência de amanhã da segunda série foi cancelada: só a primeira recebe lembrete
+        materializar(Recorrencia.objects.get(id=outra), amanha, status="cancelado")
+        criar_notificacao_lembrete_agendamento(dia=amanha.isoformat())
+        criar_notificacao_lembrete_agendamento(dia=amanha.isoformat())
+        [notificacao] = Notificacao.objects.filter(usuario=self.user, tipo="agendamento_lembrete")
+        self.assertEqual(notificacao.agendamento_id, ocorrencia_id(uuid.UUID(serie), amanha))
+
+    def test_serie_nova_ou_alterada_checa_conflitos_no_horizonte(self):
+        segunda = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+        url = "/api/agendamentos/recorrencias/"
+        serie = self.criar_serie(data_inicio=segunda.isoformat(), hora="09:00")
+        # Agendamento avulso na terceira semana da série das 14h
+        Agendamento.objects.create(
+            usuario=self.user,
+            cliente=self.cliente,
+            data_hora=timezone.make_aware(datetime.combine(segunda + timedelta(weeks=2), time(14, 30))),
+        )
+
+        payload = {"cliente": str(self.cliente.id), "data_inicio": segunda.isoformat()}
+        for hora in ("09:30", "14:00"):
+            resp = self.client.post(url, {**payload, "hora": hora}, format="json")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, hora)
+            self.assertIn("Conflito", resp.data["hora"][0])
+        # Fora do horizonte checado a série é aceita
+        depois = segunda + timedelta(days=settings.RECORRENCIA_CONFLITOS_DIAS + 7)
+        self.criar_serie(data_inicio=depois.isoformat(), hora="14:00", data_fim=(depois + timedelta(weeks=4)).isoformat())
+
+        # Alterar a própria série não conflita com as ocorrências atuais dela; mover para cima de outra, sim
+        resp = self.client.patch(f"{url}{serie}/", {"hora": "09:30"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        resp = self.client.patch(f"{url}{serie}/", {"hora": "14:00"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        # Alterações que não mexem no horário não são checadas
+        resp = self.client.patch(f"{url}{serie}/", {"observacoes": "Portão azul"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_serie_de_outro_usuario_ou_cliente_alheio(self):
+        outro = User.objects.create_user(email="alheio@example.com", password="strongpass123")
+        cliente_alheio = Cliente.objects.create(usuario=outro, nome="Alheio")
+        resp = self.client.post(
+            "/api/agendamentos/recorrencias/",
+            {"cliente": str(cliente_alheio.id), "data_inicio": "2030-01-07", "hora": "09:00"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        serie = self.criar_serie()
+        c2 = APIClient()
+        c2.force_authenticate(user=outro)
+        self.assertEqual(c2.get(f"/api/agendamentos/recorrencias/{serie}/").status_code, 404)
+        self.assertEqual(
+            c2.post(f"/api/agendamentos/recorrencias/{serie}/ocorrencias/", {"ocorrencia": "2030-01-14"}, format="json").status_code,
+            404,
+        )
+        self.assertEqual(c2.get("/api/agendamentos/agenda/?inicio=2030-01-01&fim=2030-01-31").data["results"], [])
+
+
+class RotaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="rota@example.com", password="strongpass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def visita(self, nome, hora, lat=None, lng=None, endereco="Rua X"):
+        cliente = Cliente.objects.create(
+            usuario=self.user,
+            nome=nome,
+            endereco=endereco,
+            latitude=lat,
+            longitude=lng,
+            endereco_geocodificado=endereco if lat is not None else "",
+        )
+        Agendamento.objects.create(usuario=self.user, cliente=cliente, data_hora=f"2030-01-07T{hora}:00Z")
+        return cliente
+
+    def test_ordena_visitas_pelo_menor_caminho(self):
+        # Pontos numa reta (oeste -> leste), agendados fora de ordem
+        for nome, hora, lng in [("C", "08:00", -46.60), ("A", "09:00", -46.70), ("D", "10:00", -46.55), ("B", "11:00", -46.65)]:
+            self.visita(nome, hora, -23.5, lng)
+        self.visita("Sem endereço", "12:00", endereco="")
+
+        resp = self.client.get("/api/agendamentos/rota/?data=2030-01-07&origem_lat=-23.5&origem_lng=-46.75")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["cliente_nome"] for p in resp.data["paradas"]], ["A", "B", "C", "D"])
+        self.assertEqual([p["ordem"] for p in resp.data["paradas"]], [1, 2, 3, 4])
+        self.assertLess(resp.data["distancia_km"], resp.data["distancia_por_horario_km"])
+        self.assertEqual([v["cliente_nome"] for v in resp.data["sem_localizacao"]], ["Sem endereço"])
+
+        resp = self.client.get("/api/agendamentos/rota/?data=2030-01-07&origem_lat=abc&origem_lng=1")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_enfileira_pendentes_e_resolve_muitas_paradas(self):
+        clientes = [
+            self.visita(f"Cliente {i}", f"{8 + i % 10:02d}:{i:02d}", endereco=f"Rua {i}, {i * 7}") for i in range(60)
+        ]
+
+        # O GET não geocodifica: as paradas pendentes vêm em sem_localizacao e vão para a fila
+        with mock.patch.object(geocodificar_lista, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.get("/api/agendamentos/rota/?data=2030-01-07")
+        self.assertEqual(resp.data["paradas"], [])
+        self.assertEqual(len(resp.data["sem_localizacao"]), 60)
+        self.assertEqual(Cliente.objects.filter(latitude__isnull=True).count(), 60)
+        delay.assert_called_once()
+        self.assertCountEqual(delay.call_args.args[0], [str(c.pk) for c in clientes])
+
+        geocodificar_lista(*delay.call_args.args)
+        resp = self.client.get("/api/agendamentos/rota/?data=2030-01-07")
+        self.assertEqual(len(resp.data["paradas"]), 60)
+        self.assertEqual(resp.data["sem_localizacao"], [])
+        self.assertLessEqual(resp.data["distancia_km"], resp.data["distancia_por_horario_km"])
+        self.assertFalse(Cliente.objects.filter(latitude__isnull=True).exists())
+
+
+class RotasSolverTests(SimpleTestCase):
+    def test_busca_local_nao_piora_o_vizinho_mais_proximo(self):
+        gerador = random.Random(7)
+        pontos = [(gerador.uniform(-23.7, -23.4), gerador.uniform(-46.8, -46.4)) for _ in range(8)]
+        d = rotas.matriz_distancias(pontos)
+        rota = rotas.otimizar(d, 0)
+        self.assertEqual(rota[0], 0)
+        self.assertEqual(sorted(rota), list(range(8)))
+        # Para 8 pontos dá para comparar com a força bruta
+        otimo = min(rotas.comprimento([0, *p], d) for p in itertools.permutations(range(1, 8)))
+        self.assertLessEqual(rotas.comprimento(rota, d), otimo * 1.05)
+        self.assertLessEqual(rotas.comprimento(rota, d), rotas.comprimento(rotas.vizinho_mais_proximo(d, 0), d))
+
+
+class ConflitoDisponibilidadeTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="agenda@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def criar(self, data_hora, **dados):
+        payload = {"cliente": str(self.cliente.id), "data_hora": data_hora, **dados}
+        return self.client.post("/api/agendamentos/", payload, format="json")
+
+    def test_conflitos_rejeitados_na_criacao_e_alteracao(self):
+        self.assertEqual(self.criar("2030-01-07T10:00:00Z").status_code, status.HTTP_201_CREATED)
+        resp = self.criar("2030-01-07T10:30:00Z")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Cliente A", resp.data["data_hora"][0])
+        # Encostado no fim do anterior e cancelados não conflitam
+        self.assertEqual(self.criar("2030-01-07T11:00:00Z", duracao_minutos=30).status_code, 201)
+        self.assertEqual(self.criar("2030-01-07T10:15:00Z", status="cancelado").status_code, 201)
+
+        outro = Agendamento.objects.get(data_hora__hour=11)
+        resp = self.client.patch(f"/api/agendamentos/{outro.id}/", {"data_hora": "2030-01-07T09:45:00Z"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        # Alterar só observações (ou o próprio horário sem sobrepor) continua livre
+        resp = self.client.patch(f"/api/agendamentos/{outro.id}/", {"observacoes": "ok", "duracao_minutos": 45}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+
+    def test_conflito_com_ocorrencia_de_serie_e_em_lote(self):
+        serie = Recorrencia.objects.create(
+            usuario=self.user, cliente=self.cliente, data_inicio=date(2030, 1, 7), hora="14:00", duracao_minutos=90
+        )
+        self.assertEqual(self.criar("2030-01-14T15:00:00Z").status_code, status.HTTP_400_BAD_REQUEST)
+        # Remarcar a própria ocorrência para um horário sobreposto ao original não conflita consigo mesma
+        resp = self.client.post(
+            f"/api/agendamentos/recorrencias/{serie.id}/ocorrencias/",
+            {"ocorrencia": "2030-01-14", "data_hora": "2030-01-14T14:30:00Z"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+
+        itens = [
+            {"cliente": str(self.cliente.id), "data_hora": "2030-01-08T08:00:00Z"},
+            {"cliente": str(self.cliente.id), "data_hora": "2030-01-08T08:30:00Z"},
+            {"cliente": str(self.cliente.id), "data_hora": "2030-01-21T14:00:00Z"},
+        ]
+        resp = self.client.post("/api/agendamentos/bulk/", itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data["errors"][0], {})
+        self.assertIn("data_hora", resp.data["errors"][1])
+        self.assertIn("data_hora", resp.data["errors"][2])
+        self.assertEqual(Agendamento.objects.count(), 1)
+
+    def test_horarios_livres(self):
+        self.criar("2030-01-07T10:00:00Z")
+        Recorrencia.objects.create(usuario=self.user, cliente=self.cliente, data_inicio=date(2030, 1, 7), hora="14:00")
+
+        resp = self.client.get("/api/agendamentos/disponibilidade/?inicio=2030-01-07&fim=2030-01-08&duracao=120")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["inicio"][:16], item["fim"][:16]) for item in resp.data["results"]],
+            [
+                ("2030-01-07T08:00", "2030-01-07T10:00"),
+                ("2030-01-07T11:00", "2030-01-07T14:00"),
+                ("2030-01-07T15:00", "2030-01-07T18:00"),
+                ("2030-01-08T08:00", "2030-01-08T18:00"),
+            ],
+        )
+        resp = self.client.get("/api/agendamentos/disponibilidade/?inicio=2030-01-07&fim=2030-01-07&duracao=180")
+        self.assertEqual(len(resp.data["results"]), 2)
+        self.assertEqual(self.client.get("/api/agendamentos/disponibilidade/?duracao=0").status_code, 400)
+
+    def test_custo_nao_depende_do_historico(self):
+        dia = [0]
+
+        def add_rows(n):
+            for _ in range(n):
+                dia[0] += 1
+                Agendamento.objects.create(
+                    usuario=self.user, cliente=self.cliente, data_hora=timezone.now() - timedelta(days=dia[0])
+                )
+
+        self.assertConstantQueries(
+            lambda: self.client.get("/api/agendamentos/disponibilidade/?inicio=2030-01-01&fim=2030-01-31"), add_rows
+        )
+        horarios = iter(range(1, 30))
+        self.assertConstantQueries(lambda: self.criar(f"2030-02-{next(horarios):02d}T10:00:00Z"), add_rows)
+
+
+class CalendarioFeedTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="ical@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Piscina; Clube, Azul")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = self.client.get("/api/agendamentos/calendario/").data["url"]
+        self.anonimo = APIClient()
+
+    def test_feed_com_agendamentos_e_series(self):
+        amanha = timezone.now() + timedelta(days=1)
+        Agendamento.objects.create(usuario=self.user, cliente=self.cliente, data_hora=amanha, duracao_minutos=45)
+        serie = Recorrencia.objects.create(
+            usuario=self.user, cliente=self.cliente, data_inicio=timezone.localdate(), hora=time(9), intervalo_semanas=2
+        )
+        materializar(serie, timezone.localdate() + timedelta(weeks=2), status="cancelado")
+
+        resp = self.anonimo.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp["Content-Type"].startswith("text/calendar"))
+        corpo = resp.content.decode()
+        self.assertEqual(corpo.count("BEGIN:VEVENT"), 2)
+        self.assertIn("DURATION:PT45M", corpo)
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=2", corpo)
+        self.assertIn("EXDATE;", corpo)
+        self.assertIn("SUMMARY:Visita: Piscina\; Clube\\, Azul", corpo)
+        self.assertTrue(all(len(linha.encode()) <= 75 for linha in corpo.split("\r\n")))
+
+    def test_poll_sem_mudancas_e_304_sem_banco(self):
+        resp = self.anonimo.get(self.url)
+        etag = resp["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.anonimo.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Agendamento.objects.create(usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timedelta(hours=2))
+        resp = self.anonimo.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertIn("BEGIN:VEVENT", resp.content.decode())
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_series_em_hora_local_com_vtimezone(self):
+        Recorrencia.objects.create(
+            usuario=self.user, cliente=self.cliente, data_inicio=timezone.localdate(), hora=time(9), intervalo_semanas=1
+        )
+        corpo = self.anonimo.get(self.url).content.decode()
+        self.assertIn("DTSTART;TZID=America/New_York:", corpo)
+        self.assertLess(corpo.index("BEGIN:VTIMEZONE"), corpo.index("BEGIN:VEVENT"))
+        self.assertIn("TZID:America/New_York", corpo)
+        # A janela de 210 dias sempre cruza uma mudança de horário de verão
+        self.assertIn("BEGIN:DAYLIGHT", corpo)
+        self.assertIn("BEGIN:STANDARD", corpo)
+        self.assertIn("TZOFFSETTO:-0400", corpo)
+        self.assertIn("TZOFFSETTO:-0500", corpo)
+
+    def test_last_modified_acompanha_a_virada_do_dia(self):
+        cache.clear()
+        ontem = timezone.now() - timedelta(days=1)
+        with mock.patch("config.conditional.time.time", return_value=ontem.timestamp()):
+            self.anonimo.get(self.url)
+        resp = self.anonimo.get(self.url)
+        meia_noite = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        self.assertGreaterEqual(parse_http_date(resp["Last-Modified"]), int(meia_noite.timestamp()))
+
+    def test_token_invalido_ou_trocado(self):
+        self.assertEqual(self.anonimo.get(self.url).status_code, status.HTTP_200_OK)
+        novo = self.client.post("/api/agendamentos/calendario/").data["url"]
+        self.assertNotEqual(novo, self.url)
+        self.assertEqual(self.anonimo.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.anonimo.get(novo).status_code, status.HTTP_200_OK)
@@ -1,13 +1,33 @@
 from django.urls import path
 
+from config.async_views import async_list, read_route
+
 from .views import (
+    AgendamentoBulkView,
     AgendamentoDetailView,
     AgendamentoListCreateView,
+    RecorrenciaDetailView,
+    RecorrenciaListCreateView,
+    agenda_view,
+    calendario_feed,
+    calendario_view,
+    disponibilidade_view,
     agendamento_hard_delete,
+    rota_view,
+    recorrencia_ocorrencia,
 )
 
 urlpatterns = [
-    path("", AgendamentoListCreateView.as_view(), name="agendamento-list-create"),
+    path("", read_route(AgendamentoListCreateView.as_view(), async_list(AgendamentoListCreateView)), name="agendamento-list-create"),
+    path("bulk/", AgendamentoBulkView.as_view(), name="agendamento-bulk"),
+    path("agenda/", agenda_view, name="agenda"),
+    path("rota/", rota_view, name="rota"),
+    path("disponibilidade/", disponibilidade_view, name="disponibilidade"),
+    path("calendario/", calendario_view, name="calendario"),
+    path("calendario/<str:token>.ics", calendario_feed, name="calendario-feed"),
+    path("recorrencias/", RecorrenciaListCreateView.as_view(), name="recorrencia-list-create"),
+    path("recorrencias/<uuid:pk>/", RecorrenciaDetailView.as_view(), name="recorrencia-detail"),
+    path("recorrencias/<uuid:pk>/ocorrencias/", recorrencia_ocorrencia, name="recorrencia-ocorrencia"),
     path("<uuid:pk>/", AgendamentoDetailView.as_view(), name="agendamento-detail"),
     path("<uuid:pk>/hard-delete/", agendamento_hard_delete, name="agendamento-hard-delete"),
 ]
@@ -1,35 +1,75 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.response import Response
 
-from .models import Agendamento
-from .serializers import AgendamentoCreateUpdateSerializer, AgendamentoSerializer
-from notificacoes.tasks import criar_notificacao_agendamento
+from accounts.authentication import ReadJWTAuthentication
+from clientes.geocoding import precisa_geocodificar
+from clientes.models import Cliente
+from clientes.tasks import geocodificar_lista
+from config.bulk import BulkWriteView
+from config.conditional import ConditionalGetMixin, conditional_get, not_modified_response, set_validators
+from notificacoes.outbox import registrar_agendamento_criado, registrar_agendamentos_criados
+
+from .calendario import corpo_cacheado, obter_feed, trocar_token, usuario_do_token
+from .calendario import versao as versao_calendario
+from .disponibilidade import conflitos, horarios_livres, travar_agenda
+from .models import DURACAO_PADRAO_MINUTOS, Agendamento, Recorrencia
+from .recorrencia import agenda, materializar
+from .rotas import comprimento, matriz_distancias, otimizar
+from .serializers import (
+    AgendamentoBulkSerializer,
+    AgendamentoCreateUpdateSerializer,
+    AgendamentoSerializer,
+    AgendaSerializer,
+    OcorrenciaSerializer,
+    RecorrenciaSerializer,
+)
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.usuario == request.user
+        return obj.usuario_id == request.user.pk
 
 
-class AgendamentoListCreateView(generics.ListCreateAPIView):
+class AgendamentoListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = AgendamentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("agendamentos", "clientes")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["status", "cliente"]
+    ordering = ("data_hora", "id")
 
     def get_queryset(self):
-        return Agendamento.objects.filter(usuario=self.request.user, ativo=True).order_by("data_hora")
+        return (
+            Agendamento.objects.filter(usuario=self.request.user, ativo=True)
+            .select_related("cliente")
+            .order_by(*self.ordering)
+        )
+
+    def create(self, request, *args, **kwargs):
+        # Checagem de conflito e gravação sob o mesmo lock da agenda do usuário
+        with transaction.atomic():
+            travar_agenda(request.user.pk)
+            return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        instance = serializer.save(usuario=self.request.user)
-        criar_notificacao_agendamento.delay(
-            str(self.request.user.id),
-            str(instance.id),
-            instance.cliente.nome,
-            instance.data_hora,
-        )
+        # A notificação sai pela outbox: nada de broker no caminho da requisição
+        with transaction.atomic():
+            instance = serializer.save(usuario=self.request.user)
+            registrar_agendamento_criado(instance)
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -37,13 +77,20 @@ class AgendamentoListCreateView(generics.ListCreateAPIView):
         return super().get_serializer_class()
 
 
-class AgendamentoDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AgendamentoDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = AgendamentoSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("agendamentos", "clientes")
     queryset = Agendamento.objects.all()
 
     def get_queryset(self):
-        return Agendamento.objects.filter(usuario=self.request.user)
+        return Agendamento.objects.filter(usuario=self.request.user).select_related("cliente")
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            travar_agenda(request.user.pk)
+            return super().update(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.request.method in ["PUT", "PATCH"]:
@@ -55,6 +102,278 @@ class AgendamentoDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.save()
 
 
+class AgendamentoBulkView(BulkWriteView):
+    model = Agendamento
+    item_serializer_class = AgendamentoBulkSerializer
+    serializer_class = AgendamentoSerializer
+    related = {"cliente": Cliente}
+    select_related = ("cliente",)
+    version_resources = ("agendamentos",)
+
+    def after_write(self, pares, created):
+        if created:
+            registrar_agendamentos_criados([obj for _, obj in pares])
+
+    def validar_lote(self, itens):
+        travar_agenda(self.request.user.pk)
+        # Estado final de cada item; cancelados e alterações que não mexem no horário não conflitam
+        checar = []
+        for posicao, (obj, data) in enumerate(itens):
+            final = {
+                campo: data.get(campo, getattr(obj, campo, None)) for campo in ("data_hora", "duracao_minutos", "status")
+            }
+            if final["status"] == Agendamento.Status.CANCELADO:
+                continue
+            if obj is not None and all(final[campo] == getattr(obj, campo) for campo in final):
+                continue
+            checar.append((posicao, (final["data_hora"], final["duracao_minutos"] or DURACAO_PADRAO_MINUTOS, obj.pk if obj else None)))
+        if not checar:
+            return {}
+        encontrados = conflitos(self.request.user.pk, [item for _, item in checar])
+        return {checar[i][0]: {"data_hora": [mensagem]} for i, mensagem in encontrados.items()}
+
+
+class RecorrenciaListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    serializer_class = RecorrenciaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("agendamentos", "clientes")
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["cliente"]
+    ordering = ("data_inicio", "id")
+
+    def get_queryset(self):
+        return (
+            Recorrencia.objects.filter(usuario=self.request.user, ativo=True)
+            .select_related("cliente")
+            .order_by(*self.ordering)
+        )
+
+    def create(self, request, *args, **kwargs):
+        # Checagem de conflito das ocorrências e gravação sob o lock da agenda do usuário
+        with transaction.atomic():
+            travar_agenda(request.user.pk)
+            return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
+
+
+class RecorrenciaDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = RecorrenciaSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("agendamentos", "clientes")
+
+    def get_queryset(self):
+        return Recorrencia.objects.filter(usuario=self.request.user, ativo=True).select_related("cliente")
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            travar_agenda(request.user.pk)
+            return super().update(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        # Ocorrências que já viraram agendamentos continuam valendo
+        instance.ativo = False
+        instance.save()
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def recorrencia_ocorrencia(request, pk):
+    """Dá linha própria a uma ocorrência da série para remarcá-la, concluí-la ou cancelá-la."""
+    recorrencia = get_object_or_404(
+        Recorrencia.objects.select_related("cliente"), id=pk, usuario=request.user, ativo=True
+    )
+    serializer = OcorrenciaSerializer(data=request.data, context={"request": request, "recorrencia": recorrencia})
+    try:
+        with transaction.atomic():
+            travar_agenda(request.user.pk)
+            serializer.is_valid(raise_exception=True)
+            campos = dict(serializer.validated_data)
+            agendamento = materializar(recorrencia, campos.pop("ocorrencia"), **campos)
+    except IntegrityError:
+        # Outra requisição registrou a mesma ocorrência entre a validação e o insert
+        return Response({"ocorrencia": ["Esta ocorrência já foi registrada."]}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(AgendamentoSerializer(agendamento).data, status=status.HTTP_201_CREATED)
+
+
+def _periodo(inicio, fim):
+    """Datas locais (inclusive) -> ``(datetime inicial, datetime final)``."""
+    return (
+        timezone.make_aware(datetime.combine(inicio, time.min)),
+        timezone.make_aware(datetime.combine(fim, time.max)),
+    )
+
+
+def _data_param(params, nome, padrao):
+    if not params.get(nome):
+        return padrao
+    try:
+        valor = parse_date(params[nome])
+    except ValueError:
+        valor = None
+    if valor is None:
+        raise DRFValidationError({nome: "Data inválida (use AAAA-MM-DD)."})
+    return valor
+
+
+def _janela(params):
+    """``inicio``/``fim`` (datas, inclusive; padrão: os próximos 7 dias), limitados a AGENDA_MAX_DIAS."""
+    inicio = _data_param(params, "inicio", timezone.localdate())
+    fim = _data_param(params, "fim", inicio + timedelta(days=6))
+    if fim < inicio or (fim - inicio).days >= settings.AGENDA_MAX_DIAS:
+        raise DRFValidationError({"detail": f"Período inválido; máximo de {settings.AGENDA_MAX_DIAS} dias."})
+    return inicio, fim
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+@conditional_get("agendamentos", "clientes")
+def agenda_view(request):
+    """Agendamentos gravados e ocorrências das séries no período, sem paginação."""
+    itens = agenda(request.user.pk, *_periodo(*_janela(request.query_params)))
+    return Response({"results": AgendaSerializer(itens, many=True).data})
+
+
+def _hora_param(params, nome, padrao):
+    valor = params.get(nome, padrao)
+    try:
+        return time.fromisoformat(valor)
+    except ValueError:
+        raise DRFValidationError({nome: "Hora inválida (use HH:MM)."})
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def disponibilidade_view(request):
+    """
+    Horários livres de pelo menos ``duracao`` minutos no período, dentro do
+    expediente (``expediente_inicio``/``expediente_fim``, padrão do settings).
+    Considera agendamentos gravados e ocorrências das séries; horários passados
+    não entram.
+    """
+    params = request.query_params
+    inicio, fim = _janela(params)
+    try:
+        duracao = int(params.get("duracao", DURACAO_PADRAO_MINUTOS))
+    except ValueError:
+        duracao = 0
+    if not 1 <= duracao <= settings.AGENDAMENTO_DURACAO_MAXIMA:
+        raise DRFValidationError({"duracao": f"Informe de 1 a {settings.AGENDAMENTO_DURACAO_MAXIMA} minutos."})
+    expediente = (
+        _hora_param(params, "expediente_inicio", settings.AGENDA_EXPEDIENTE_INICIO),
+        _hora_param(params, "expediente_fim", settings.AGENDA_EXPEDIENTE_FIM),
+    )
+    if expediente[0] >= expediente[1]:
+        raise DRFValidationError({"expediente_fim": "Deve ser posterior ao início do expediente."})
+
+    livres = horarios_livres(request.user.pk, inicio, fim, duracao, expediente)
+    return Response(
+        {
+            "duracao_minutos": duracao,
+            "results": [{"inicio": a.isoformat(), "fim": b.isoformat()} for a, b in livres],
+        }
+    )
+
+
+def _origem(params):
+    lat, lng = params.get("origem_lat"), params.get("origem_lng")
+    if lat is None and lng is None:
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        lat = lng = None
+    if lat is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise DRFValidationError({"origem": "Informe origem_lat e origem_lng válidos."})
+    return (lat, lng)
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def rota_view(request):
+    """
+    Visitas do dia (``data``, padrão hoje) na ordem que minimiza o deslocamento,
+    partindo de ``origem_lat``/``origem_lng`` quando informados. Visitas de
+    clientes sem coordenadas vêm à parte, em ``sem_localizacao``; endereços ainda
+    não geocodificados são enfileirados e entram na rota numa próxima consulta.
+    """
+    dia = _data_param(request.query_params, "data", timezone.localdate())
+    origem = _origem(request.query_params)
+    visitas = [a for a in agenda(request.user.pk, *_periodo(dia, dia)) if a.status != Agendamento.Status.CANCELADO]
+    clientes = {a.cliente_id: a.cliente for a in visitas}
+    # Endereços novos ou alterados que a tarefa ainda não processou vão para a fila, fora do GET
+    pendentes = [str(c.pk) for c in clientes.values() if precisa_geocodificar(c)]
+    if pendentes:
+        transaction.on_commit(lambda: geocodificar_lista.delay(pendentes))
+
+    localizadas, sem_localizacao = [], []
+    for visita in visitas:
+        cliente = clientes[visita.cliente_id]
+        alvo = localizadas if cliente.latitude is not None else sem_localizacao
+        alvo.append((visita, cliente))
+
+    pontos = ([origem] if origem else []) + [(c.latitude, c.longitude) for _, c in localizadas]
+    d = matriz_distancias(pontos)
+    rota = otimizar(d, 0 if origem else None)
+    horario = list(range(len(pontos)))
+    if origem:
+        rota = rota[1:]
+
+    paradas = []
+    anterior = 0 if origem else None
+    for ordem, indice in enumerate(rota, start=1):
+        visita, cliente = localizadas[indice - 1 if origem else indice]
+        item = AgendaSerializer(visita).data
+        item.update(
+            ordem=ordem,
+            latitude=cliente.latitude,
+            longitude=cliente.longitude,
+            distancia_km=round(d[anterior][indice], 2) if anterior is not None else 0,
+        )
+        paradas.append(item)
+        anterior = indice
+
+    return Response(
+        {
+            "data": dia.isoformat(),
+            "distancia_km": round(comprimento(([0] if origem else []) + rota, d), 2),
+            # Mesmo percurso na ordem dos horários, para comparação
+            "distancia_por_horario_km": round(comprimento(horario, d), 2),
+            "paradas": paradas,
+            "sem_localizacao": AgendaSerializer([v for v, _ in sem_localizacao], many=True).data,
+        }
+    )
+
+
+@api_view(["GET", "POST"])
+@permission_classes([permissions.IsAuthenticated])
+def calendario_view(request):
+    """URL de assinatura do feed ``.ics``; ``POST`` troca o token, invalidando a URL anterior."""
+    feed = trocar_token(request.user) if request.method == "POST" else obter_feed(request.user)
+    url = request.build_absolute_uri(reverse("calendario-feed", args=[feed.token]))
+    return Response({"url": url})
+
+
+@require_safe
+def calendario_feed(request, token):
+    """Feed público (autenticado pelo token da URL); polls sem mudanças recebem 304 sem tocar o banco."""
+    usuario_id = usuario_do_token(token)
+    if usuario_id is None:
+        raise Http404
+    etag, last_modified = versao_calendario(usuario_id)
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        response = HttpResponse(corpo_cacheado(usuario_id, etag), content_type="text/calendar; charset=utf-8")
+        set_validators(response, etag, last_modified)
+    return response
+
+
 @api_view(["DELETE"])
 @permission_classes([permissions.IsAuthenticated])
 def agendamento_hard_delete(request, pk):
@@ -7,11 +7,13 @@ from .models import Cliente
 class ClienteAdmin(admin.ModelAdmin):
     list_display = ("nome", "email", "telefone", "tipo_piscina", "ativo", "usuario")
     list_filter = ("ativo", "tipo_piscina", "usuario")
+    list_select_related = ("usuario",)
     search_fields = ("nome", "email", "telefone")
     autocomplete_fields = ("usuario",)
-    readonly_fields = ("id", "criado_em", "atualizado_em")
+    readonly_fields = ("id", "endereco_geocodificado", "criado_em", "atualizado_em")
     fieldsets = (
         (None, {"fields": ("id", "usuario", "nome", "email", "telefone", "endereco", "tipo_piscina")}),
+        ("Localização", {"fields": ("latitude", "longitude", "endereco_geocodificado")}),
         ("Status", {"fields": ("ativo",)}),
         ("Datas", {"fields": ("criado_em", "atualizado_em")}),
     )
@@ -0,0 +1,78 @@
+"""
+Geocodificação dos endereços dos clientes.
+
+O backend é configurável em ``GEOCODER_BACKEND`` (caminho de uma classe com
+``geocodificar(endereco) -> (latitude, longitude) | None``). O padrão,
+``GeocodificadorLocal``, não acessa a rede: gera coordenadas estáveis a partir
+do endereço, dentro de ``GEOCODER_LOCAL_BBOX``, para desenvolvimento e testes.
+
+``Cliente.endereco_geocodificado`` guarda o endereço que gerou as coordenadas;
+quando ele difere de ``endereco`` o cliente está pendente. Endereços sem
+resultado ficam sem coordenadas, mas não pendentes: só são consultados de novo
+se o endereço mudar.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from config.conditional import touch_users
+
+from .models import Cliente
+
+
+class GeocodificadorLocal:
+    """Coordenadas determinísticas derivadas do hash do endereço normalizado."""
+
+    def __init__(self, bbox=None):
+        self.sul, self.oeste, self.norte, self.leste = bbox or settings.GEOCODER_LOCAL_BBOX
+
+    def geocodificar(self, endereco):
+        endereco = " ".join(endereco.casefold().split())
+        if not endereco:
+            return None
+        digest = hashlib.sha256(endereco.encode("utf-8")).digest()
+        fracao_lat = int.from_bytes(digest[:8], "big") / 2**64
+        fracao_lng = int.from_bytes(digest[8:16], "big") / 2**64
+        return (
+            round(self.sul + (self.norte - self.sul) * fracao_lat, 6),
+            round(self.oeste + (self.leste - self.oeste) * fracao_lng, 6),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_geocodificador():
+    return import_string(settings.GEOCODER_BACKEND)()
+
+
+def pendentes():
+    """Clientes ativos com endereço ainda não geocodificado (ou alterado desde então)."""
+    return Cliente.objects.filter(ativo=True).exclude(endereco="").exclude(endereco=F("endereco_geocodificado"))
+
+
+def precisa_geocodificar(cliente):
+    return bool(cliente.endereco.strip()) and cliente.endereco != cliente.endereco_geocodificado
+
+
+def geocodificar_clientes(clientes):
+    """Geocodifica os clientes pendentes da lista e grava as coordenadas num ``bulk_update``."""
+    geocodificador = get_geocodificador()
+    agora = timezone.now()
+    alterados = []
+    for cliente in clientes:
+        if not precisa_geocodificar(cliente):
+            continue
+        coordenadas = geocodificador.geocodificar(cliente.endereco)
+        cliente.latitude, cliente.longitude = coordenadas or (None, None)
+        # Endereço sem resultado também é marcado, para não ser consultado de novo
+        cliente.endereco_geocodificado = cliente.endereco
+        # atualizado_em avança para o sync delta entregar as coordenadas
+        cliente.atualizado_em = agora
+        alterados.append(cliente)
+    if alterados:
+        Cliente.objects.bulk_update(alterados, ["latitude", "longitude", "endereco_geocodificado", "atualizado_em"])
+        touch_users((c.usuario_id for c in alterados), "clientes")
+    return alterados
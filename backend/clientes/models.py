@@ -22,6 +22,10 @@ class Cliente(models.Model):
         choices=TipoPiscina.choices,
         default=TipoPiscina.RESIDENCIAL,
     )
+    # Preenchidas por clientes.geocoding a partir do endereço
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    endereco_geocodificado = models.TextField(blank=True, editable=False)
     ativo = models.BooleanField(default=True)
     criado_em = models.DateTimeField(default=timezone.now)
     atualizado_em = models.DateTimeField(auto_now=True)
@@ -30,6 +34,8 @@ class Cliente(models.Model):
         indexes = [
             models.Index(fields=["usuario", "ativo"]),
             models.Index(fields=["nome"]),
+            models.Index(fields=["usuario", "ativo", "-criado_em", "-id"]),
+            models.Index(fields=["usuario", "atualizado_em", "id"]),
         ]
 
     def __str__(self):
@@ -13,11 +13,13 @@ class ClienteSerializer(serializers.ModelSerializer):
             "telefone",
             "endereco",
             "tipo_piscina",
+            "latitude",
+            "longitude",
             "ativo",
             "criado_em",
             "atualizado_em",
         ]
-        read_only_fields = ["id", "criado_em", "atualizado_em"]
+        read_only_fields = ["id", "latitude", "longitude", "criado_em", "atualizado_em"]
 
 
 class ClienteCreateUpdateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .geocoding import precisa_geocodificar
+from .models import Cliente
+
+
+@receiver(post_save, sender=Cliente)
+def agendar_geocodificacao(sender, instance, **kwargs):
+    if instance.ativo and precisa_geocodificar(instance):
+        from .tasks import geocodificar_cliente
+
+        cliente_id = instance.pk
+        transaction.on_commit(lambda: geocodificar_cliente.delay(cliente_id))
@@ -0,0 +1,33 @@
+import logging
+from itertools import islice
+
+from celery import shared_task
+
+from .geocoding import geocodificar_clientes, pendentes
+from .models import Cliente
+
+logger = logging.getLogger("clientes")
+
+GEOCODIFICACAO_BATCH_SIZE = 100
+
+
+@shared_task
+def geocodificar_cliente(cliente_id):
+    geocodificar_clientes(Cliente.objects.filter(id=cliente_id))
+
+
+@shared_task
+def geocodificar_lista(cliente_ids):
+    """Lote de clientes conhecidos, p.ex. as paradas pendentes da rota do dia."""
+    geocodificar_clientes(Cliente.objects.filter(id__in=cliente_ids))
+
+
+@shared_task
+def geocodificar_pendentes():
+    """Varredura periódica: cobre clientes criados em lote ou importados, que não passam pelo signal."""
+    total = 0
+    clientes = pendentes().order_by().iterator(chunk_size=GEOCODIFICACAO_BATCH_SIZE)
+    while lote := list(islice(clientes, GEOCODIFICACAO_BATCH_SIZE)):
+        total += len(geocodificar_clientes(lote))
+    logger.info("clientes_geocodificados", extra={"total": total})
+    return total
@@ -1,8 +1,12 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
+from .geocoding import GeocodificadorLocal, pendentes
 from .models import Cliente
+from .tasks import geocodificar_cliente, geocodificar_pendentes
 
 User = get_user_model()
 
@@ -31,13 +35,13 @@ class ClientesCrudTests(APITestCase):
         # List only returns user's
         resp2 = c.get(self.list_url)
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp2.data), 1)
+        self.assertEqual(len(resp2.data["results"]), 1)
 
         # Other user can't see
         c2 = self.auth(self.other)
         resp3 = c2.get(self.list_url)
         self.assertEqual(resp3.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp3.data), 0)
+        self.assertEqual(len(resp3.data["results"]), 0)
 
         # Retrieve/Update/Delete restricted
         detail_url = f"{self.list_url}{cid}/"
@@ -49,4 +53,53 @@ class ClientesCrudTests(APITestCase):
         self.assertIn(del_resp.status_code, (status.HTTP_204_NO_CONTENT, status.HTTP_200_OK))
         # After delete, should not appear
         resp5 = self.auth(self.user).get(self.list_url)
-        self.assertEqual(len(resp5.data), 0)
+        self.assertEqual(len(resp5.data["results"]), 0)
+
+
+class GeocodificacaoTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="geo@example.com", password="strongpass123")
+
+    def test_endereco_novo_ou_alterado_e_geocodificado(self):
+        # Roda a task no próprio processo, sem depender de broker
+        delay = mock.patch.object(geocodificar_cliente, "delay", side_effect=geocodificar_cliente)
+        delay_mock = delay.start()
+        self.addCleanup(delay.stop)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente = Cliente.objects.create(usuario=self.user, nome="A", endereco="Rua das Flores, 10")
+        cliente.refresh_from_db()
+        self.assertIsNotNone(cliente.latitude)
+        self.assertEqual(cliente.endereco_geocodificado, cliente.endereco)
+        # O geocodificador local é determinístico e ignora caixa/espaços
+        self.assertEqual(
+            GeocodificadorLocal().geocodificar("rua das  FLORES, 10"), (cliente.latitude, cliente.longitude)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente.endereco = "Av. Paulista, 1000"
+            cliente.save()
+        anterior = (cliente.latitude, cliente.longitude)
+        cliente.refresh_from_db()
+        self.assertNotEqual((cliente.latitude, cliente.longitude), anterior)
+        self.assertEqual(delay_mock.call_args_list, [mock.call(cliente.pk)] * 2)
+
+    def test_varredura_cobre_clientes_criados_em_lote(self):
+        Cliente.objects.bulk_create(
+            [Cliente(usuario=self.user, nome=f"C{i}", endereco=f"Rua {i}") for i in range(3)]
+            + [Cliente(usuario=self.user, nome="Sem endereço")]
+        )
+        self.assertEqual(pendentes().count(), 3)
+        self.assertEqual(geocodificar_pendentes(), 3)
+        self.assertEqual(pendentes().count(), 0)
+        self.assertEqual(Cliente.objects.filter(latitude__isnull=False).count(), 3)
+
+    def test_endereco_sem_resultado_nao_volta_a_ser_consultado(self):
+        geocodificador = mock.Mock()
+        geocodificador.geocodificar.return_value = None
+        with mock.patch("clientes.geocoding.get_geocodificador", return_value=geocodificador):
+            Cliente.objects.create(usuario=self.user, nome="A", endereco="Endereço desconhecido")
+            self.assertEqual(geocodificar_pendentes(), 1)
+            self.assertEqual(pendentes().count(), 0)
+            self.assertEqual(geocodificar_pendentes(), 0)
+        self.assertEqual(geocodificador.geocodificar.call_count, 1)
@@ -1,13 +1,17 @@
 from django.urls import path
 
+from config.async_views import async_list, read_route
+
 from .views import (
+    ClienteBulkView,
     ClienteDetailView,
     ClienteListCreateView,
     cliente_hard_delete,
 )
 
 urlpatterns = [
-    path("", ClienteListCreateView.as_view(), name="cliente-list-create"),
+    path("", read_route(ClienteListCreateView.as_view(), async_list(ClienteListCreateView)), name="cliente-list-create"),
+    path("bulk/", ClienteBulkView.as_view(), name="cliente-bulk"),
     path("<uuid:pk>/", ClienteDetailView.as_view(), name="cliente-detail"),
     path("<uuid:pk>/hard-delete/", cliente_hard_delete, name="cliente-hard-delete"),
 ]
@@ -3,23 +3,30 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from accounts.authentication import ReadJWTAuthentication
+from config.bulk import BulkWriteView
+from config.conditional import ConditionalGetMixin
+
 from .models import Cliente
 from .serializers import ClienteCreateUpdateSerializer, ClienteSerializer
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.usuario == request.user
+        return obj.usuario_id == request.user.pk
 
 
-class ClienteListCreateView(generics.ListCreateAPIView):
+class ClienteListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = ClienteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("clientes",)
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["ativo", "tipo_piscina"]
+    ordering = ("-criado_em", "-id")
 
     def get_queryset(self):
-        return Cliente.objects.filter(usuario=self.request.user, ativo=True).order_by("-criado_em")
+        return Cliente.objects.filter(usuario=self.request.user, ativo=True).order_by(*self.ordering)
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
@@ -30,9 +37,11 @@ class ClienteListCreateView(generics.ListCreateAPIView):
         return super().get_serializer_class()
 
 
-class ClienteDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ClienteDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ClienteSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("clientes",)
     queryset = Cliente.objects.all()
 
     def get_queryset(self):
@@ -48,6 +57,13 @@ class ClienteDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.save()
 
 
+class ClienteBulkView(BulkWriteView):
+    model = Cliente
+    item_serializer_class = ClienteCreateUpdateSerializer
+    serializer_class = ClienteSerializer
+    version_resources = ("clientes",)
+
+
 @api_view(["DELETE"])
 @permission_classes([permissions.IsAuthenticated])
 def cliente_hard_delete(request, pk):
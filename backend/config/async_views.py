@@ -0,0 +1,130 @@
+"""
+Caminho assíncrono (ASGI) para os GETs mais acessados.
+
+Com ``SERVER_MODE=asgi`` as rotas de leitura usam ``read_route``: o GET roda
+numa view ``async`` (autenticação, cache e ORM assíncronos), enquanto os demais
+métodos seguem para a view DRF síncrona de sempre. No modo WSGI as rotas ficam
+exatamente como antes.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from accounts.authentication import aauthenticate
+
+from .conditional import anot_modified, set_validators
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    # Mesmo renderer das views DRF, para o corpo sair idêntico nos dois modos
+    response = HttpResponse(JSONRenderer().render(data), status=status_code, content_type="application/json")
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def _error_response(exc):
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers["WWW-Authenticate"] = 'Bearer realm="api"'
+        status_code = status.HTTP_401_UNAUTHORIZED
+    else:
+        status_code = exc.status_code
+    if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        headers["Retry-After"] = str(int(exc.wait))
+    data = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return json_response(data, status_code, headers)
+
+
+def _check_throttles(request, view):
+    waits = [t.wait() for t in view.get_throttles() if not t.allow_request(request, view)]
+    if waits:
+        raise exceptions.Throttled(max((w for w in waits if w is not None), default=None))
+
+
+async def prepare_request(django_request, view, stateless=True):
+    """
+    Autentica e aplica os throttles da view; devolve o ``Request`` do DRF
+    (usado só para ``query_params``/URLs, sem autenticadores próprios).
+    """
+    request = Request(django_request, authenticators=())
+    auth = await aauthenticate(django_request, stateless=stateless)
+    if auth is None:
+        raise exceptions.NotAuthenticated()
+    request.user, request.auth = auth
+    view.request = request
+    await sync_to_async(_check_throttles)(request, view)
+    return request
+
+
+def read_route(sync_view, async_get):
+    """Rota com GET assíncrono no modo ASGI; no modo WSGI devolve ``sync_view``."""
+    if settings.SERVER_MODE != "asgi":
+        return sync_view
+
+    sync_dispatch = sync_to_async(sync_view)
+
+    @csrf_exempt
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return await sync_dispatch(request, *args, **kwargs)
+        try:
+            return await async_get(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+    return view
+
+
+def async_get_view(async_get):
+    """View só do modo ASGI, sem equivalente síncrono: GET assíncrono com os erros do DRF em JSON."""
+
+    @csrf_exempt
+    @wraps(async_get)
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return _error_response(exceptions.MethodNotAllowed(request.method))
+        try:
+            return await async_get(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+    return view
+
+
+def async_list(view_class):
+    """
+    GET assíncrono de uma ``ListAPIView``: reaproveita ``get_queryset``, filtros,
+    paginação por keyset, serializer e ``version_resources`` da própria view.
+    """
+
+    async def get(django_request, *args, **kwargs):
+        view = view_class(args=args, kwargs=kwargs, format_kwarg=None)
+        request = await prepare_request(django_request, view)
+        etag, last_modified, not_modified = await anot_modified(request, view.version_resources)
+        if not_modified is not None:
+            return not_modified
+        queryset = view.get_queryset()
+        # django-filter valida escolhas (ex.: cliente) consultando o banco
+        queryset = await sync_to_async(view.filter_queryset)(queryset)
+        paginator = view.paginator
+        page = await paginator.apaginate_queryset(queryset, request, view=view)
+        data = view.get_serializer(page, many=True).data
+        return set_validators(json_response(paginator.get_paginated_data(data)), etag, last_modified)
+
+    return get
+
+
+class AsyncReadView(APIView):
+    """Base para views async avulsas: só os throttles padrão do DRF."""
+
+    authentication_classes = []
+    permission_classes = []
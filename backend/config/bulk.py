@@ -0,0 +1,202 @@
+"""
+Escrita em lote (criação, alteração e exclusão lógica) dos modelos do usuário.
+
+``POST`` recebe uma lista de itens, ``PATCH`` uma lista de itens com ``id`` e
+``DELETE`` um objeto ``{"ids": [...]}``. O lote inteiro é validado antes de
+qualquer escrita; se algum item falhar a resposta é 400 com ``errors``
+alinhado à entrada (``{}`` para os itens válidos) e nada é gravado.
+
+As FKs referenciadas (cliente, agendamento) são carregadas numa consulta por
+campo, já restritas ao usuário, e os itens são gravados com ``bulk_create`` /
+``bulk_update`` numa transação. Como essas operações não passam por ``save()``
+nem pelos signals, a view cuida do que eles fariam: ``atualizado_em``, cache do
+dashboard e versões do GET condicional; o restante (resumo financeiro, outbox)
+fica no hook ``after_write`` de cada modelo.
+"""
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from dashboard.cache import invalidate_dashboard
+
+from .conditional import touch
+
+
+class PrefetchedRelatedField(serializers.UUIDField):
+    """FK resolvida no dicionário pré-carregado pela view, sem uma consulta por item."""
+
+    default_error_messages = {"does_not_exist": "Objeto não encontrado."}
+
+    def to_internal_value(self, data):
+        pk = super().to_internal_value(data)
+        obj = self.context["related"][self.field_name].get(pk)
+        if obj is None:
+            self.fail("does_not_exist")
+        return obj
+
+    def to_representation(self, value):
+        return str(value.pk)
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class BulkWriteView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    # Valida cada item (criação e, com partial=True, alteração)
+    item_serializer_class = None
+    # Representação devolvida, a mesma das views de listagem
+    serializer_class = None
+    # campo do item -> modelo referenciado; só objetos ativos do usuário são aceitos
+    related = {}
+    select_related = ()
+    version_resources = ()
+
+    def get_queryset(self):
+        return self.model.objects.filter(usuario=self.request.user, ativo=True).select_related(*self.select_related)
+
+    def snapshot(self, obj):
+        """Estado anterior repassado a ``after_write`` (ex.: chave do resumo financeiro)."""
+        return None
+
+    def after_write(self, pares, created):
+        """Efeitos colaterais das linhas gravadas; ``pares`` é ``[(snapshot anterior, obj)]``."""
+
+    def validar_lote(self, itens):
+        """
+        Validação que depende do lote inteiro, já dentro da transação.
+        ``itens`` é ``[(instância ou None, validated_data)]``; devolve ``{posição: erros}``.
+        """
+        return {}
+
+    # Entrada
+
+    def _lista(self, data):
+        if not isinstance(data, list) or not data:
+            return None, Response({"detail": "Envie uma lista não vazia de itens."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(data) > settings.BULK_MAX_ITEMS:
+            return None, Response(
+                {"detail": f"No máximo {settings.BULK_MAX_ITEMS} itens por requisição."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return data, None
+
+    def _context(self, items):
+        related = {}
+        for field, related_model in self.related.items():
+            ids = {pk for item in items if isinstance(item, dict) and (pk := _as_uuid(item.get(field)))}
+            related[field] = (
+                {obj.pk: obj for obj in related_model.objects.filter(usuario=self.request.user, ativo=True, id__in=ids)}
+                if ids
+                else {}
+            )
+        return {"request": self.request, "related": related}
+
+    def _erros(self, errors):
+        return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _concluir(self, pares, created):
+        self.after_write(pares, created)
+        user_id = self.request.user.pk
+        # Fora de save()/signals: mesmas invalidações que uma escrita individual faria
+        transaction.on_commit(lambda: invalidate_dashboard(user_id))
+        touch(user_id, *self.version_resources)
+
+    def _travar(self, ids):
+        return {obj.pk: obj for obj in self.get_queryset().select_for_update(of=("self",)).filter(id__in=ids)}
+
+    # Métodos
+
+    def post(self, request):
+        items, erro = self._lista(request.data)
+        if erro:
+            return erro
+        serializer = self.item_serializer_class(data=items, many=True, context=self._context(items))
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, dict):
+                # Versões recentes do DRF devolvem só os itens com erro, indexados pela posição
+                errors = [errors.get(i, {}) for i in range(len(items))]
+            return self._erros(errors)
+
+        with transaction.atomic():
+            if erros_lote := self.validar_lote([(None, data) for data in serializer.validated_data]):
+                return self._erros([erros_lote.get(i, {}) for i in range(len(items))])
+            objs = [self.model(usuario=request.user, **data) for data in serializer.validated_data]
+            self.model.objects.bulk_create(objs)
+            self._concluir([(None, obj) for obj in objs], created=True)
+        return Response({"results": self.serializer_class(objs, many=True).data}, status=status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        items, erro = self._lista(request.data)
+        if erro:
+            return erro
+        ids = [_as_uuid(item.get("id")) if isinstance(item, dict) else None for item in items]
+        context = self._context(items)
+
+        with transaction.atomic():
+            instances = self._travar([pk for pk in ids if pk])
+            errors, validos, vistos = [], [], set()
+            for item, pk in zip(items, ids):
+                if pk is None or pk not in instances or pk in vistos:
+                    errors.append({"id": ["Id ausente, repetido ou não encontrado."]})
+                    continue
+                vistos.add(pk)
+                serializer = self.item_serializer_class(instances[pk], data=item, partial=True, context=context)
+                if serializer.is_valid():
+                    errors.append({})
+                    validos.append((instances[pk], serializer.validated_data))
+                else:
+                    errors.append(serializer.errors)
+            if not any(errors):
+                # Sem erros por item, validos está alinhado com items
+                for posicao, erro in self.validar_lote(validos).items():
+                    errors[posicao] = erro
+            if any(errors):
+                return self._erros(errors)
+
+            agora = timezone.now()
+            campos = {"atualizado_em"}
+            pares = []
+            for obj, data in validos:
+                pares.append((self.snapshot(obj), obj))
+                for field, value in data.items():
+                    setattr(obj, field, value)
+                obj.atualizado_em = agora
+                campos.update(data)
+            self.model.objects.bulk_update([obj for _, obj in pares], sorted(campos))
+            self._concluir(pares, created=False)
+        return Response({"results": self.serializer_class([obj for _, obj in pares], many=True).data})
+
+    def delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        items, erro = self._lista(ids)
+        if erro:
+            return erro
+        pks = [_as_uuid(pk) for pk in items]
+
+        with transaction.atomic():
+            instances = self._travar([pk for pk in pks if pk])
+            errors = [{} if pk in instances else {"id": ["Não encontrado."]} for pk in pks]
+            if any(errors):
+                return self._erros(errors)
+
+            agora = timezone.now()
+            pares = []
+            for obj in instances.values():
+                pares.append((self.snapshot(obj), obj))
+                obj.ativo = False
+                obj.atualizado_em = agora
+            self.model.objects.bulk_update([obj for _, obj in pares], ["ativo", "atualizado_em"])
+            self._concluir(pares, created=False)
+        return Response(status=status.HTTP_204_NO_CONTENT)
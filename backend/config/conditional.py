@@ -0,0 +1,194 @@
+"""
+GET condicional (``ETag``/``Last-Modified``) por usuário e recurso.
+
+Cada recurso (``clientes``, ``agendamentos``, ``financeiro``, ``notificacoes``)
+tem, por usuário, uma versão no cache: um token aleatório e o instante da
+última escrita. A versão é trocada depois do commit de qualquer escrita do
+recurso; a leitura só consulta o cache, então um ``If-None-Match`` que ainda
+bate é respondido com 304 antes de montar a queryset ou serializar.
+
+Se a versão sumir do cache (expiração/eviction) uma nova é criada no primeiro
+acesso: o cliente recebe um 200 a mais, nunca um 304 indevido. ``Last-Modified``
+tem resolução de segundos: para que duas escritas no mesmo segundo não gerem o
+mesmo valor, o instante de uma nova versão é sempre maior que o da anterior.
+"""
+import hashlib
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Versões não precisam expirar cedo; o tempo só limita o lixo de usuários inativos
+VERSION_TIMEOUT = 7 * 24 * 3600
+
+
+def version_key(resource, usuario_id):
+    return f"versao:{resource}:{usuario_id}"
+
+
+def _new_version(previous=None):
+    """Token novo; o instante avança ao menos um segundo em relação a ``previous``."""
+    now = int(time.time())
+    if previous is not None:
+        now = max(previous[1] + 1, now)
+    return (uuid.uuid4().hex, now)
+
+
+def _merge(resources, usuario_id, found):
+    missing = {}
+    versions = []
+    for resource in resources:
+        key = version_key(resource, usuario_id)
+        version = found.get(key)
+        if version is None:
+            version = missing[key] = _new_version()
+        versions.append(version)
+    return versions, missing
+
+
+def get_versions(usuario_id, resources):
+    """Versões dos ``resources`` do usuário numa ida ao cache (mais uma se faltar alguma)."""
+    keys = [version_key(r, usuario_id) for r in resources]
+    versions, missing = _merge(resources, usuario_id, cache.get_many(keys))
+    if missing:
+        # add: se outro processo criou a versão no meio tempo, a dele prevalece
+        for key, version in missing.items():
+            cache.add(key, version, VERSION_TIMEOUT)
+        versions, _ = _merge(resources, usuario_id, cache.get_many(keys))
+    return versions
+
+
+async def aget_versions(usuario_id, resources):
+    keys = [version_key(r, usuario_id) for r in resources]
+    versions, missing = _merge(resources, usuario_id, await cache.aget_many(keys))
+    if missing:
+        for key, version in missing.items():
+            await cache.aadd(key, version, VERSION_TIMEOUT)
+        versions, _ = _merge(resources, usuario_id, await cache.aget_many(keys))
+    return versions
+
+
+def touch(usuario_id, *resources):
+    """Troca a versão dos recursos do usuário quando a transação atual fizer commit."""
+    touch_users([usuario_id], *resources)
+
+
+def touch_users(usuario_ids, *resources):
+    """``touch`` de vários usuários num único ``set_many`` (escritas em lote)."""
+    usuario_ids = set(usuario_ids)
+    if not usuario_ids:
+        return
+
+    def bump():
+        keys = [version_key(r, u) for u in usuario_ids for r in resources]
+        current = cache.get_many(keys)
+        cache.set_many({key: _new_version(current.get(key)) for key in keys}, VERSION_TIMEOUT)
+
+    transaction.on_commit(bump)
+
+
+_row_touches = ContextVar("conditional_row_touches", default=True)
+
+
+@contextmanager
+def batch_touches():
+    """
+    Dentro do bloco os signals não trocam versões linha a linha: quem apaga ou
+    grava em lote chama ``touch_users`` uma vez por lote.
+    """
+    token = _row_touches.set(False)
+    try:
+        yield
+    finally:
+        _row_touches.reset(token)
+
+
+def row_touches_enabled():
+    return _row_touches.get()
+
+
+def validators(request, versions, media_type="application/json"):
+    """
+    ``(etag, last_modified)`` de uma resposta. O ETag também varia com a URL
+    completa (filtros, cursor), o usuário e o formato negociado.
+    """
+    raw = "|".join(
+        [request.get_full_path(), str(request.user.pk), media_type or ""]
+        + [token for token, _ in versions]
+    )
+    etag = quote_etag(hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32])
+    return etag, max(ts for _, ts in versions)
+
+
+def not_modified_response(request, etag, last_modified):
+    """Resposta 304 se os validadores da requisição ainda valem, senão ``None``."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # Dado por usuário: o cliente guarda, mas revalida sempre
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+async def anot_modified(request, resources, extra_versions=()):
+    """
+    Para os GETs assíncronos: devolve ``(etag, last_modified, resposta_304_ou_None)``.
+    ``request`` é o ``Request`` já autenticado por ``prepare_request``.
+    """
+    versions = await aget_versions(request.user.pk, resources) + list(extra_versions)
+    etag, last_modified = validators(request, versions)
+    return etag, last_modified, not_modified_response(request, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """
+    Para views genéricas do DRF: ``version_resources`` lista os recursos de que
+    a resposta depende (ex.: agendamentos mostram o nome do cliente).
+    """
+
+    version_resources = ()
+
+    def get(self, request, *args, **kwargs):
+        versions = get_versions(request.user.pk, self.version_resources)
+        etag, last_modified = validators(request, versions, request.accepted_media_type)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().get(request, *args, **kwargs), etag, last_modified)
+
+
+def conditional_get(*resources, extra=None):
+    """
+    Decorator para views-função do DRF (aplicado abaixo de ``@api_view``).
+    ``extra()`` devolve versões que não vêm das escritas, como a janela de
+    tempo do dashboard.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return func(request, *args, **kwargs)
+            versions = get_versions(request.user.pk, resources) + (extra() if extra else [])
+            etag, last_modified = validators(request, versions, request.accepted_media_type)
+            response = not_modified_response(request, etag, last_modified)
+            if response is not None:
+                return response
+            return set_validators(func(request, *args, **kwargs), etag, last_modified)
+
+        return view
+
+    return decorator
@@ -23,4 +23,30 @@ def health_view(_request):
         redis_ok = False
 
     status = 200 if (db_ok and redis_ok) else 503
-    return JsonResponse({"db": db_ok, "redis": redis_ok, "status": status}, status=status)
+    return JsonResponse(
+        {"db": db_ok, "db_pool": db_pool_stats(), "redis": redis_ok, "status": status},
+        status=status,
+    )
+
+
+def db_pool_stats():
+    """Estado do reaproveitamento de conexões deste processo."""
+    mode = settings.DB_POOL_MODE
+    if mode != "pool":
+        return {"mode": mode, "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE", 0)}
+    pool = connection.pool
+    if pool is None:
+        return {"mode": mode}
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    return {
+        "mode": mode,
+        "min": stats.get("pool_min"),
+        "max": stats.get("pool_max"),
+        "size": size,
+        "in_use": size - stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "created": stats.get("connections_num", 0),
+        "errors": stats.get("connections_errors", 0),
+        "timeouts": stats.get("requests_errors", 0),
+    }
@@ -0,0 +1,178 @@
+import base64
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    ``DjangoJSONEncoder`` corta datetimes/times em milissegundos; no cursor o
+    valor precisa ser exato, senão o filtro ``>`` pula ou repete linhas.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginação por keyset (cursor opaco) sobre a ordenação da view.
+
+    A view declara ``ordering`` (ex.: ``("data_hora", "id")``); o último campo
+    deve ser único para desempatar. O cursor guarda os valores da última linha
+    da página, então a página N é buscada com ``WHERE (campos) > (valores)``
+    usando o índice composto, sem OFFSET.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    page_size = None
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        page_size = self.page_size or api_settings.PAGE_SIZE or 50
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                requested = int(raw)
+            except ValueError:
+                requested = 0
+            if requested > 0:
+                page_size = min(requested, self.max_page_size)
+        return page_size
+
+    def get_ordering(self, view):
+        ordering = getattr(view, "ordering", None)
+        assert ordering, (
+            f"{view.__class__.__name__} must define `ordering` to use {self.__class__.__name__}."
+        )
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._page_queryset(queryset, request, view)
+        return self._finish_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão assíncrona (ORM async) para as views servidas via ASGI."""
+        page_queryset = self._page_queryset(queryset, request, view)
+        return self._finish_page([obj async for obj in page_queryset])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.model = queryset.model
+
+        position, self.reverse = self.decode_cursor(request)
+        self._position_given = position is not None
+        ordering = _flip(self.ordering) if self.reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(_keyset_filter(ordering, position))
+        return queryset[: self.page_size + 1]
+
+    def _finish_page(self, results):
+        has_following = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self._position_given
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self._position_given
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, cls=CursorJSONEncoder, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _position(self, instance):
+        return [getattr(instance, name.lstrip("-")) for name in self.ordering]
+
+
+def _flip(ordering):
+    return tuple(name[1:] if name.startswith("-") else f"-{name}" for name in ordering)
+
+
+def _keyset_filter(ordering, position):
+    """Monta ``(a, b, c) > (x, y, z)`` respeitando a direção de cada campo."""
+    clauses = []
+    for i, name in enumerate(ordering):
+        field = name.lstrip("-")
+        lookup = "lt" if name.startswith("-") else "gt"
+        equal = {ordering[j].lstrip("-"): position[j] for j in range(i)}
+        clauses.append(Q(**equal, **{f"{field}__{lookup}": position[i]}))
+    return reduce(or_, clauses)
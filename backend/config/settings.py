@@ -14,6 +14,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -65,6 +66,7 @@ INSTALLED_APPS = [
     "dashboard",
     "relatorios",
     "notificacoes",
+    "sincronizacao",
 ]
 
 MIDDLEWARE = [
@@ -112,6 +114,40 @@ DATABASES = {
     }
 }
 
+# Servidor da aplicação: "wsgi" (gunicorn sync) ou "asgi" (gunicorn + uvicorn, GETs
+# quentes assíncronos, ver config/async_views.py)
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+
+# Reaproveitamento de conexões (web e worker configuram cada um o seu):
+# - "none": uma conexão por requisição/tarefa
+# - "persistent": conexão mantida por DB_CONN_MAX_AGE segundos, verificada antes de reusar
+# - "pool": pool do psycopg 3 por processo (somente Postgres), com checagem na
+#   retirada e reciclagem após DB_POOL_MAX_LIFETIME segundos
+# Conexões persistentes não servem ao ASGI (o ORM async roda em threads variadas),
+# por isso o padrão lá é "none"; em produção prefira "pool".
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "none" if SERVER_MODE == "asgi" else "persistent").lower()
+if DB_POOL_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_POOL_MODE == "pool":
+    if "postgresql" not in DATABASES["default"]["ENGINE"]:
+        raise ImproperlyConfigured("DB_POOL_MODE=pool requer DB_ENGINE=django.db.backends.postgresql")
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "check": ConnectionPool.check_connection,
+        }
+    }
+elif DB_POOL_MODE != "none":
+    raise ImproperlyConfigured(f"DB_POOL_MODE inválido: {DB_POOL_MODE!r} (use none, persistent ou pool)")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
@@ -146,8 +182,30 @@ USE_I18N = True
 USE_TZ = True
 
 
-# Email configuration (for development)
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Email configuration (console em desenvolvimento; SMTP via variáveis de ambiente)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False") == "True"
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "10"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@picineiros.com")
+# Fila de emails (notificacoes.emails): emails por conexão/tarefa, intervalo (segundos) do
+# relay no beat, tentativas e espera exponencial (segundos) entre elas
+EMAIL_LOTE = int(os.getenv("EMAIL_LOTE", "50"))
+EMAIL_FILA_INTERVALO = int(os.getenv("EMAIL_FILA_INTERVALO", "30"))
+EMAIL_MAX_TENTATIVAS = int(os.getenv("EMAIL_MAX_TENTATIVAS", "6"))
+EMAIL_RETRY_BASE = int(os.getenv("EMAIL_RETRY_BASE", "30"))
+EMAIL_RETRY_MAXIMO = int(os.getenv("EMAIL_RETRY_MAXIMO", "3600"))
+# Dias que os emails enviados ficam na fila (deduplicação pela chave)
+EMAIL_RETENCAO_DIAS = int(os.getenv("EMAIL_RETENCAO_DIAS", "7"))
+# Janela (segundos) em que pedidos repetidos de redefinição de senha viram um único email
+EMAIL_DEDUPLICACAO_JANELA = int(os.getenv("EMAIL_DEDUPLICACAO_JANELA", "300"))
+# Backend simulado (notificacoes.emails.SimuladoEmailBackend) para testes de vazão offline
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", str(BASE_DIR / "tmp" / "emails"))
+EMAIL_SIMULADO_LATENCIA_CONEXAO = float(os.getenv("EMAIL_SIMULADO_LATENCIA_CONEXAO", "0.3"))
+EMAIL_SIMULADO_LATENCIA_MENSAGEM = float(os.getenv("EMAIL_SIMULADO_LATENCIA_MENSAGEM", "0.02"))
 
 
 # Sentry configuration (optional)
@@ -170,6 +228,46 @@ if SENTRY_DSN:
 STATIC_URL = "static/"
 STATIC_ROOT = os.getenv("STATIC_ROOT", str(BASE_DIR / "staticfiles"))
 
+# Cache compartilhado entre processos/hosts (Redis); sem CACHE_URL usa memória local,
+# aceito só em DEBUG: com vários workers cada um teria seu cache e as invalidações se perderiam
+CACHE_URL = os.getenv("CACHE_URL", "")
+if not CACHE_URL and not DEBUG:
+    raise ImproperlyConfigured("CACHE_URL deve ser definido quando DJANGO_DEBUG=false")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "picineiros")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+            # Repassado ao ConnectionPool do redis-py (um pool por processo)
+            "OPTIONS": {
+                "max_connections": int(os.getenv("CACHE_MAX_CONNECTIONS", "50")),
+                "socket_connect_timeout": float(os.getenv("CACHE_SOCKET_TIMEOUT", "1")),
+                "socket_timeout": float(os.getenv("CACHE_SOCKET_TIMEOUT", "1")),
+                "health_check_interval": 30,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+        }
+    }
+
+# Dashboard: payload de estatísticas em cache por usuário (invalidado por signals)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "300"))
+
+# Relatórios gerados em background (artefatos servidos para download)
+REPORT_ARTIFACTS_ROOT = os.getenv("REPORT_ARTIFACTS_ROOT", str(BASE_DIR / "artifacts" / "relatorios"))
+REPORT_ARTIFACT_TTL_HOURS = int(os.getenv("REPORT_ARTIFACT_TTL_HOURS", "24"))
+# Job pendente/processando mais antigo que isso é tratado como perdido (worker caiu) e não é reaproveitado
+REPORT_JOB_STALE_MINUTES = int(os.getenv("REPORT_JOB_STALE_MINUTES", "15"))
+# Tamanho máximo (MB) das planilhas enviadas para importação
+IMPORT_MAX_UPLOAD_MB = int(os.getenv("IMPORT_MAX_UPLOAD_MB", "50"))
+
 AUTH_USER_MODEL = "accounts.User"
 
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "")
@@ -185,26 +283,45 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "America/Sao_Paulo"
+# Número de fatias (por faixa de id de usuário) das tarefas diárias de notificação
+NOTIFICACAO_SHARDS = int(os.getenv("NOTIFICACAO_SHARDS", "8"))
+# Intervalo (segundos) do relay que publica a outbox de notificações
+NOTIFICACAO_OUTBOX_INTERVALO = int(os.getenv("NOTIFICACAO_OUTBOX_INTERVALO", "5"))
+# TTL (segundos) do contador de não lidas no Redis; sem a chave, a leitura reconta no banco
+NOTIFICACAO_CONTADOR_TTL = int(os.getenv("NOTIFICACAO_CONTADOR_TTL", "86400"))
+# Stream SSE do contador (só com SERVER_MODE=asgi): intervalo de consulta, duração de cada
+# conexão e validade do token de conexão usado pelo EventSource (segundos)
+NOTIFICACAO_SSE_INTERVALO = int(os.getenv("NOTIFICACAO_SSE_INTERVALO", "2"))
+NOTIFICACAO_SSE_DURACAO = int(os.getenv("NOTIFICACAO_SSE_DURACAO", "300"))
+NOTIFICACAO_SSE_TOKEN_TTL = int(os.getenv("NOTIFICACAO_SSE_TOKEN_TTL", "60"))
+# Retenção de notificações lidas: idade (dias), "arquivar" ou "excluir", linhas por lote
+# e tempo máximo (segundos) de cada execução
+NOTIFICACAO_RETENCAO_DIAS = int(os.getenv("NOTIFICACAO_RETENCAO_DIAS", "90"))
+NOTIFICACAO_RETENCAO_MODO = os.getenv("NOTIFICACAO_RETENCAO_MODO", "arquivar").lower()
+NOTIFICACAO_RETENCAO_LOTE = int(os.getenv("NOTIFICACAO_RETENCAO_LOTE", "1000"))
+NOTIFICACAO_RETENCAO_TEMPO_MAXIMO = int(os.getenv("NOTIFICACAO_RETENCAO_TEMPO_MAXIMO", "300"))
 
 CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_THROTTLE_CLASSES": (
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.ScopedRateThrottle",
+        "config.throttling.AnonRateThrottle",
+        "config.throttling.UserRateThrottle",
+        "config.throttling.ScopedRateThrottle",
     ),
     "DEFAULT_THROTTLE_RATES": {
         "anon": "1000/day",
         "user": "10000/day",
         "login": "5/15m",
     },
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "50")),
 }
 
 SIMPLE_JWT = {
@@ -214,6 +331,41 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": False,
 }
 
+# Usuário autenticado via JWT fica em cache por este tempo (0 desliga o cache)
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", "300"))
+# Endpoints de leitura marcados com ReadJWTAuthentication confiam só nas claims do token
+JWT_STATELESS_READS = os.getenv("JWT_STATELESS_READS", "false").lower() == "true"
+
+# Máximo de itens por requisição nos endpoints de escrita em lote (.../bulk/)
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+# Sync delta (/api/sync/): linhas por modelo em cada resposta, atraso (segundos) do
+# watermark em relação ao relógio e por quantos dias as exclusões físicas ficam registradas
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+SYNC_WATERMARK_LAG = int(os.getenv("SYNC_WATERMARK_LAG", "5"))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Maior período (em dias) aceito por /api/agendamentos/agenda/ e /disponibilidade/
+AGENDA_MAX_DIAS = int(os.getenv("AGENDA_MAX_DIAS", "92"))
+# Duração máxima de um agendamento (minutos): limita a faixa do índice lida na checagem de conflitos
+AGENDAMENTO_DURACAO_MAXIMA = int(os.getenv("AGENDAMENTO_DURACAO_MAXIMA", "720"))
+# Horizonte (dias a partir de hoje ou do início da série) em que as ocorrências de uma série nova ou alterada são checadas contra a agenda
+RECORRENCIA_CONFLITOS_DIAS = int(os.getenv("RECORRENCIA_CONFLITOS_DIAS", "92"))
+# Expediente padrão (hora local) considerado por /api/agendamentos/disponibilidade/
+AGENDA_EXPEDIENTE_INICIO = os.getenv("AGENDA_EXPEDIENTE_INICIO", "08:00")
+AGENDA_EXPEDIENTE_FIM = os.getenv("AGENDA_EXPEDIENTE_FIM", "18:00")
+
+# Feed iCalendar (/api/agendamentos/calendario/<token>.ics): janela móvel em dias e por
+# quanto tempo o corpo gerado para uma versão da agenda fica no cache
+CALENDARIO_DIAS_PASSADOS = int(os.getenv("CALENDARIO_DIAS_PASSADOS", "30"))
+CALENDARIO_DIAS_FUTUROS = int(os.getenv("CALENDARIO_DIAS_FUTUROS", "180"))
+CALENDARIO_CACHE_TIMEOUT = int(os.getenv("CALENDARIO_CACHE_TIMEOUT", "86400"))
+
+# Geocodificação dos endereços de clientes (classe com geocodificar(endereco)); o padrão
+# não usa rede e sorteia coordenadas estáveis dentro da caixa (sul, oeste, norte, leste)
+GEOCODER_BACKEND = os.getenv("GEOCODER_BACKEND", "clientes.geocoding.GeocodificadorLocal")
+GEOCODER_LOCAL_BBOX = (-23.75, -46.85, -23.40, -46.40)
+
 REFRESH_COOKIE_NAME = "refresh_token"
 
 SESSION_COOKIE_SAMESITE = "Lax"
@@ -249,5 +401,6 @@ LOGGING = {
         "agendamentos": {"level": LOG_LEVEL},
         "financeiro": {"level": LOG_LEVEL},
         "notificacoes": {"level": LOG_LEVEL},
+        "relatorios": {"level": LOG_LEVEL},
     },
 }
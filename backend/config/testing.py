@@ -0,0 +1,152 @@
+import threading
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """
+    Helpers de teste para detectar N+1.
+
+    ``assertConstantQueries`` executa ``request`` depois de cada chamada a
+    ``add_rows(n)`` e falha se o número de queries variar com o volume de linhas.
+    """
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func()
+            if getattr(result, "streaming", False):
+                # Respostas em streaming só consultam o banco ao serem consumidas
+                result.content_bytes = b"".join(result.streaming_content)
+        return result, len(ctx.captured_queries)
+
+    def assertConstantQueries(self, request, add_rows, batches=(1, 5)):
+        counts = []
+        for n in batches:
+            add_rows(n)
+            response, total = self.count_queries(request)
+            self.assertLess(getattr(response, "status_code", 200), 400)
+            counts.append(total)
+        self.assertEqual(
+            len(set(counts)),
+            1,
+            f"Número de queries varia com o número de linhas: {counts}",
+        )
+        return counts[0]
+
+
+class FakeRedis:
+    """
+    Redis em memória com o subconjunto de comandos usado pelo projeto.
+
+    Para testes: substitui ``config.throttling.get_redis_client`` (e afins) sem
+    precisar de um servidor. ``pipeline()`` executa os comandos enfileirados em
+    bloco, sob um lock, como um MULTI/EXEC.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.RLock()
+        self.round_trips = 0
+
+    def _expire_stale(self, key):
+        expira = self.expires.get(key)
+        if expira is not None and expira <= self.clock():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def _call(self, name, *args):
+        with self.lock:
+            return getattr(self, f"_{name}")(*args)
+
+    def _get(self, key):
+        self._expire_stale(key)
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    def _set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expires[key] = self.clock() + ex
+        return True
+
+    def _incrby(self, key, amount):
+        self._expire_stale(key)
+        self.data[key] = int(self.data.get(key, 0)) + amount
+        return self.data[key]
+
+    def _expire(self, key, seconds):
+        self._expire_stale(key)
+        if key not in self.data:
+            return False
+        self.expires[key] = self.clock() + seconds
+        return True
+
+    def _delete(self, *keys):
+        removidas = 0
+        for key in keys:
+            self._expire_stale(key)
+            removidas += self.data.pop(key, None) is not None
+            self.expires.pop(key, None)
+        return removidas
+
+    def get(self, key):
+        self.round_trips += 1
+        return self._call("get", key)
+
+    def set(self, key, value, ex=None):
+        self.round_trips += 1
+        return self._call("set", key, value, ex)
+
+    def incr(self, key, amount=1):
+        self.round_trips += 1
+        return self._call("incrby", key, amount)
+
+    def decr(self, key, amount=1):
+        self.round_trips += 1
+        return self._call("incrby", key, -amount)
+
+    def expire(self, key, seconds):
+        self.round_trips += 1
+        return self._call("expire", key, seconds)
+
+    def delete(self, *keys):
+        self.round_trips += 1
+        return self._call("delete", *keys)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    _COMMANDS = {"get": "get", "set": "set", "incr": "incrby", "decr": "incrby", "expire": "expire", "delete": "delete"}
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = []
+
+    def __getattr__(self, name):
+        if name not in self._COMMANDS:
+            raise AttributeError(name)
+
+        def enqueue(*args, **kwargs):
+            if name == "set":
+                args = (*args[:2], kwargs.get("ex", args[2] if len(args) > 2 else None))
+            elif name in ("incr", "decr"):
+                amount = args[1] if len(args) > 1 else 1
+                args = (args[0], amount if name == "incr" else -amount)
+            self.queue.append((self._COMMANDS[name], args))
+            return self
+
+        return enqueue
+
+    def execute(self):
+        self.redis.round_trips += 1
+        with self.redis.lock:
+            results = [getattr(self.redis, f"_{name}")(*args) for name, args in self.queue]
+        self.queue = []
+        return results
@@ -0,0 +1,107 @@
+import logging
+import re
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+RATE_RE = re.compile(r"^(\d+)/(\d*)([smhd])")
+
+
+def get_redis_client():
+    """Cliente do pool do cache padrão, ou ``None`` quando o cache não é Redis."""
+    backend = caches["default"]
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(write=True)
+
+
+class RedisSlidingWindowMixin:
+    """
+    Throttle por janela deslizante aproximada, compartilhado entre processos.
+
+    Cada janela fixa tem um contador no Redis; a estimativa é o contador atual
+    mais a fração ainda válida da janela anterior. ``INCR`` + ``EXPIRE`` + ``GET``
+    vão num único MULTI/EXEC, então cada requisição faz uma ida ao Redis. Quando
+    o cache não é Redis, usa o comportamento padrão do DRF. Se o Redis falhar,
+    a requisição é liberada.
+
+    Aceita taxas com multiplicador no período, como ``5/15m``.
+    """
+
+    def parse_rate(self, rate):
+        if rate is None:
+            return (None, None)
+        match = RATE_RE.match(rate)
+        if not match:
+            raise ValueError(f"Taxa de throttle inválida: {rate!r}")
+        num, multiplier, unit = match.groups()
+        return int(num), int(multiplier or 1) * DURATIONS[unit]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        client = get_redis_client()
+        if client is None:
+            return super().allow_request(request, view)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.duration)
+        current = int(self.now // window)
+        elapsed = self.now - current * window
+        key = cache.make_key(self.key)
+        current_key, previous_key = f"{key}:{current}", f"{key}:{current - 1}"
+
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+            pipe.get(previous_key)
+            count, _, previous = pipe.execute()
+        except Exception:
+            logger.warning("throttle_redis_unavailable", exc_info=True)
+            return True
+
+        estimate = int(previous or 0) * (window - elapsed) / window + count
+        if estimate <= self.num_requests:
+            return True
+
+        # Requisições negadas não contam, como no throttle padrão do DRF
+        try:
+            client.decr(current_key)
+        except Exception:
+            logger.warning("throttle_redis_unavailable", exc_info=True)
+        self.retry_after = window - elapsed
+        return self.throttle_failure()
+
+    def wait(self):
+        retry_after = getattr(self, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return super().wait()
+
+
+class AnonRateThrottle(RedisSlidingWindowMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(RedisSlidingWindowMixin, throttling.UserRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(RedisSlidingWindowMixin, throttling.ScopedRateThrottle):
+    def allow_request(self, request, view):
+        # O escopo (e a taxa) só é conhecido com a view em mãos
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
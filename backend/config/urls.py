@@ -28,5 +28,6 @@ urlpatterns = [
     path("api/dashboard/", include("dashboard.urls")),
     path("api/relatorios/", include("relatorios.urls")),
     path("api/notificacoes/", include("notificacoes.urls")),
+    path("api/sync/", include("sincronizacao.urls")),
     path("api/health/", health_view, name="health"),
 ]
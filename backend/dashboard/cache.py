@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+def dashboard_cache_key(usuario_id):
+    return f"dashboard:stats:{usuario_id}"
+
+
+def get_cached_stats(usuario_id):
+    return cache.get(dashboard_cache_key(usuario_id))
+
+
+def set_cached_stats(usuario_id, data):
+    cache.set(dashboard_cache_key(usuario_id), data, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+async def aget_cached_stats(usuario_id):
+    return await cache.aget(dashboard_cache_key(usuario_id))
+
+
+async def aset_cached_stats(usuario_id, data):
+    await cache.aset(dashboard_cache_key(usuario_id), data, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def invalidate_dashboard(usuario_id):
+    cache.delete(dashboard_cache_key(usuario_id))
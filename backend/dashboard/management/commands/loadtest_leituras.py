@@ -0,0 +1,123 @@
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+
+PATHS = [
+    "/api/clientes/",
+    "/api/agendamentos/",
+    "/api/financeiro/",
+    "/api/notificacoes/",
+    "/api/notificacoes/nao-lidas/",
+    "/api/dashboard/stats/",
+    "/api/auth/me/",
+]
+
+
+def _rss_mb(pid):
+    """RSS do processo e de todos os filhos (master do gunicorn + workers)."""
+    total_kb = 0
+    pending = [str(pid)]
+    while pending:
+        current = pending.pop()
+        try:
+            status = Path(f"/proc/{current}/status").read_text()
+        except FileNotFoundError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total_kb += int(line.split()[1])
+        for task in Path(f"/proc/{current}/task").iterdir():
+            children = (task / "children").read_text().split()
+            pending.extend(children)
+    return total_kb / 1024
+
+
+async def _get(host, port, path, token):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            (
+                f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n"
+                "Accept: application/json\r\nConnection: close\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga dos GETs quentes contra um servidor já rodando; rode uma vez "
+        "com SERVER_MODE=wsgi e outra com SERVER_MODE=asgi (mesmo WEB_CONCURRENCY)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--email", required=True, help="Usuário cujo token será usado")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--duration", type=float, default=15.0, help="Segundos de carga")
+        parser.add_argument("--server-pid", type=int, help="PID do master do gunicorn para medir memória")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['email']} não encontrado.")
+        token = str(AccessToken.for_user(user))
+        url = urlsplit(options["url"])
+        latencies, errors = asyncio.run(
+            self.run_load(url.hostname, url.port or 80, token, options["concurrency"], options["duration"])
+        )
+        if not latencies:
+            raise CommandError("Nenhuma requisição concluída.")
+
+        latencies.sort()
+        total = len(latencies)
+
+        def pct(p):
+            return latencies[min(total - 1, int(total * p))] * 1000
+
+        linha = (
+            f"requisicoes={total} erros={errors} rps={total / options['duration']:.0f} "
+            f"p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms "
+            f"media={statistics.fmean(latencies) * 1000:.1f}ms"
+        )
+        if options["server_pid"]:
+            linha += f" rss_servidor={_rss_mb(options['server_pid']):.0f}MB"
+        self.stdout.write(linha)
+
+    async def run_load(self, host, port, token, concurrency, duration):
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                path = PATHS[i % len(PATHS)]
+                i += 1
+                inicio = time.perf_counter()
+                try:
+                    status = await _get(host, port, path, token)
+                except OSError:
+                    errors += 1
+                    continue
+                if status != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - inicio)
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        return latencies, errors
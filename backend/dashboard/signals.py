@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agendamentos.models import Agendamento, Recorrencia
+from clientes.models import Cliente
+from config.conditional import row_touches_enabled, touch
+from financeiro.models import Financeiro
+from notificacoes.models import Notificacao
+
+from .cache import invalidate_dashboard
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Agendamento)
+@receiver(post_save, sender=Recorrencia)
+@receiver(post_save, sender=Financeiro)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Agendamento)
+@receiver(post_delete, sender=Recorrencia)
+@receiver(post_delete, sender=Financeiro)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    # Apagar dentro da transação deixaria um GET concorrente recachear o estado antigo
+    usuario_id = instance.usuario_id
+    transaction.on_commit(lambda: invalidate_dashboard(usuario_id))
+
+
+# Versões do GET condicional (config.conditional), trocadas após o commit
+RECURSOS = {
+    Cliente: "clientes",
+    Agendamento: "agendamentos",
+    # As séries aparecem como ocorrências na agenda e no dashboard
+    Recorrencia: "agendamentos",
+    Financeiro: "financeiro",
+    Notificacao: "notificacoes",
+}
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Agendamento)
+@receiver(post_save, sender=Recorrencia)
+@receiver(post_save, sender=Financeiro)
+@receiver(post_save, sender=Notificacao)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Agendamento)
+@receiver(post_delete, sender=Recorrencia)
+@receiver(post_delete, sender=Financeiro)
+@receiver(post_delete, sender=Notificacao)
+def touch_resource_version(sender, instance, **kwargs):
+    if row_touches_enabled():
+        touch(instance.usuario_id, RECURSOS[sender])
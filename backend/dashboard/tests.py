@@ -0,0 +1,202 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from accounts.views import me_view_async
+from clientes.views import ClienteListCreateView
+from config.async_views import async_list, read_route
+from config.testing import QueryCountAssertionsMixin
+from financeiro.models import Financeiro
+
+from .cache import get_cached_stats
+from .views import dashboard_stats_async
+
+User = get_user_model()
+
+
+class DashboardStatsTests(QueryCountAssertionsMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="owner@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.url = "/api/dashboard/stats/"
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stats_cached_and_invalidated_on_write(self):
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=100, status="pago", data_vencimento="2030-01-01")
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=50, status="pendente", data_vencimento="2030-01-01")
+
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["totais"], {"clientes": 1, "agendamentos": 0, "financeiro": 2})
+        self.assertEqual(resp.data["financeiro"], {"pendente": 50.0, "pago": 100.0})
+        self.assertEqual(
+            resp.data["financeiro_por_status"],
+            [{"status": "pago", "valor": 100.0}, {"status": "pendente", "valor": 50.0}],
+        )
+
+        cached, queries = self.count_queries(lambda: self.client.get(self.url))
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(queries, 0)
+
+        # A invalidação só acontece depois do commit da escrita
+        with self.captureOnCommitCallbacks(execute=True):
+            Agendamento.objects.create(
+                usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timezone.timedelta(days=1)
+            )
+            self.assertIsNotNone(get_cached_stats(self.user.id))
+        resp = self.client.get(self.url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["totais"]["agendamentos"], 1)
+        self.assertEqual(resp.data["proximos_agendamentos"][0]["cliente_nome"], "Cliente A")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def add_rows(n):
+            cache.clear()
+            for _ in range(n):
+                Agendamento.objects.create(
+                    usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timezone.timedelta(days=1)
+                )
+                Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=10, data_vencimento="2030-01-01")
+
+        self.assertConstantQueries(lambda: self.client.get(self.url), add_rows)
+
+
+class AsyncReadPathTests(APITestCase):
+    """GETs servidos pelas views async (modo ASGI) devolvem o mesmo que as sync."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="async@example.com", password="strongpass123", nome="Async")
+        for i in range(3):
+            cliente = Cliente.objects.create(usuario=self.user, nome=f"Cliente {i}")
+        Financeiro.objects.create(usuario=self.user, cliente=cliente, valor=80, status="pago", data_vencimento="2030-01-01")
+        Agendamento.objects.create(usuario=self.user, cliente=cliente, data_hora=timezone.now() + timezone.timedelta(days=1))
+        self.token = str(AccessToken.for_user(self.user))
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, path, token=None):
+        headers = {"Authorization": f"Bearer {token or self.token}"} if token is not False else {}
+        return self.factory.get(path, headers=headers)
+
+    async def test_async_list_matches_sync_pagination(self):
+        sync_resp = await sync_to_async(self.client.get)("/api/clientes/?page_size=2")
+        resp = await async_list(ClienteListCreateView)(self.get("/api/clientes/?page_size=2"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.content), json.loads(sync_resp.content))
+
+    async def test_async_dashboard_and_me(self):
+        sync_resp = await sync_to_async(self.client.get)("/api/dashboard/stats/")
+        await sync_to_async(cache.clear)()
+        resp = await dashboard_stats_async(self.get("/api/dashboard/stats/"))
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(json.loads(resp.content), json.loads(sync_resp.content))
+        resp = await dashboard_stats_async(self.get("/api/dashboard/stats/"))
+        self.assertEqual(resp["X-Cache"], "HIT")
+
+        resp = await me_view_async(self.get("/api/auth/me/"))
+        self.assertEqual(json.loads(resp.content)["nome"], "Async")
+
+    async def test_async_views_reject_missing_or_invalid_token(self):
+        with self.settings(SERVER_MODE="asgi"):
+            view = read_route(lambda request: None, async_list(ClienteListCreateView))
+        resp = await view(self.get("/api/clientes/", token=False))
+        self.assertEqual(resp.status_code, 401)
+        resp = await view(self.get("/api/clientes/", token="invalido"))
+        self.assertEqual(resp.status_code, 401)
+
+
+class ConditionalGetTests(QueryCountAssertionsMixin, APITestCase):
+    """ETag/Last-Modified por usuário e recurso nos GETs de leitura."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="etag@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        Agendamento.objects.create(usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timezone.timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_304_sem_consultas_ate_a_proxima_escrita(self):
+        for url in ("/api/clientes/", f"/api/clientes/{self.cliente.id}/", "/api/agendamentos/", "/api/dashboard/stats/"):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp["Cache-Control"], "private, no-cache")
+            not_modified, queries = self.count_queries(lambda: self.revalidate(url, resp["ETag"]))
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(not_modified["ETag"], resp["ETag"])
+            self.assertEqual(queries, 0)
+
+        etag = self.client.get("/api/agendamentos/")["ETag"]
+        # Agendamentos mostram o nome do cliente: renomear o cliente invalida a lista
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/clientes/{self.cliente.id}/", {"nome": "Cliente B"}, format="json")
+        resp = self.revalidate("/api/agendamentos/", etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["cliente_nome"], "Cliente B")
+
+    def test_etag_varia_com_a_query_string_e_o_usuario(self):
+        etag = self.client.get("/api/clientes/")["ETag"]
+        self.assertEqual(self.revalidate("/api/clientes/?page_size=1", etag).status_code, status.HTTP_200_OK)
+
+        outro = APIClient()
+        outro.force_authenticate(user=User.objects.create_user(email="outro@example.com", password="strongpass123"))
+        self.assertEqual(outro.get("/api/clientes/", HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        resp = self.client.get("/api/clientes/")
+        resp = self.client.get("/api/clientes/", HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        resp = self.client.get("/api/clientes/", HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_escrita_no_mesmo_segundo_avanca_o_last_modified(self):
+        with mock.patch("config.conditional.time.time", return_value=1_700_000_000.5):
+            last_modified = self.client.get("/api/clientes/")["Last-Modified"]
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f"/api/clientes/{self.cliente.id}/", {"nome": "Cliente B"}, format="json")
+            resp = self.client.get("/api/clientes/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertGreater(parse_http_date(resp["Last-Modified"]), parse_http_date(last_modified))
+
+    def test_escritas_em_lote_de_notificacoes_trocam_a_versao(self):
+        from notificacoes.tasks import criar_notificacao_lembrete_agendamento
+
+        url = "/api/notificacoes/nao-lidas/"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_notificacao_lembrete_agendamento()
+        resp = self.revalidate(url, etag)
+        self.assertEqual(resp.data, {"nao_lidas": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/notificacoes/marcar-todas-lidas/")
+        resp = self.revalidate(url, resp["ETag"])
+        self.assertEqual(resp.data, {"nao_lidas": 0})
+
+    async def test_async_usa_o_mesmo_etag(self):
+        sync_resp = await sync_to_async(self.client.get)("/api/clientes/", HTTP_ACCEPT="application/json")
+        token = str(AccessToken.for_user(self.user))
+        request = AsyncRequestFactory().get(
+            "/api/clientes/", headers={"Authorization": f"Bearer {token}", "If-None-Match": sync_resp["ETag"]}
+        )
+        resp = await async_list(ClienteListCreateView)(request)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
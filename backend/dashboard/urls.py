@@ -1,7 +1,9 @@
 from django.urls import path
 
-from .views import dashboard_stats
+from config.async_views import read_route
+
+from .views import dashboard_stats, dashboard_stats_async
 
 urlpatterns = [
-    path("stats/", dashboard_stats, name="dashboard-stats"),
+    path("stats/", read_route(dashboard_stats, dashboard_stats_async), name="dashboard-stats"),
 ]
@@ -1,35 +1,66 @@
-from django.db.models import Count, Q, Sum
-from django.db.models.functions import TruncMonth
+import time
+
+from django.conf import settings
+from django.db.models import Q, Sum
 from django.utils import timezone
 from rest_framework import permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 
+from accounts.authentication import ReadJWTAuthentication
 from agendamentos.models import Agendamento
+from agendamentos.recorrencia import aexpandir, expandir, mesclar
 from clientes.models import Cliente
-from financeiro.models import Financeiro
+from config.async_views import AsyncReadView, json_response, prepare_request
+from config.conditional import anot_modified, conditional_get, set_validators
+from financeiro.models import Financeiro, FinanceiroResumoMensal
 
+from .cache import aget_cached_stats, aset_cached_stats, get_cached_stats, set_cached_stats
+
+PROXIMOS_LIMITE = 5
 
-@api_view(["GET"])
-@permission_classes([permissions.IsAuthenticated])
-def dashboard_stats(request):
-    user = request.user
 
-    # Totais
-    total_clientes = Cliente.objects.filter(usuario=user, ativo=True).count()
-    total_agendamentos = Agendamento.objects.filter(usuario=user, ativo=True).count()
-    total_financeiro = Financeiro.objects.filter(usuario=user, ativo=True).count()
+def _dashboard_queries(user):
+    """Consultas do dashboard, ainda não avaliadas (compartilhadas pelos modos sync e async)."""
+    # Financeiro: lido do resumo mensal mantido incrementalmente, sem varrer os lançamentos
+    aggregates = {"total": Sum("quantidade")}
+    for st in Financeiro.Status.values:
+        aggregates[f"{st}_count"] = Sum("quantidade", filter=Q(status=st))
+        aggregates[f"{st}_valor"] = Sum("valor_total", filter=Q(status=st))
+    resumo = FinanceiroResumoMensal.objects.filter(usuario=user)
 
-    # Financeiro
-    financeiro_pendente = Financeiro.objects.filter(usuario=user, ativo=True, status="pendente").aggregate(total=Sum("valor"))["total"] or 0
-    financeiro_pago = Financeiro.objects.filter(usuario=user, ativo=True, status="pago").aggregate(total=Sum("valor"))["total"] or 0
+    # Próximos agendamentos (próximos 7 dias), junto com as ocorrências das séries recorrentes
+    agora = timezone.now()
+    sete_dias = agora + timezone.timedelta(days=7)
+    proximos_agendamentos = (
+        Agendamento.objects.filter(usuario=user, ativo=True, data_hora__lte=sete_dias, data_hora__gte=agora)
+        .select_related("cliente")
+        .order_by("data_hora", "id")[:PROXIMOS_LIMITE]
+    )
+
+    # Receita mensal (mês corrente e os 5 anteriores, em meses fechados do calendário)
+    inicio = timezone.localdate().replace(day=1)
+    for _ in range(5):
+        inicio = (inicio - timezone.timedelta(days=1)).replace(day=1)
+    receita_mensal = (
+        resumo.filter(status="pago", mes__gte=inicio, quantidade__gt=0)
+        .values("mes")
+        .annotate(total=Sum("valor_total"))
+        .order_by("mes")
+    )
 
-    # Próximos agendamentos (próximos 7 dias)
-    sete_dias = timezone.now() + timezone.timedelta(days=7)
-    proximos_agendamentos = Agendamento.objects.filter(
-        usuario=user, ativo=True, data_hora__lte=sete_dias, data_hora__gte=timezone.now()
-    ).order_by("data_hora")[:5]
+    return {
+        "clientes": Cliente.objects.filter(usuario=user, ativo=True),
+        "agendamentos": Agendamento.objects.filter(usuario=user, ativo=True),
+        "resumo": resumo,
+        "aggregates": aggregates,
+        "proximos_agendamentos": proximos_agendamentos,
+        "janela_proximos": (agora, sete_dias),
+        "receita_mensal": receita_mensal,
+    }
 
+
+def _format_dashboard_stats(total_clientes, total_agendamentos, financeiro, proximos_agendamentos, receita_mensal):
     proximos_agendamentos_data = [
         {
             "id": str(a.id),
@@ -39,53 +70,97 @@ def dashboard_stats(request):
         }
         for a in proximos_agendamentos
     ]
+    receita_mensal_data = [{"mes": r["mes"].strftime("%Y-%m"), "valor": float(r["total"])} for r in receita_mensal]
 
-    # Receita mensal (últimos 6 meses) - compatível com Postgres/SQLite
-    seis_meses_atras = timezone.now() - timezone.timedelta(days=180)
-    receita_mensal = (
-        Financeiro.objects.filter(
-            usuario=user,
-            ativo=True,
-            status="pago",
-            criado_em__gte=seis_meses_atras,
-        )
-        .annotate(month=TruncMonth("criado_em"))
-        .values("month")
-        .annotate(total=Sum("valor"))
-        .order_by("month")
-    )
-    receita_mensal_data = [
-        {
-            "mes": r["month"].strftime("%Y-%m") if hasattr(r["month"], "strftime") else str(r["month"]),
-            "valor": float(r["total"]),
-        }
-        for r in receita_mensal
+    # Financeiro por status (somente status com lançamentos, em ordem alfabética)
+    financeiro_por_status_data = [
+        {"status": st, "valor": float(financeiro[f"{st}_valor"] or 0)}
+        for st in sorted(Financeiro.Status.values)
+        if financeiro[f"{st}_count"]
     ]
 
-    # Financeiro por status
-    financeiro_por_status = (
-        Financeiro.objects.filter(usuario=user, ativo=True)
-        .values("status")
-        .annotate(total=Sum("valor"))
-        .order_by("status")
+    return {
+        "totais": {
+            "clientes": total_clientes,
+            "agendamentos": total_agendamentos,
+            "financeiro": financeiro["total"] or 0,
+        },
+        "financeiro": {
+            "pendente": float(financeiro["pendente_valor"] or 0),
+            "pago": float(financeiro["pago_valor"] or 0),
+        },
+        "proximos_agendamentos": proximos_agendamentos_data,
+        "receita_mensal": receita_mensal_data,
+        "financeiro_por_status": financeiro_por_status_data,
+    }
+
+
+def build_dashboard_stats(user):
+    q = _dashboard_queries(user)
+    return _format_dashboard_stats(
+        q["clientes"].count(),
+        q["agendamentos"].count(),
+        q["resumo"].aggregate(**q["aggregates"]),
+        mesclar(list(q["proximos_agendamentos"]), expandir(user.pk, *q["janela_proximos"]), PROXIMOS_LIMITE),
+        list(q["receita_mensal"]),
     )
-    financeiro_por_status_data = [
-        {"status": r["status"], "valor": float(r["total"])} for r in financeiro_por_status
-    ]
 
-    return Response(
-        {
-            "totais": {
-                "clientes": total_clientes,
-                "agendamentos": total_agendamentos,
-                "financeiro": total_financeiro,
-            },
-            "financeiro": {
-                "pendente": float(financeiro_pendente),
-                "pago": float(financeiro_pago),
-            },
-            "proximos_agendamentos": proximos_agendamentos_data,
-            "receita_mensal": receita_mensal_data,
-            "financeiro_por_status": financeiro_por_status_data,
-        }
+
+async def abuild_dashboard_stats(user):
+    q = _dashboard_queries(user)
+    return _format_dashboard_stats(
+        await q["clientes"].acount(),
+        await q["agendamentos"].acount(),
+        await q["resumo"].aaggregate(**q["aggregates"]),
+        mesclar(
+            [a async for a in q["proximos_agendamentos"]],
+            await aexpandir(user.pk, *q["janela_proximos"]),
+            PROXIMOS_LIMITE,
+        ),
+        [r async for r in q["receita_mensal"]],
     )
+
+
+DASHBOARD_RESOURCES = ("clientes", "agendamentos", "financeiro")
+
+
+def _janela_de_tempo():
+    """
+    Versão extra do ETag do dashboard: próximos agendamentos e receita mensal
+    mudam com o relógio, então o ETag também vence a cada DASHBOARD_CACHE_TIMEOUT.
+    """
+    janela = max(settings.DASHBOARD_CACHE_TIMEOUT, 1)
+    inicio = int(time.time()) // janela * janela
+    return [(str(inicio), inicio)]
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+@conditional_get(*DASHBOARD_RESOURCES, extra=_janela_de_tempo)
+def dashboard_stats(request):
+    data = get_cached_stats(request.user.pk)
+    cache_status = "HIT"
+    if data is None:
+        data = build_dashboard_stats(request.user)
+        set_cached_stats(request.user.pk, data)
+        cache_status = "MISS"
+
+    response = Response(data, status=status.HTTP_200_OK)
+    response["X-Cache"] = cache_status
+    return response
+
+
+async def dashboard_stats_async(request):
+    view = AsyncReadView()
+    request = await prepare_request(request, view)
+    etag, last_modified, not_modified = await anot_modified(request, DASHBOARD_RESOURCES, _janela_de_tempo())
+    if not_modified is not None:
+        return not_modified
+    data = await aget_cached_stats(request.user.pk)
+    cache_status = "HIT"
+    if data is None:
+        data = await abuild_dashboard_stats(request.user)
+        await aset_cached_stats(request.user.pk, data)
+        cache_status = "MISS"
+    return set_validators(json_response(data, headers={"X-Cache": cache_status}), etag, last_modified)
@@ -1,12 +1,13 @@
 from django.contrib import admin
 
-from .models import Financeiro
+from .models import Financeiro, FinanceiroResumoMensal
 
 
 @admin.register(Financeiro)
 class FinanceiroAdmin(admin.ModelAdmin):
     list_display = ("cliente", "tipo", "valor", "data_vencimento", "status", "usuario", "ativo")
     list_filter = ("status", "tipo", "ativo", "usuario")
+    list_select_related = ("cliente", "usuario")
     search_fields = ("cliente__nome", "descricao")
     autocomplete_fields = ("cliente", "usuario", "agendamento")
     readonly_fields = ("id", "criado_em", "atualizado_em")
@@ -15,3 +16,11 @@ class FinanceiroAdmin(admin.ModelAdmin):
         ("Status", {"fields": ("ativo",)}),
         ("Datas", {"fields": ("criado_em", "atualizado_em")}),
     )
+
+
+@admin.register(FinanceiroResumoMensal)
+class FinanceiroResumoMensalAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "mes", "status", "tipo", "quantidade", "valor_total")
+    list_filter = ("status", "tipo")
+    list_select_related = ("usuario",)
+    readonly_fields = ("usuario", "mes", "status", "tipo", "quantidade", "valor_total")
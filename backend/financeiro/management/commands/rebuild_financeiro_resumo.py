@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from financeiro.models import FinanceiroResumoMensal
+from financeiro.rollup import resumo_a_partir_dos_lancamentos, resumo_armazenado
+
+
+class Command(BaseCommand):
+    help = "Reconstrói (ou apenas verifica) o resumo mensal financeiro a partir dos lançamentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Só compara, sem alterar o resumo")
+        parser.add_argument("--usuario", help="Restringe a um usuário (id)")
+
+    def handle(self, *args, **options):
+        usuario_id = options.get("usuario")
+        esperado = resumo_a_partir_dos_lancamentos(usuario_id)
+
+        if options["verify"]:
+            armazenado = resumo_armazenado(usuario_id)
+            divergentes = sorted(
+                (chave for chave in set(esperado) | set(armazenado) if esperado.get(chave) != armazenado.get(chave)),
+                key=str,
+            )
+            for chave in divergentes:
+                self.stdout.write(f"{chave}: esperado={esperado.get(chave)} armazenado={armazenado.get(chave)}")
+            if divergentes:
+                raise CommandError(f"{len(divergentes)} linha(s) do resumo divergem dos lançamentos.")
+            self.stdout.write(self.style.SUCCESS(f"Resumo consistente ({len(esperado)} linhas)."))
+            return
+
+        with transaction.atomic():
+            qs = FinanceiroResumoMensal.objects.all()
+            if usuario_id:
+                qs = qs.filter(usuario_id=usuario_id)
+            qs.delete()
+            FinanceiroResumoMensal.objects.bulk_create(
+                [
+                    FinanceiroResumoMensal(
+                        usuario_id=usuario, mes=mes, status=status, tipo=tipo, quantidade=quantidade, valor_total=valor
+                    )
+                    for (usuario, mes, status, tipo), (quantidade, valor) in esperado.items()
+                ],
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resumo reconstruído ({len(esperado)} linhas)."))
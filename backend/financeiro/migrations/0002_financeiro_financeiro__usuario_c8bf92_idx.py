@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_agendamento_agendamento_usuario_a0ff33_idx'),
+        ('clientes', '0002_cliente_clientes_cl_usuario_98a971_idx'),
+        ('financeiro', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financeiro',
+            index=models.Index(fields=['usuario', 'ativo', 'data_vencimento', 'id'], name='financeiro__usuario_c8bf92_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0002_financeiro_financeiro__usuario_c8bf92_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceiroResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('pago', 'Pago')], max_length=15)),
+                ('tipo', models.CharField(choices=[('servico', 'Serviço'), ('produto', 'Produto'), ('multa', 'Multa'), ('outro', 'Outro')], max_length=15)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financeiro_resumos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['mes'],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'mes', 'status', 'tipo'), name='financeiro_resumo_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def preencher_resumo(apps, schema_editor):
+    # Os sinais só mantêm o resumo a partir da criação da tabela; os lançamentos que já
+    # existiam entram aqui (mesma agregação de rebuild_financeiro_resumo)
+    from financeiro.rollup import resumo_a_partir_dos_lancamentos
+
+    Financeiro = apps.get_model("financeiro", "Financeiro")
+    FinanceiroResumoMensal = apps.get_model("financeiro", "FinanceiroResumoMensal")
+    esperado = resumo_a_partir_dos_lancamentos(modelo=Financeiro)
+    FinanceiroResumoMensal.objects.all().delete()
+    FinanceiroResumoMensal.objects.bulk_create(
+        [
+            FinanceiroResumoMensal(
+                usuario_id=usuario, mes=mes, status=status, tipo=tipo, quantidade=quantidade, valor_total=valor
+            )
+            for (usuario, mes, status, tipo), (quantidade, valor) in esperado.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0004_financeiro_financeiro__usuario_9f7dba_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 import uuid
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from accounts.models import User
@@ -38,8 +38,38 @@ class Financeiro(models.Model):
             models.Index(fields=["cliente", "ativo"]),
             models.Index(fields=["agendamento", "ativo"]),
             models.Index(fields=["status", "data_vencimento"]),
+            models.Index(fields=["usuario", "ativo", "data_vencimento", "id"]),
+            models.Index(fields=["usuario", "atualizado_em", "id"]),
         ]
         ordering = ["data_vencimento"]
 
     def __str__(self):
         return f"{self.cliente.nome} - {self.tipo} ({self.valor}) [{self.status}]"
+
+    def save(self, *args, **kwargs):
+        from .rollup import registrar_alteracao, snapshot_atual
+
+        with transaction.atomic():
+            anterior = None if self._state.adding else snapshot_atual(self.pk)
+            super().save(*args, **kwargs)
+            registrar_alteracao(anterior, self)
+
+
+class FinanceiroResumoMensal(models.Model):
+    """Contagem e soma de lançamentos ativos por usuário, mês de criação, status e tipo."""
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="financeiro_resumos")
+    mes = models.DateField()
+    status = models.CharField(max_length=15, choices=Financeiro.Status.choices)
+    tipo = models.CharField(max_length=15, choices=Financeiro.Tipo.choices)
+    quantidade = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "mes", "status", "tipo"], name="financeiro_resumo_unico"),
+        ]
+        ordering = ["mes"]
+
+    def __str__(self):
+        return f"{self.usuario_id} {self.mes:%Y-%m} {self.status}/{self.tipo}: {self.quantidade}"
@@ -0,0 +1,135 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def mes_de(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _chave(usuario_id, criado_em, status, tipo):
+    return {"usuario_id": usuario_id, "mes": mes_de(criado_em), "status": status, "tipo": tipo}
+
+
+def snapshot(financeiro):
+    """Chave do resumo e valor de um lançamento; ``None`` se ele não conta (inativo)."""
+    if not financeiro.ativo:
+        return None
+    return _chave(financeiro.usuario_id, financeiro.criado_em, financeiro.status, financeiro.tipo), financeiro.valor
+
+
+def snapshot_atual(pk):
+    from .models import Financeiro
+
+    row = (
+        Financeiro.objects.select_for_update()
+        .filter(pk=pk)
+        .values("usuario_id", "criado_em", "status", "tipo", "valor", "ativo")
+        .first()
+    )
+    if row is None or not row["ativo"]:
+        return None
+    return _chave(row["usuario_id"], row["criado_em"], row["status"], row["tipo"]), row["valor"]
+
+
+def aplicar_delta(chave, quantidade, valor):
+    from .models import FinanceiroResumoMensal
+
+    valor = Decimal(valor)
+    atualizados = FinanceiroResumoMensal.objects.filter(**chave).update(
+        quantidade=F("quantidade") + quantidade,
+        valor_total=F("valor_total") + valor,
+    )
+    if atualizados:
+        return
+    if quantidade < 0:
+        # A linha já foi removida (ex.: exclusão em cascata do usuário)
+        return
+    try:
+        with transaction.atomic():
+            FinanceiroResumoMensal.objects.create(**chave, quantidade=quantidade, valor_total=valor)
+    except IntegrityError:
+        # Outra transação criou a linha entre o UPDATE e o INSERT
+        FinanceiroResumoMensal.objects.filter(**chave).update(
+            quantidade=F("quantidade") + quantidade,
+            valor_total=F("valor_total") + valor,
+        )
+
+
+def registrar_alteracao(anterior, financeiro):
+    atual = snapshot(financeiro)
+    if anterior == atual:
+        return
+    if anterior is not None:
+        aplicar_delta(anterior[0], -1, -anterior[1])
+    if atual is not None:
+        aplicar_delta(atual[0], 1, atual[1])
+
+
+def registrar_alteracoes(pares):
+    """
+    Versão em lote de ``registrar_alteracao`` para pares ``(snapshot anterior,
+    snapshot atual)``: os deltas são somados por chave e aplicados com um UPDATE
+    por linha do resumo, em ordem fixa de chave para evitar deadlocks.
+    """
+    deltas = {}
+    for anterior, atual in pares:
+        if anterior == atual:
+            continue
+        for snap, sinal in ((anterior, -1), (atual, 1)):
+            if snap is None:
+                continue
+            chave = tuple(sorted(snap[0].items()))
+            quantidade, valor = deltas.get(chave, (0, Decimal(0)))
+            deltas[chave] = (quantidade + sinal, valor + sinal * snap[1])
+    for chave in sorted(deltas, key=str):
+        quantidade, valor = deltas[chave]
+        if quantidade or valor:
+            aplicar_delta(dict(chave), quantidade, valor)
+
+
+def registrar_remocao(financeiro):
+    anterior = snapshot(financeiro)
+    if anterior is not None:
+        aplicar_delta(anterior[0], -1, -anterior[1])
+
+
+def resumo_a_partir_dos_lancamentos(usuario_id=None, modelo=None):
+    """
+    Agrega os lançamentos ativos direto da tabela, no mesmo formato do resumo.
+    ``modelo`` permite passar o ``Financeiro`` histórico numa migração.
+    """
+    if modelo is None:
+        from .models import Financeiro as modelo
+
+    qs = modelo.objects.filter(ativo=True)
+    if usuario_id is not None:
+        qs = qs.filter(usuario_id=usuario_id)
+    linhas = (
+        qs.annotate(mes=TruncMonth("criado_em"))
+        .values("usuario_id", "mes", "status", "tipo")
+        .annotate(quantidade=Count("id"), valor_total=Sum("valor"))
+        .order_by()
+    )
+    resultado = {}
+    for linha in linhas:
+        mes = linha["mes"]
+        mes = mes.date() if hasattr(mes, "date") else mes
+        chave = (linha["usuario_id"], mes, linha["status"], linha["tipo"])
+        resultado[chave] = (linha["quantidade"], linha["valor_total"])
+    return resultado
+
+
+def resumo_armazenado(usuario_id=None):
+    from .models import FinanceiroResumoMensal
+
+    qs = FinanceiroResumoMensal.objects.exclude(quantidade=0)
+    if usuario_id is not None:
+        qs = qs.filter(usuario_id=usuario_id)
+    return {
+        (r.usuario_id, r.mes, r.status, r.tipo): (r.quantidade, r.valor_total)
+        for r in qs.iterator()
+    }
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from config.bulk import PrefetchedRelatedField
+
 from .models import Financeiro
 
 
@@ -34,3 +36,10 @@ class FinanceiroCreateUpdateSerializer(serializers.ModelSerializer):
             "valor": {"required": True},
             "data_vencimento": {"required": True},
         }
+
+
+class FinanceiroBulkSerializer(FinanceiroCreateUpdateSerializer):
+    """Item dos endpoints em lote: FKs resolvidas sem uma consulta por item."""
+
+    cliente = PrefetchedRelatedField()
+    agendamento = PrefetchedRelatedField(required=False, allow_null=True)
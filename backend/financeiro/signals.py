@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Financeiro
+from .rollup import registrar_remocao
+
+
+@receiver(post_delete, sender=Financeiro)
+def atualizar_resumo_apos_remocao(sender, instance, **kwargs):
+    # Disparado também nas remoções em cascata (ex.: hard delete do cliente)
+    registrar_remocao(instance)
@@ -1,14 +1,25 @@
+import csv
+import gzip
+import importlib
+import io
+
+from datetime import date
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from clientes.models import Cliente
-from .models import Financeiro
+from config.testing import QueryCountAssertionsMixin
+from .models import Financeiro, FinanceiroResumoMensal
+from .rollup import resumo_a_partir_dos_lancamentos, resumo_armazenado
 
 User = get_user_model()
 
 
-class FinanceiroCrudTests(APITestCase):
+class FinanceiroCrudTests(QueryCountAssertionsMixin, APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(email="owner@example.com", password="strongpass123")
         self.other = User.objects.create_user(email="other@example.com", password="strongpass123")
@@ -35,12 +46,12 @@ class FinanceiroCrudTests(APITestCase):
         # Owner list
         resp2 = c.get(self.list_url)
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp2.data), 1)
+        self.assertEqual(len(resp2.data["results"]), 1)
 
         # Other user sees none
         c2 = self.auth(self.other)
         resp3 = c2.get(self.list_url)
-        self.assertEqual(len(resp3.data), 0)
+        self.assertEqual(len(resp3.data["results"]), 0)
 
         # Update status to pago
         detail_url = f"{self.list_url}{fid}/"
@@ -52,4 +63,207 @@ class FinanceiroCrudTests(APITestCase):
         del_resp = c.delete(detail_url)
         self.assertIn(del_resp.status_code, (status.HTTP_204_NO_CONTENT, status.HTTP_200_OK))
         resp4 = c.get(self.list_url)
-        self.assertEqual(len(resp4.data), 0)
+        self.assertEqual(len(resp4.data["results"]), 0)
+
+    def test_list_keyset_pagination(self):
+        for dia in (5, 1, 3, 3, 2):
+            Financeiro.objects.create(
+                usuario=self.user, cliente=self.cliente, valor=10, data_vencimento=f"2030-01-{dia:02d}"
+            )
+        c = self.auth(self.user)
+
+        seen = []
+        url = f"{self.list_url}?page_size=2"
+        while url:
+            resp = c.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(resp.data["results"]), 2)
+            seen.extend(resp.data["results"])
+            last = resp
+            url = resp.data["next"]
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len({it["id"] for it in seen}), 5)
+        self.assertEqual([it["data_vencimento"] for it in seen], sorted(it["data_vencimento"] for it in seen))
+
+        # Volta uma página a partir da última
+        prev = c.get(last.data["previous"])
+        self.assertEqual([it["id"] for it in prev.data["results"]], [it["id"] for it in seen[2:4]])
+
+        bad = c.get(f"{self.list_url}?cursor=invalido")
+        self.assertEqual(bad.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_detail_and_export_query_count_is_constant(self):
+        c = self.auth(self.user)
+
+        def add_rows(n):
+            for i in range(n):
+                cliente = Cliente.objects.create(usuario=self.user, nome=f"Cliente {i}")
+                Financeiro.objects.create(usuario=self.user, cliente=cliente, valor=10, data_vencimento="2030-01-01")
+
+        self.assertConstantQueries(lambda: c.get(self.list_url), add_rows)
+        self.assertConstantQueries(lambda: c.get("/api/relatorios/financeiro/csv/"), add_rows)
+
+        fid = Financeiro.objects.filter(usuario=self.user).values_list("id", flat=True).first()
+        _, total = self.count_queries(lambda: c.get(f"{self.list_url}{fid}/"))
+        self.assertEqual(total, 1)
+
+    def test_export_csv_streams_with_filters_and_gzip(self):
+        for dia, st in ((1, "pendente"), (10, "pago"), (20, "pendente")):
+            Financeiro.objects.create(
+                usuario=self.user, cliente=self.cliente, valor=10, status=st, data_vencimento=f"2030-01-{dia:02d}"
+            )
+        c = self.auth(self.user)
+        url = "/api/relatorios/financeiro/csv/"
+
+        resp = c.get(url, {"data_inicio": "2030-01-05", "data_fim": "2030-01-31", "status": "pendente"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(resp.streaming_content).decode("utf-8"))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][4], "20/01/2030")
+
+        resp_gz = c.get(url, {"gzip": "true"})
+        self.assertEqual(resp_gz["Content-Type"], "application/gzip")
+        self.assertIn("financeiro.csv.gz", resp_gz["Content-Disposition"])
+        content = gzip.decompress(b"".join(resp_gz.streaming_content)).decode("utf-8")
+        self.assertEqual(len(content.strip().splitlines()), 4)
+
+        invalid = c.get(url, {"status": "cancelado"})
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FinanceiroResumoMensalTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="resumo@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente R")
+        self.vencimento = date(2025, 1, 10)
+
+    def assertResumoConsistente(self):
+        self.assertEqual(resumo_armazenado(), resumo_a_partir_dos_lancamentos())
+
+    def test_resumo_acompanha_create_update_soft_e_hard_delete(self):
+        f1 = Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=Decimal("100.00"), data_vencimento=self.vencimento)
+        f2 = Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=Decimal("50.00"), data_vencimento=self.vencimento, status="pago")
+        self.assertResumoConsistente()
+        pendente = FinanceiroResumoMensal.objects.get(usuario=self.user, status="pendente")
+        self.assertEqual((pendente.quantidade, pendente.valor_total), (1, Decimal("100.00")))
+
+        f1.status = "pago"
+        f1.valor = Decimal("120.00")
+        f1.save()
+        self.assertResumoConsistente()
+        pago = FinanceiroResumoMensal.objects.get(usuario=self.user, status="pago")
+        self.assertEqual((pago.quantidade, pago.valor_total), (2, Decimal("170.00")))
+
+        f2.ativo = False
+        f2.save()
+        self.assertResumoConsistente()
+
+        f1.delete()
+        self.assertResumoConsistente()
+        self.assertFalse(FinanceiroResumoMensal.objects.filter(usuario=self.user, quantidade__gt=0).exists())
+
+        # Hard delete do cliente remove os lançamentos em cascata
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=Decimal("10.00"), data_vencimento=self.vencimento)
+        self.cliente.delete()
+        self.assertResumoConsistente()
+
+    def test_rebuild_e_verify(self):
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=Decimal("80.00"), data_vencimento=self.vencimento)
+        call_command("rebuild_financeiro_resumo", "--verify", stdout=io.StringIO())
+
+        # Alterações em massa não passam pelo save(); o rebuild corrige o resumo
+        Financeiro.objects.filter(usuario=self.user).update(valor=Decimal("90.00"))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_financeiro_resumo", "--verify", stdout=io.StringIO())
+        call_command("rebuild_financeiro_resumo", stdout=io.StringIO())
+        call_command("rebuild_financeiro_resumo", "--verify", stdout=io.StringIO())
+        self.assertEqual(FinanceiroResumoMensal.objects.get(usuario=self.user).valor_total, Decimal("90.00"))
+
+    def test_migracao_preenche_resumo_dos_lancamentos_existentes(self):
+        from django.apps import apps
+
+        preencher = importlib.import_module("financeiro.migrations.0005_preencher_resumo_mensal").preencher_resumo
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=Decimal("30.00"), data_vencimento=self.vencimento)
+        # Como numa base anterior ao resumo: lançamentos sem linhas no resumo
+        FinanceiroResumoMensal.objects.all().delete()
+        preencher(apps, None)
+        self.assertResumoConsistente()
+        self.assertEqual(FinanceiroResumoMensal.objects.get(usuario=self.user).valor_total, Decimal("30.00"))
+
+
+class FinanceiroBulkTests(QueryCountAssertionsMixin, APITestCase):
+    url = "/api/financeiro/bulk/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="bulk@example.com", password="strongpass123")
+        self.other = User.objects.create_user(email="other@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.cliente_alheio = Cliente.objects.create(usuario=self.other, nome="Cliente B")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def itens(self, n, cliente=None):
+        return [
+            {
+                "cliente": str((cliente or self.cliente).id),
+                "valor": "10.00",
+                "descricao": f"Mensalidade {i}",
+                "data_vencimento": "2030-01-10",
+            }
+            for i in range(n)
+        ]
+
+    def assertResumoConsistente(self):
+        self.assertEqual(resumo_armazenado(self.user.pk), resumo_a_partir_dos_lancamentos(self.user.pk))
+
+    def test_criacao_alteracao_e_exclusao_em_lote_mantem_o_resumo(self):
+        resp = self.client.post(self.url, self.itens(3), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        ids = [item["id"] for item in resp.data["results"]]
+        self.assertEqual(resp.data["results"][0]["cliente_nome"], "Cliente A")
+        self.assertResumoConsistente()
+
+        resp = self.client.patch(
+            self.url, [{"id": ids[0], "status": "pago"}, {"id": ids[1], "valor": "25.00"}], format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Financeiro.objects.get(id=ids[0]).status, "pago")
+        self.assertEqual(Financeiro.objects.get(id=ids[1]).valor, Decimal("25.00"))
+        self.assertResumoConsistente()
+
+        resp = self.client.delete(self.url, {"ids": ids[1:]}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Financeiro.objects.filter(usuario=self.user, ativo=True).count(), 1)
+        self.assertResumoConsistente()
+
+    def test_erros_por_item_e_nada_gravado(self):
+        itens = self.itens(2) + self.itens(1, cliente=self.cliente_alheio) + [{"cliente": str(self.cliente.id)}]
+        resp = self.client.post(self.url, itens, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = resp.data["errors"]
+        self.assertEqual(errors[:2], [{}, {}])
+        self.assertIn("cliente", errors[2])
+        self.assertIn("valor", errors[3])
+        self.assertFalse(Financeiro.objects.exists())
+
+        outro = Financeiro.objects.create(
+            usuario=self.other, cliente=self.cliente_alheio, valor=5, data_vencimento="2030-01-10"
+        )
+        resp = self.client.delete(self.url, {"ids": [str(outro.id)]}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Financeiro.objects.get(id=outro.id).ativo)
+
+    def test_limite_de_itens(self):
+        with self.settings(BULK_MAX_ITEMS=2):
+            resp = self.client.post(self.url, self.itens(3), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("detail", resp.data)
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        # A primeira gravação cria a linha do resumo; as seguintes só a atualizam
+        self.client.post(self.url, self.itens(1), format="json")
+        _, poucos = self.count_queries(lambda: self.client.post(self.url, self.itens(2), format="json"))
+        _, muitos = self.count_queries(lambda: self.client.post(self.url, self.itens(40), format="json"))
+        self.assertEqual(poucos, muitos)
@@ -1,13 +1,17 @@
 from django.urls import path
 
+from config.async_views import async_list, read_route
+
 from .views import (
+    FinanceiroBulkView,
     FinanceiroDetailView,
     FinanceiroListCreateView,
     financeiro_hard_delete,
 )
 
 urlpatterns = [
-    path("", FinanceiroListCreateView.as_view(), name="financeiro-list-create"),
+    path("", read_route(FinanceiroListCreateView.as_view(), async_list(FinanceiroListCreateView)), name="financeiro-list-create"),
+    path("bulk/", FinanceiroBulkView.as_view(), name="financeiro-bulk"),
     path("<uuid:pk>/", FinanceiroDetailView.as_view(), name="financeiro-detail"),
     path("<uuid:pk>/hard-delete/", financeiro_hard_delete, name="financeiro-hard-delete"),
 ]
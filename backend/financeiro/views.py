@@ -3,23 +3,37 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from accounts.authentication import ReadJWTAuthentication
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from config.bulk import BulkWriteView
+from config.conditional import ConditionalGetMixin
+
 from .models import Financeiro
-from .serializers import FinanceiroCreateUpdateSerializer, FinanceiroSerializer
+from .rollup import registrar_alteracoes, snapshot
+from .serializers import FinanceiroBulkSerializer, FinanceiroCreateUpdateSerializer, FinanceiroSerializer
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.usuario == request.user
+        return obj.usuario_id == request.user.pk
 
 
-class FinanceiroListCreateView(generics.ListCreateAPIView):
+class FinanceiroListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = FinanceiroSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("financeiro", "clientes")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["status", "tipo", "cliente"]
+    ordering = ("data_vencimento", "id")
 
     def get_queryset(self):
-        return Financeiro.objects.filter(usuario=self.request.user, ativo=True).order_by("data_vencimento")
+        return (
+            Financeiro.objects.filter(usuario=self.request.user, ativo=True)
+            .select_related("cliente")
+            .order_by(*self.ordering)
+        )
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
@@ -30,13 +44,15 @@ class FinanceiroListCreateView(generics.ListCreateAPIView):
         return super().get_serializer_class()
 
 
-class FinanceiroDetailView(generics.RetrieveUpdateDestroyAPIView):
+class FinanceiroDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = FinanceiroSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("financeiro", "clientes")
     queryset = Financeiro.objects.all()
 
     def get_queryset(self):
-        return Financeiro.objects.filter(usuario=self.request.user)
+        return Financeiro.objects.filter(usuario=self.request.user).select_related("cliente")
 
     def get_serializer_class(self):
         if self.request.method in ["PUT", "PATCH"]:
@@ -48,6 +64,22 @@ class FinanceiroDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.save()
 
 
+class FinanceiroBulkView(BulkWriteView):
+    model = Financeiro
+    item_serializer_class = FinanceiroBulkSerializer
+    serializer_class = FinanceiroSerializer
+    related = {"cliente": Cliente, "agendamento": Agendamento}
+    select_related = ("cliente",)
+    version_resources = ("financeiro",)
+
+    def snapshot(self, obj):
+        return snapshot(obj)
+
+    def after_write(self, pares, created):
+        # bulk_create/bulk_update não passam por Financeiro.save: o resumo mensal é atualizado aqui
+        registrar_alteracoes([(anterior, snapshot(obj)) for anterior, obj in pares])
+
+
 @api_view(["DELETE"])
 @permission_classes([permissions.IsAuthenticated])
 def financeiro_hard_delete(request, pk):
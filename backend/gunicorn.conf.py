@@ -0,0 +1,14 @@
+# Lido automaticamente pelo gunicorn (diretório de trabalho /app).
+# SERVER_MODE=asgi troca para workers uvicorn com o mesmo número de processos,
+# mantendo a memória comparável à do modo sync.
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+if os.getenv("SERVER_MODE", "wsgi").lower() == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
@@ -1,12 +1,13 @@
 from django.contrib import admin
 
-from .models import Notificacao
+from .models import EmailOutbox, Notificacao, NotificacaoArquivada, NotificacaoOutbox
 
 
 @admin.register(Notificacao)
 class NotificacaoAdmin(admin.ModelAdmin):
     list_display = ("usuario", "tipo", "titulo", "lida", "criado_em")
     list_filter = ("tipo", "lida", "usuario")
+    list_select_related = ("usuario",)
     search_fields = ("titulo", "mensagem")
     readonly_fields = ("id", "criado_em")
     fieldsets = (
@@ -15,3 +16,32 @@ class NotificacaoAdmin(admin.ModelAdmin):
         ("Status", {"fields": ("lida",)}),
         ("Datas", {"fields": ("criado_em",)}),
     )
+
+
+@admin.register(NotificacaoOutbox)
+class NotificacaoOutboxAdmin(admin.ModelAdmin):
+    list_display = ("tipo", "usuario", "criado_em", "publicado_em")
+    list_filter = ("tipo",)
+    list_select_related = ("usuario",)
+    readonly_fields = ("id", "usuario", "tipo", "agendamento_id", "financeiro_id", "payload", "criado_em", "publicado_em")
+
+
+@admin.register(NotificacaoArquivada)
+class NotificacaoArquivadaAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "tipo", "titulo", "criado_em", "arquivado_em")
+    list_filter = ("tipo",)
+    list_select_related = ("usuario",)
+    search_fields = ("titulo", "mensagem")
+    readonly_fields = ("id", "usuario", "tipo", "titulo", "mensagem", "criado_em", "arquivado_em")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("modelo", "usuario", "tentativas", "criado_em", "enviado_em", "falhou_em")
+    list_filter = ("modelo",)
+    list_select_related = ("usuario",)
+    search_fields = ("chave",)
+    readonly_fields = (
+        "id", "chave", "modelo", "usuario", "remetente", "tentativas", "erro",
+        "criado_em", "proxima_tentativa_em", "publicado_em", "enviado_em", "falhou_em",
+    )
@@ -0,0 +1,132 @@
+"""
+Contador de notificações não lidas por usuário, no Redis.
+
+A leitura é um ``GET``; se a chave não existe (primeiro acesso, TTL vencido,
+Redis reiniciado) o valor vem de um ``COUNT`` no banco e é gravado com TTL.
+As tarefas que criam notificações somam e as views que marcam como lidas
+subtraem. Se o ``INCRBY`` criou a chave (ou a deixou negativa) o
+valor não é confiável: a chave é apagada e a próxima leitura reconta. Desvios
+por corrida entre a recontagem e uma escrita são corrigidos pela reconciliação
+periódica (``reconciliar_nao_lidas``) ou pelo TTL.
+
+Sem Redis (cache local em desenvolvimento/testes) ou com o Redis fora do ar,
+a leitura cai para o ``COUNT`` no banco e as escritas são ignoradas.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from config.throttling import get_redis_client
+
+from .models import Notificacao
+
+logger = logging.getLogger("notificacoes")
+
+
+def contador_key(usuario_id):
+    return cache.make_key(f"notificacoes:nao_lidas:{usuario_id}")
+
+
+def contar_no_banco(usuario_id):
+    return Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()
+
+
+def obter(usuario_id):
+    client = get_redis_client()
+    if client is None:
+        return contar_no_banco(usuario_id)
+    key = contador_key(usuario_id)
+    try:
+        valor = client.get(key)
+    except Exception:
+        logger.warning("contador_redis_indisponivel", exc_info=True)
+        return contar_no_banco(usuario_id)
+    if valor is not None:
+        return int(valor)
+    total = contar_no_banco(usuario_id)
+    try:
+        client.set(key, total, ex=settings.NOTIFICACAO_CONTADOR_TTL)
+    except Exception:
+        logger.warning("contador_redis_indisponivel", exc_info=True)
+    return total
+
+
+def disponivel():
+    return get_redis_client() is not None
+
+
+def ajustar(deltas):
+    """
+    Soma ``{usuario_id: delta}`` aos contadores quando a transação atual fizer
+    commit (como ``config.conditional.touch``), num único pipeline.
+    """
+    deltas = {usuario_id: delta for usuario_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _aplicar(deltas))
+
+
+def _aplicar(deltas):
+    client = get_redis_client()
+    if client is None:
+        return
+    keys = {usuario_id: contador_key(usuario_id) for usuario_id in deltas}
+    try:
+        # MULTI/EXEC: o GET anterior ao INCRBY diz se a chave já existia
+        pipe = client.pipeline(transaction=True)
+        for usuario_id, delta in deltas.items():
+            pipe.get(keys[usuario_id])
+            pipe.incr(keys[usuario_id], delta)
+        resultados = pipe.execute()
+        # Chave criada agora pelo INCRBY (ou negativa): descarta para recontar na próxima leitura
+        invalidas = [
+            keys[usuario_id]
+            for usuario_id, anterior, valor in zip(deltas, resultados[::2], resultados[1::2])
+            if anterior is None or valor < 0
+        ]
+        if invalidas:
+            client.delete(*invalidas)
+    except Exception:
+        logger.warning("contador_redis_indisponivel", exc_info=True)
+
+
+def incrementar_por_notificacoes(notificacoes):
+    ajustar(Counter(n.usuario_id for n in notificacoes if not n.lida))
+
+
+def reconciliar(usuario_ids):
+    """
+    Corrige, para os usuários dados, os contadores presentes no Redis que
+    divergem do banco. Devolve quantos foram corrigidos.
+    """
+    client = get_redis_client()
+    usuario_ids = list(usuario_ids)
+    if client is None or not usuario_ids:
+        return 0
+    keys = [contador_key(usuario_id) for usuario_id in usuario_ids]
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.get(key)
+    atuais = pipe.execute()
+    presentes = {u: (k, int(v)) for u, k, v in zip(usuario_ids, keys, atuais) if v is not None}
+    if not presentes:
+        return 0
+    no_banco = dict(
+        Notificacao.objects.filter(usuario_id__in=list(presentes), lida=False)
+        .values("usuario_id")
+        .annotate(total=Count("id"))
+        .values_list("usuario_id", "total")
+    )
+    pipe = client.pipeline(transaction=False)
+    corrigidos = 0
+    for usuario_id, (key, valor) in presentes.items():
+        total = no_banco.get(usuario_id, 0)
+        if total != valor:
+            pipe.set(key, total, ex=settings.NOTIFICACAO_CONTADOR_TTL)
+            corrigidos += 1
+    if corrigidos:
+        pipe.execute()
+    return corrigidos
@@ -0,0 +1,136 @@
+"""
+Envio assíncrono de emails transacionais.
+
+A fila guarda só o modelo e o usuário; assunto e corpo, com os links que
+carregam tokens, são montados em ``montar`` na hora do envio.
+
+``enfileirar`` grava o email em ``EmailOutbox`` na transação da requisição e,
+depois do commit, acorda o relay (``publicar_emails``): a requisição nunca fala
+com o servidor SMTP. O relay reserva os pendentes em lotes de ``EMAIL_LOTE`` e
+publica um ``enviar_emails`` por lote, que abre uma única conexão do
+``EMAIL_BACKEND`` para o lote inteiro. Falhas voltam para a fila com espera
+exponencial até ``EMAIL_MAX_TENTATIVAS``. O relay também roda pelo beat, o que
+cobre as novas tentativas e um ``delay`` perdido (broker fora do ar).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends import filebased
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import EmailOutbox
+
+logger = logging.getLogger("notificacoes")
+
+
+def enfileirar(chave, modelo, usuario, remetente=None):
+    """
+    Agenda o envio do ``modelo`` (``EmailOutbox.Modelo``) para ``usuario``.
+    ``chave`` é a chave de idempotência: se já existe um email com ela (enviado
+    ou não), nada é feito.
+    """
+    EmailOutbox.objects.bulk_create(
+        [
+            EmailOutbox(
+                chave=chave,
+                modelo=modelo,
+                usuario=usuario,
+                remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(_acordar_relay)
+
+
+def _link(caminho, usuario):
+    token = default_token_generator.make_token(usuario)
+    uidb64 = urlsafe_base64_encode(force_bytes(usuario.pk))
+    return f"{settings.FRONTEND_ORIGIN}/{caminho}/{uidb64}/{token}"
+
+
+def _verificacao_email(usuario):
+    link = _link("verify-email", usuario)
+    return "Verifique seu email", f"Use o link a seguir para verificar seu endereço de email: {link}"
+
+
+def _redefinicao_senha(usuario):
+    link = _link("reset-password", usuario)
+    return "Seu link para redefinição de senha", f"Use o link a seguir para redefinir sua senha: {link}"
+
+
+MODELOS = {
+    EmailOutbox.Modelo.VERIFICACAO_EMAIL: _verificacao_email,
+    EmailOutbox.Modelo.REDEFINICAO_SENHA: _redefinicao_senha,
+}
+
+
+def montar(email, connection=None):
+    """Mensagem de ``email`` (com ``usuario`` carregado), com tokens gerados agora."""
+    assunto, corpo = MODELOS[email.modelo](email.usuario)
+    return EmailMessage(assunto, corpo, email.remetente, [email.usuario.email], connection=connection)
+
+
+def _acordar_relay():
+    from .tasks import publicar_emails
+
+    try:
+        publicar_emails.delay()
+    except Exception:
+        # O beat publica na próxima passada
+        logger.warning("email_relay_indisponivel", exc_info=True)
+
+
+def espera(tentativas):
+    segundos = settings.EMAIL_RETRY_BASE * 2 ** (tentativas - 1)
+    return timezone.timedelta(seconds=min(segundos, settings.EMAIL_RETRY_MAXIMO))
+
+
+def enviar(emails):
+    """
+    Envia ``emails`` (com ``usuario`` carregado) por uma única conexão. Devolve
+    ``(ids enviados, {id: erro})``; se a conexão não abre, o lote inteiro falha.
+    """
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        return [], {email.id: repr(exc) for email in emails}
+    enviados, falhas = [], {}
+    try:
+        for email in emails:
+            try:
+                montar(email, connection).send()
+                enviados.append(email.id)
+            except Exception as exc:
+                falhas[email.id] = repr(exc)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("email_conexao_fechamento", exc_info=True)
+    return enviados, falhas
+
+
+class SimuladoEmailBackend(filebased.EmailBackend):
+    """
+    Substituto local do SMTP para medir vazão sem servidor: grava as mensagens
+    em ``EMAIL_FILE_PATH`` (um arquivo por conexão) e simula o custo de abrir a
+    conexão e de cada mensagem (``EMAIL_SIMULADO_LATENCIA_*``).
+    """
+
+    def open(self):
+        nova = super().open()
+        if nova:
+            time.sleep(settings.EMAIL_SIMULADO_LATENCIA_CONEXAO)
+        return nova
+
+    def write_message(self, message):
+        time.sleep(settings.EMAIL_SIMULADO_LATENCIA_MENSAGEM)
+        super().write_message(message)
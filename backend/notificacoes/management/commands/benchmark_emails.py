@@ -0,0 +1,64 @@
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from notificacoes.models import EmailOutbox
+from notificacoes.tasks import enviar_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão da fila de emails com o backend simulado (sem servidor SMTP): "
+        "uma conexão por email, como no envio síncrono, contra uma conexão por lote"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--emails", type=int, default=500)
+        parser.add_argument("--amostra", type=int, default=20, help="Emails enviados um a um na medição de referência")
+
+    def handle(self, *args, **options):
+        total = options["emails"]
+        prefixo = f"benchmark:{uuid.uuid4()}"
+        with tempfile.TemporaryDirectory() as pasta, override_settings(
+            EMAIL_BACKEND="notificacoes.emails.SimuladoEmailBackend", EMAIL_FILE_PATH=pasta
+        ):
+            amostra = options["amostra"]
+            inicio = time.perf_counter()
+            for i in range(amostra):
+                mensagem = EmailMessage("Teste", "Corpo", settings.DEFAULT_FROM_EMAIL, [f"{i}@example.com"])
+                get_connection().send_messages([mensagem])
+            por_email = amostra / (time.perf_counter() - inicio)
+
+            # Usuário descartável: os emails são montados (com token) a partir dele
+            usuario = get_user_model().objects.create_user(email=f"{prefixo.replace(':', '-')}@example.com")
+            try:
+                EmailOutbox.objects.bulk_create(
+                    [
+                        EmailOutbox(
+                            chave=f"{prefixo}:{i}",
+                            modelo=EmailOutbox.Modelo.VERIFICACAO_EMAIL,
+                            usuario=usuario,
+                            remetente=settings.DEFAULT_FROM_EMAIL,
+                        )
+                        for i in range(total)
+                    ]
+                )
+                ids = [str(pk) for pk in usuario.emails_outbox.values_list("id", flat=True)]
+                inicio = time.perf_counter()
+                enviados = 0
+                for i in range(0, len(ids), settings.EMAIL_LOTE):
+                    enviados += enviar_emails(ids[i : i + settings.EMAIL_LOTE])["enviados"]
+                por_lote = enviados / (time.perf_counter() - inicio)
+            finally:
+                usuario.delete()
+
+        self.stdout.write(
+            f"emails={total} lote={settings.EMAIL_LOTE} enviados={enviados} "
+            f"conexao_por_email={por_email:.1f}/s conexao_por_lote={por_lote:.1f}/s"
+        )
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from django_celery_beat.models import CrontabSchedule, PeriodicTask
+from django.conf import settings
+from django_celery_beat.models import CrontabSchedule, IntervalSchedule, PeriodicTask
 import json
 
 
@@ -7,7 +8,8 @@ class Command(BaseCommand):
     help = "Cria/atualiza agendamentos do Celery Beat para lembretes e vencimentos"
 
     def handle(self, *args, **options):
-        # Lembretes de agendamento (D-1) às 06:00 todos os dias
+        # Lembretes de agendamento (D-1) às 06:00 todos os dias; o coordenador
+        # divide o trabalho em NOTIFICACAO_SHARDS subtarefas paralelas
         reminder_schedule, _ = CrontabSchedule.objects.get_or_create(
             minute="0", hour="6", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
         )
@@ -15,7 +17,7 @@ class Command(BaseCommand):
             name="criar_notificacao_lembrete_agendamento",
             defaults={
                 "crontab": reminder_schedule,
-                "task": "notificacoes.tasks.criar_notificacao_lembrete_agendamento",
+                "task": "notificacoes.tasks.disparar_lembretes_agendamento",
                 "enabled": True,
                 "kwargs": json.dumps({}),
             },
@@ -29,7 +31,119 @@ class Command(BaseCommand):
             name="criar_notificacoes_vencimento",
             defaults={
                 "crontab": due_schedule,
-                "task": "notificacoes.tasks.criar_notificacoes_vencimento",
+                "task": "notificacoes.tasks.disparar_notificacoes_vencimento",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Relay da outbox de notificações a cada poucos segundos
+        outbox_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=settings.NOTIFICACAO_OUTBOX_INTERVALO, period=IntervalSchedule.SECONDS
+        )
+        PeriodicTask.objects.update_or_create(
+            name="publicar_outbox_notificacoes",
+            defaults={
+                "interval": outbox_schedule,
+                "task": "notificacoes.tasks.publicar_outbox",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Limpeza de relatórios expirados a cada hora
+        cleanup_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="15", hour="*", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="limpar_relatorios_expirados",
+            defaults={
+                "crontab": cleanup_schedule,
+                "task": "relatorios.tasks.limpar_relatorios_expirados",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Limpeza do registro de exclusões do sync delta, uma vez por dia
+        sync_cleanup_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="30", hour="3", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="limpar_registros_exclusao",
+            defaults={
+                "crontab": sync_cleanup_schedule,
+                "task": "sincronizacao.tasks.limpar_registros_exclusao",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Geocodificação de clientes criados em lote/importados, a cada hora
+        geocoding_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="45", hour="*", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="geocodificar_clientes_pendentes",
+            defaults={
+                "crontab": geocoding_schedule,
+                "task": "clientes.tasks.geocodificar_pendentes",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Reconciliação dos contadores de não lidas no Redis com o banco, a cada hora
+        contador_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="50", hour="*", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="reconciliar_nao_lidas",
+            defaults={
+                "crontab": contador_schedule,
+                "task": "notificacoes.tasks.reconciliar_nao_lidas",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Retenção das notificações lidas antigas, uma vez por dia fora do horário de uso
+        retencao_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="0", hour="4", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="arquivar_notificacoes",
+            defaults={
+                "crontab": retencao_schedule,
+                "task": "notificacoes.tasks.arquivar_notificacoes",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Relay da fila de emails (novas tentativas e publicações perdidas)
+        email_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=settings.EMAIL_FILA_INTERVALO, period=IntervalSchedule.SECONDS
+        )
+        PeriodicTask.objects.update_or_create(
+            name="publicar_emails",
+            defaults={
+                "interval": email_schedule,
+                "task": "notificacoes.tasks.publicar_emails",
+                "enabled": True,
+                "kwargs": json.dumps({}),
+            },
+        )
+
+        # Limpeza dos emails enviados/falhos da fila, uma vez por dia
+        email_cleanup_schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="15", hour="4", day_of_week="*", day_of_month="*", month_of_year="*", timezone="America/Sao_Paulo"
+        )
+        PeriodicTask.objects.update_or_create(
+            name="limpar_emails",
+            defaults={
+                "crontab": email_cleanup_schedule,
+                "task": "notificacoes.tasks.limpar_emails",
                 "enabled": True,
                 "kwargs": json.dumps({}),
             },
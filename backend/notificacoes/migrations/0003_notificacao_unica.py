@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remover_duplicadas(apps, schema_editor):
+    # Mantém a notificação mais antiga de cada (usuario, tipo, referência)
+    Notificacao = apps.get_model("notificacoes", "Notificacao")
+    for campo in ("agendamento_id", "financeiro_id"):
+        vistos = set()
+        duplicadas = []
+        linhas = (
+            Notificacao.objects.filter(**{f"{campo}__isnull": False})
+            .order_by("criado_em", "id")
+            .values_list("id", "usuario_id", "tipo", campo)
+        )
+        for pk, usuario_id, tipo, ref in linhas.iterator():
+            chave = (usuario_id, tipo, ref)
+            if chave in vistos:
+                duplicadas.append(pk)
+            else:
+                vistos.add(chave)
+        for i in range(0, len(duplicadas), 1000):
+            Notificacao.objects.filter(id__in=duplicadas[i : i + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificacoes', '0002_notificacao_notificacoe_usuario_acb676_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notificacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('agendamento_id__isnull', False)), fields=('usuario', 'tipo', 'agendamento_id'), name='notificacao_unica_por_agendamento'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('financeiro_id__isnull', False)), fields=('usuario', 'tipo', 'financeiro_id'), name='notificacao_unica_por_financeiro'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:16
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificacoes', '0003_notificacao_unica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacaoOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('agendamento_criado', 'Agendamento Criado'), ('agendamento_lembrete', 'Lembrete de Agendamento'), ('financeiro_vencimento', 'Vencimento Financeiro'), ('financeiro_vencido', 'Financeiro Vencido')], max_length=30)),
+                ('agendamento_id', models.UUIDField(blank=True, null=True)),
+                ('financeiro_id', models.UUIDField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('publicado_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes_outbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['criado_em'],
+                'indexes': [models.Index(fields=['publicado_em', 'criado_em'], name='notificacoe_publica_a9a1de_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificacoes', '0004_notificacaooutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacaoArquivada',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('agendamento_criado', 'Agendamento Criado'), ('agendamento_lembrete', 'Lembrete de Agendamento'), ('financeiro_vencimento', 'Vencimento Financeiro'), ('financeiro_vencido', 'Financeiro Vencido')], max_length=30)),
+                ('titulo', models.CharField(max_length=200)),
+                ('mensagem', models.TextField()),
+                ('criado_em', models.DateTimeField()),
+                ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(condition=models.Q(('lida', True)), fields=['criado_em', 'id'], name='notificacao_lida_retencao_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificacaoarquivada',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes_arquivadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificacaoarquivada',
+            index=models.Index(fields=['usuario', '-criado_em'], name='notificacoe_usuario_22bdac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacaoarquivada',
+            index=models.Index(fields=['criado_em'], name='notificacoe_criado__c226bc_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:07
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificacoes', '0005_retencao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('chave', models.CharField(max_length=200, unique=True)),
+                ('destinatario', models.EmailField(max_length=254)),
+                ('remetente', models.CharField(max_length=200)),
+                ('assunto', models.CharField(max_length=200)),
+                ('corpo', models.TextField()),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('proxima_tentativa_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('publicado_em', models.DateTimeField(blank=True, null=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+                ('falhou_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['criado_em'],
+                'indexes': [models.Index(condition=models.Q(('enviado_em__isnull', True), ('falhou_em__isnull', True)), fields=['proxima_tentativa_em'], name='email_outbox_pendente_idx'), models.Index(fields=['criado_em'], name='notificacoe_criado__6609d4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def descartar_pendentes(apps, schema_editor):
+    # As linhas antigas guardavam o corpo pronto (com tokens); sem modelo/usuário não há
+    # como reenviá-las, e os links de verificação/redefinição podem ser pedidos de novo
+    apps.get_model("notificacoes", "EmailOutbox").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificacoes', '0006_emailoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(descartar_pendentes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='emailoutbox',
+            name='assunto',
+        ),
+        migrations.RemoveField(
+            model_name='emailoutbox',
+            name='corpo',
+        ),
+        migrations.RemoveField(
+            model_name='emailoutbox',
+            name='destinatario',
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='modelo',
+            field=models.CharField(choices=[('verificacao_email', 'Verificação de email'), ('redefinicao_senha', 'Redefinição de senha')], default='verificacao_email', max_length=30),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='usuario',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, related_name='emails_outbox', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+    ]
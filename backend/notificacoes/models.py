@@ -27,8 +27,124 @@ class Notificacao(models.Model):
         indexes = [
             models.Index(fields=["usuario", "lida"]),
             models.Index(fields=["criado_em"]),
+            models.Index(fields=["usuario", "-criado_em", "-id"]),
+            # Varredura da retenção (lidas mais antigas primeiro) sem passar pelas não lidas
+            models.Index(fields=["criado_em", "id"], condition=models.Q(lida=True), name="notificacao_lida_retencao_idx"),
+        ]
+        constraints = [
+            # Uma notificação de cada tipo por agendamento/lançamento; as tarefas
+            # periódicas contam com isso para inserir em lote ignorando conflitos
+            models.UniqueConstraint(
+                fields=["usuario", "tipo", "agendamento_id"],
+                condition=models.Q(agendamento_id__isnull=False),
+                name="notificacao_unica_por_agendamento",
+            ),
+            models.UniqueConstraint(
+                fields=["usuario", "tipo", "financeiro_id"],
+                condition=models.Q(financeiro_id__isnull=False),
+                name="notificacao_unica_por_financeiro",
+            ),
         ]
         ordering = ["-criado_em"]
 
     def __str__(self):
         return f"{self.usuario.email} - {self.titulo}"
+
+
+class NotificacaoOutbox(models.Model):
+    """
+    Evento pendente gravado na mesma transação da alteração que o originou.
+
+    O relay periódico publica os eventos em lotes para o Celery; a linha é
+    removida quando a notificação correspondente é criada.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notificacoes_outbox")
+    tipo = models.CharField(max_length=30, choices=Notificacao.Tipo.choices)
+    agendamento_id = models.UUIDField(null=True, blank=True)
+    financeiro_id = models.UUIDField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    criado_em = models.DateTimeField(default=timezone.now)
+    publicado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["publicado_em", "criado_em"]),
+        ]
+        ordering = ["criado_em"]
+
+    def __str__(self):
+        return f"{self.tipo} ({self.usuario_id})"
+
+
+class NotificacaoArquivada(models.Model):
+    """
+    Notificação lida movida pela retenção (``arquivar_notificacoes``).
+
+    Tabela só de inserção, com as colunas necessárias para consulta/auditoria e
+    um índice por data: cresce em ordem de ``criado_em`` e pode ser particionada
+    (ou ter faixas antigas removidas) por data sem afetar ``Notificacao``.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notificacoes_arquivadas")
+    tipo = models.CharField(max_length=30, choices=Notificacao.Tipo.choices)
+    titulo = models.CharField(max_length=200)
+    mensagem = models.TextField()
+    criado_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["usuario", "-criado_em"]),
+            models.Index(fields=["criado_em"]),
+        ]
+        ordering = ["-criado_em"]
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.titulo}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Email transacional na fila (``notificacoes.emails``).
+
+    Guarda só o modelo e o usuário: assunto e corpo (com links que carregam
+    tokens de acesso) são montados na hora do envio e nunca ficam gravados.
+    ``chave`` é a chave de idempotência: enfileirar de novo a mesma chave não gera
+    outro envio. As linhas enviadas ficam até ``EMAIL_RETENCAO_DIAS`` para manter
+    a deduplicação.
+    """
+
+    class Modelo(models.TextChoices):
+        VERIFICACAO_EMAIL = "verificacao_email", "Verificação de email"
+        REDEFINICAO_SENHA = "redefinicao_senha", "Redefinição de senha"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    chave = models.CharField(max_length=200, unique=True)
+    modelo = models.CharField(max_length=30, choices=Modelo.choices)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="emails_outbox")
+    remetente = models.CharField(max_length=200)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    proxima_tentativa_em = models.DateTimeField(default=timezone.now)
+    publicado_em = models.DateTimeField(null=True, blank=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+    falhou_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Pendentes: enviado_em e falhou_em nulos, por próxima tentativa
+            models.Index(
+                fields=["proxima_tentativa_em"],
+                condition=models.Q(enviado_em__isnull=True, falhou_em__isnull=True),
+                name="email_outbox_pendente_idx",
+            ),
+            models.Index(fields=["criado_em"]),
+        ]
+        ordering = ["criado_em"]
+
+    def __str__(self):
+        return f"{self.modelo} -> {self.usuario_id}"
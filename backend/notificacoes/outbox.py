@@ -0,0 +1,40 @@
+from django.utils import timezone
+
+from .models import Notificacao, NotificacaoOutbox
+
+
+def _evento_agendamento_criado(agendamento):
+    return NotificacaoOutbox(
+        usuario_id=agendamento.usuario_id,
+        tipo=Notificacao.Tipo.AGENDAMENTO_CRIADO,
+        agendamento_id=agendamento.id,
+        payload={
+            "cliente_nome": agendamento.cliente.nome,
+            "data_hora": agendamento.data_hora.isoformat(),
+        },
+    )
+
+
+def registrar_agendamento_criado(agendamento):
+    """Grava o evento de agendamento criado; deve rodar na transação do próprio agendamento."""
+    evento = _evento_agendamento_criado(agendamento)
+    evento.save()
+    return evento
+
+
+def registrar_agendamentos_criados(agendamentos):
+    """Eventos de vários agendamentos criados em lote, num único INSERT."""
+    return NotificacaoOutbox.objects.bulk_create([_evento_agendamento_criado(a) for a in agendamentos])
+
+
+def montar_notificacao(evento):
+    if evento.tipo == Notificacao.Tipo.AGENDAMENTO_CRIADO:
+        data_hora = timezone.localtime(timezone.datetime.fromisoformat(evento.payload["data_hora"]))
+        return Notificacao(
+            usuario_id=evento.usuario_id,
+            tipo=evento.tipo,
+            agendamento_id=evento.agendamento_id,
+            titulo="Novo Agendamento Criado",
+            mensagem=f"Agendamento para {evento.payload['cliente_nome']} em {data_hora.strftime('%d/%m/%Y %H:%M')}",
+        )
+    raise ValueError(f"Tipo de evento sem tratamento: {evento.tipo}")
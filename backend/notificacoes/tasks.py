@@ -1,66 +1,410 @@
-from celery import shared_task
+import logging
+import time
+import uuid
+from datetime import date
+from itertools import chain, islice
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from .models import Notificacao
+from config.conditional import batch_touches, touch_users
+
+from . import contador, emails
+from .models import EmailOutbox, Notificacao, NotificacaoArquivada, NotificacaoOutbox
+from .outbox import montar_notificacao
+
+logger = logging.getLogger("notificacoes")
+
+# Linhas lidas e notificações inseridas por lote nas tarefas periódicas
+NOTIFICACAO_BATCH_SIZE = 1000
+
+
+def _lotes(iterable, size=NOTIFICACAO_BATCH_SIZE):
+    it = iter(iterable)
+    while lote := list(islice(it, size)):
+        yield lote
+
+
+def _criar(notificacoes):
+    """
+    ``bulk_create`` ignorando conflitos com a constraint única; devolve só as
+    notificações de fato inseridas (as ignoradas não têm o id no banco).
+    """
+    if not notificacoes:
+        return []
+    Notificacao.objects.bulk_create(notificacoes, ignore_conflicts=True)
+    inseridas = set(Notificacao.objects.filter(id__in=[n.id for n in notificacoes]).values_list("id", flat=True))
+    return [n for n in notificacoes if n.id in inseridas]
+
+
+def _inserir_em_lotes(linhas, campo_ref, montar, metricas):
+    """
+    Cria notificações a partir de ``linhas`` (dicts de ``values()``) em lotes.
+
+    Em cada lote uma única consulta descobre quais referências já foram
+    notificadas; o restante vai num ``bulk_create`` que ignora conflitos com a
+    constraint única, cobrindo execuções concorrentes da mesma tarefa.
+    """
+    for lote in _lotes(linhas):
+        metricas["lidos"] += len(lote)
+        existentes = set(
+            Notificacao.objects.filter(**{f"{campo_ref}__in": [linha["id"] for linha in lote]})
+            .values_list("usuario_id", "tipo", campo_ref)
+        )
+        novas = []
+        for linha in lote:
+            notificacao = montar(linha)
+            if (notificacao.usuario_id, notificacao.tipo, linha["id"]) in existentes:
+                metricas["ignorados"] += 1
+                continue
+            novas.append(notificacao)
+        inseridas = _criar(novas)
+        # Perdidas para uma execução concorrente entre a consulta e o insert
+        metricas["ignorados"] += len(novas) - len(inseridas)
+        # bulk_create não dispara post_save: versões do GET condicional trocadas aqui
+        touch_users((n.usuario_id for n in inseridas), "notificacoes")
+        contador.incrementar_por_notificacoes(inseridas)
+        metricas["criados"] += len(inseridas)
+    return metricas
+
+
+def _metricas():
+    return {"lidos": 0, "criados": 0, "ignorados": 0}
+
+
+def faixa_usuarios(shard, shards):
+    """
+    Faixa ``[inicio, fim)`` de ids (UUID) de usuário atendida pela fatia ``shard``.
+
+    O espaço de UUIDs é dividido em partes iguais; ids uuid4 são uniformes, então
+    as fatias ficam equilibradas. A última fatia não tem limite superior.
+    """
+    passo = (1 << 128) // shards
+    inicio = uuid.UUID(int=shard * passo)
+    fim = None if shard == shards - 1 else uuid.UUID(int=(shard + 1) * passo)
+    return inicio, fim
+
+
+def _filtrar_fatia(qs, shard, shards):
+    if shards <= 1:
+        return qs
+    inicio, fim = faixa_usuarios(shard, shards)
+    qs = qs.filter(usuario_id__gte=inicio)
+    return qs.filter(usuario_id__lt=fim) if fim is not None else qs
+
+
+def _disparar_fatias(tarefa, nome, shards, **kwargs):
+    shards = shards or settings.NOTIFICACAO_SHARDS
+    fatias = group(tarefa.s(shard=i, shards=shards, **kwargs) for i in range(shards))
+    return chord(fatias)(consolidar_metricas.s(nome))
+
+
+# Tarefas idempotentes (constraint única + ignore_conflicts) podem ser repetidas
+# sozinhas em caso de falha de banco; cada fatia é reexecutada sem afetar as demais.
+RETRY_BANCO = {"autoretry_for": (DatabaseError,), "retry_backoff": True, "max_retries": 5}
 
 
 @shared_task
-def criar_notificacao_agendamento(usuario_id, agendamento_id, cliente_nome, data_hora):
-    from accounts.models import User
-    usuario = User.objects.get(id=usuario_id)
-    Notificacao.objects.create(
-        usuario=usuario,
-        tipo=Notificacao.Tipo.AGENDAMENTO_CRIADO,
-        titulo="Novo Agendamento Criado",
-        mensagem=f"Agendamento para {cliente_nome} em {data_hora.strftime('%d/%m/%Y %H:%M')}",
-        agendamento_id=agendamento_id,
-    )
+def consolidar_metricas(resultados, nome):
+    total = _metricas()
+    for metricas in resultados:
+        for chave in total:
+            total[chave] += metricas[chave]
+    logger.info(nome, extra={**total, "shards": len(resultados)})
+    return total
 
 
 @shared_task
-def criar_notificacao_lembrete_agendamento():
-    from agendamentos.models import Agendamento
+def disparar_lembretes_agendamento(shards=None):
+    # A data é fixada aqui para que todas as fatias (e seus retries) usem o mesmo dia
     amanha = timezone.now().date() + timezone.timedelta(days=1)
-    agendamentos = Agendamento.objects.filter(
-        data_hora__date=amanha, ativo=True, status="pendente"
+    _disparar_fatias(criar_notificacao_lembrete_agendamento, "notificacoes_lembrete_agendamento", shards, dia=amanha.isoformat())
+
+
+@shared_task(**RETRY_BANCO)
+def criar_notificacao_lembrete_agendamento(shard=0, shards=1, dia=None):
+    from agendamentos.models import Agendamento
+    from agendamentos.recorrencia import ocorrencias_do_dia, series_do_dia
+
+    amanha = date.fromisoformat(dia) if dia else timezone.now().date() + timezone.timedelta(days=1)
+    agendamentos = _filtrar_fatia(
+        Agendamento.objects.filter(data_hora__date=amanha, ativo=True, status="pendente"), shard, shards
     )
-    for ag in agendamentos:
-        Notificacao.objects.get_or_create(
-            usuario=ag.usuario,
+    agendamentos = (
+        agendamentos.values("id", "usuario_id", "data_hora", "cliente__nome")
+        .order_by()
+        .iterator(chunk_size=NOTIFICACAO_BATCH_SIZE)
+    )
+    # Ocorrências de séries recorrentes que ainda não têm linha própria
+    series = _filtrar_fatia(series_do_dia(amanha), shard, shards)
+    agendamentos = chain(agendamentos, ocorrencias_do_dia(series, amanha, NOTIFICACAO_BATCH_SIZE))
+
+    def montar(ag):
+        return Notificacao(
+            usuario_id=ag["usuario_id"],
             tipo=Notificacao.Tipo.AGENDAMENTO_LEMBRETE,
-            agendamento_id=ag.id,
-            defaults={
-                "titulo": "Lembrete de Agendamento",
-                "mensagem": f"Amanhã: {ag.cliente.nome} às {ag.data_hora.strftime('%H:%M')}",
-            },
+            agendamento_id=ag["id"],
+            titulo="Lembrete de Agendamento",
+            mensagem=f"Amanhã: {ag['cliente__nome']} às {timezone.localtime(ag['data_hora']).strftime('%H:%M')}",
         )
 
+    metricas = _inserir_em_lotes(agendamentos, "agendamento_id", montar, _metricas())
+    logger.info("notificacoes_lembrete_agendamento_shard", extra={**metricas, "shard": shard, "shards": shards})
+    return metricas
+
 
 @shared_task
-def criar_notificacoes_vencimento():
-    from financeiro.models import Financeiro
+def disparar_notificacoes_vencimento(shards=None):
     hoje = timezone.now().date()
+    _disparar_fatias(criar_notificacoes_vencimento, "notificacoes_vencimento", shards, dia=hoje.isoformat())
+
+
+@shared_task(**RETRY_BANCO)
+def criar_notificacoes_vencimento(shard=0, shards=1, dia=None):
+    from financeiro.models import Financeiro
+    hoje = date.fromisoformat(dia) if dia else timezone.now().date()
     proximos_3_dias = hoje + timezone.timedelta(days=3)
-    financeiros = Financeiro.objects.filter(
-        data_vencimento__lte=proximos_3_dias,
-        data_vencimento__gte=hoje,
-        ativo=True,
-        status="pendente",
+    financeiros = _filtrar_fatia(
+        Financeiro.objects.filter(
+            data_vencimento__lte=proximos_3_dias,
+            data_vencimento__gte=hoje,
+            ativo=True,
+            status="pendente",
+        ),
+        shard,
+        shards,
     )
-    for f in financeiros:
-        tipo = (
-            Notificacao.Tipo.FINANCEIRO_VENCIDO
-            if f.data_vencimento <= hoje
-            else Notificacao.Tipo.FINANCEIRO_VENCIMENTO
+    financeiros = (
+        financeiros.values("id", "usuario_id", "valor", "data_vencimento", "cliente__nome")
+        .order_by()
+        .iterator(chunk_size=NOTIFICACAO_BATCH_SIZE)
+    )
+
+    def montar(f):
+        vencido = f["data_vencimento"] <= hoje
+        return Notificacao(
+            usuario_id=f["usuario_id"],
+            tipo=Notificacao.Tipo.FINANCEIRO_VENCIDO if vencido else Notificacao.Tipo.FINANCEIRO_VENCIMENTO,
+            financeiro_id=f["id"],
+            titulo="Financeiro Vencido" if vencido else "Vencimento Financeiro",
+            mensagem=f"{f['cliente__nome']} - R$ {f['valor']:.2f} - Vencimento: {f['data_vencimento'].strftime('%d/%m/%Y')}",
         )
-        Notificacao.objects.get_or_create(
-            usuario=f.usuario,
-            tipo=tipo,
-            financeiro_id=f.id,
-            defaults={
-                "titulo": "Vencimento Financeiro"
-                if tipo == Notificacao.Tipo.FINANCEIRO_VENCIMENTO
-                else "Financeiro Vencido",
-                "mensagem": f"{f.cliente.nome} - R$ {f.valor:.2f} - Vencimento: {f.data_vencimento.strftime('%d/%m/%Y')}",
-            },
+
+    metricas = _inserir_em_lotes(financeiros, "financeiro_id", montar, _metricas())
+    logger.info("notificacoes_vencimento_shard", extra={**metricas, "shard": shard, "shards": shards})
+    return metricas
+
+
+# Eventos da outbox por tarefa publicada e intervalo para republicar lotes perdidos
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_REPUBLICAR_APOS = timezone.timedelta(minutes=10)
+
+
+@shared_task
+def publicar_outbox():
+    """
+    Relay da outbox: reserva eventos pendentes e publica um ``processar_outbox``
+    por lote. Eventos publicados há muito tempo e ainda presentes (tarefa
+    perdida) voltam a ser publicados; o processamento é idempotente.
+    """
+    limite = timezone.now() - OUTBOX_REPUBLICAR_APOS
+    publicados = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                NotificacaoOutbox.objects.select_for_update(skip_locked=True)
+                .filter(Q(publicado_em__isnull=True) | Q(publicado_em__lt=limite))
+                .order_by("criado_em")
+                .values_list("id", flat=True)[:OUTBOX_BATCH_SIZE]
+            )
+            if not ids:
+                break
+            NotificacaoOutbox.objects.filter(id__in=ids).update(publicado_em=timezone.now())
+            lote = [str(pk) for pk in ids]
+            transaction.on_commit(lambda lote=lote: processar_outbox.delay(lote))
+        publicados += len(ids)
+        if len(ids) < OUTBOX_BATCH_SIZE:
+            break
+    if publicados:
+        logger.info("notificacoes_outbox_publicada", extra={"eventos": publicados})
+    return publicados
+
+
+@shared_task(**RETRY_BANCO)
+def processar_outbox(ids):
+    with transaction.atomic():
+        eventos = list(NotificacaoOutbox.objects.select_for_update().filter(id__in=ids))
+        inseridas = _criar([montar_notificacao(e) for e in eventos])
+        NotificacaoOutbox.objects.filter(id__in=[e.id for e in eventos]).delete()
+        touch_users((n.usuario_id for n in inseridas), "notificacoes")
+        contador.incrementar_por_notificacoes(inseridas)
+    return len(eventos)
+
+
+@shared_task
+def reconciliar_nao_lidas():
+    """
+    Corrige contra o banco os contadores de não lidas presentes no Redis
+    (``notificacoes.contador``); desvios vêm de corridas entre recontagem e
+    escrita.
+    """
+    if not contador.disponivel():
+        return 0
+    usuarios = (
+        get_user_model()
+        .objects.order_by()
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=NOTIFICACAO_BATCH_SIZE)
+    )
+    lidos = corrigidos = 0
+    try:
+        for lote in _lotes(usuarios):
+            lidos += len(lote)
+            corrigidos += contador.reconciliar(lote)
+    except Exception:
+        logger.warning("contador_redis_indisponivel", exc_info=True)
+    logger.info("notificacoes_contador_reconciliado", extra={"lidos": lidos, "corrigidos": corrigidos})
+    return corrigidos
+
+
+@shared_task(**RETRY_BANCO)
+def arquivar_notificacoes(dias=None, modo=None):
+    """
+    Retenção: notificações lidas com mais de ``dias`` vão para
+    ``NotificacaoArquivada`` (ou são excluídas, com ``modo="excluir"``).
+
+    Percorre as candidatas em ordem de ``(criado_em, id)`` pelo índice parcial
+    das lidas, em lotes de ``NOTIFICACAO_RETENCAO_LOTE``, cada lote na sua
+    própria transação curta: só as linhas do lote ficam travadas e as travadas
+    por outra transação são puladas. Para ao esgotar as candidatas ou o tempo
+    ``NOTIFICACAO_RETENCAO_TEMPO_MAXIMO``; a próxima execução continua de onde
+    parou. Não lidas não são tocadas, então o contador não muda.
+    """
+    dias = dias or settings.NOTIFICACAO_RETENCAO_DIAS
+    modo = modo or settings.NOTIFICACAO_RETENCAO_MODO
+    tamanho = settings.NOTIFICACAO_RETENCAO_LOTE
+    limite = timezone.now() - timezone.timedelta(days=dias)
+    inicio = time.monotonic()
+    prazo = inicio + settings.NOTIFICACAO_RETENCAO_TEMPO_MAXIMO
+    processados = lotes = 0
+    cursor = None
+    while time.monotonic() < prazo:
+        candidatas = Notificacao.objects.filter(lida=True, criado_em__lt=limite)
+        if cursor is not None:
+            criado_em, pk = cursor
+            candidatas = candidatas.filter(Q(criado_em__gt=criado_em) | Q(criado_em=criado_em, id__gt=pk))
+        with transaction.atomic():
+            lote = list(
+                candidatas.select_for_update(skip_locked=True)
+                .order_by("criado_em", "id")
+                .values("id", "usuario_id", "tipo", "titulo", "mensagem", "criado_em")[:tamanho]
+            )
+            if not lote:
+                break
+            if modo == "arquivar":
+                NotificacaoArquivada.objects.bulk_create(
+                    [NotificacaoArquivada(**linha) for linha in lote], ignore_conflicts=True
+                )
+            # Sem o post_delete de cada linha trocando a versão: uma troca por lote,
+            # para todos os usuários afetados
+            with batch_touches():
+                Notificacao.objects.filter(id__in=[linha["id"] for linha in lote]).delete()
+            touch_users((linha["usuario_id"] for linha in lote), "notificacoes")
+        processados += len(lote)
+        lotes += 1
+        cursor = (lote[-1]["criado_em"], lote[-1]["id"])
+        if len(lote) < tamanho:
+            break
+    duracao = time.monotonic() - inicio
+    metricas = {
+        "processados": processados,
+        "lotes": lotes,
+        "modo": modo,
+        "segundos": round(duracao, 3),
+        "linhas_por_segundo": round(processados / duracao, 1) if duracao else processados,
+    }
+    logger.info("notificacoes_retencao", extra=metricas)
+    return metricas
+
+
+# Lotes reservados e não enviados nesse prazo (tarefa perdida) voltam a ser publicados
+EMAIL_REPUBLICAR_APOS = timezone.timedelta(minutes=10)
+
+
+@shared_task
+def publicar_emails():
+    """Relay da fila de emails: reserva os pendentes vencidos e publica um ``enviar_emails`` por lote."""
+    agora = timezone.now()
+    limite = agora - EMAIL_REPUBLICAR_APOS
+    tamanho = settings.EMAIL_LOTE
+    publicados = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(enviado_em__isnull=True, falhou_em__isnull=True, proxima_tentativa_em__lte=agora)
+                .filter(Q(publicado_em__isnull=True) | Q(publicado_em__lt=limite))
+                .order_by("proxima_tentativa_em")
+                .values_list("id", flat=True)[:tamanho]
+            )
+            if not ids:
+                break
+            EmailOutbox.objects.filter(id__in=ids).update(publicado_em=agora)
+            lote = [str(pk) for pk in ids]
+            transaction.on_commit(lambda lote=lote: enviar_emails.delay(lote))
+        publicados += len(ids)
+        if len(ids) < tamanho:
+            break
+    if publicados:
+        logger.info("emails_publicados", extra={"emails": publicados})
+    return publicados
+
+
+@shared_task
+def enviar_emails(ids):
+    """
+    Envia um lote por uma única conexão. As falhas voltam para a fila com
+    ``proxima_tentativa_em`` exponencial; esgotadas as tentativas, ficam com
+    ``falhou_em``.
+    """
+    lote = list(
+        EmailOutbox.objects.filter(id__in=ids, enviado_em__isnull=True, falhou_em__isnull=True).select_related(
+            "usuario"
         )
+    )
+    if not lote:
+        return {"enviados": 0, "falhas": 0}
+    inicio = time.monotonic()
+    enviados, falhas = emails.enviar(lote)
+    agora = timezone.now()
+    EmailOutbox.objects.filter(id__in=enviados).update(enviado_em=agora, erro="")
+    com_falha = []
+    for email in lote:
+        if email.id not in falhas:
+            continue
+        email.tentativas += 1
+        email.erro = falhas[email.id]
+        email.publicado_em = None
+        if email.tentativas >= settings.EMAIL_MAX_TENTATIVAS:
+            email.falhou_em = agora
+        else:
+            email.proxima_tentativa_em = agora + emails.espera(email.tentativas)
+        com_falha.append(email)
+    EmailOutbox.objects.bulk_update(
+        com_falha, ["tentativas", "erro", "publicado_em", "falhou_em", "proxima_tentativa_em"]
+    )
+    metricas = {"enviados": len(enviados), "falhas": len(falhas)}
+    logger.info("emails_enviados", extra={**metricas, "segundos": round(time.monotonic() - inicio, 3)})
+    return metricas
+
+
+@shared_task
+def limpar_emails():
+    """Remove emails enviados ou que falharam há mais de ``EMAIL_RETENCAO_DIAS``."""
+    corte = timezone.now() - timezone.timedelta(days=settings.EMAIL_RETENCAO_DIAS)
+    removidos, _ = EmailOutbox.objects.filter(Q(enviado_em__lt=corte) | Q(falhou_em__lt=corte)).delete()
+    return removidos
@@ -1,11 +1,40 @@
+import os
+import tempfile
+from smtplib import SMTPException
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import AsyncRequestFactory, override_settings
 from django.utils import timezone
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+from config.async_views import async_get_view
+from config.celery import app as celery_app
+from config.conditional import get_versions
+from config.testing import FakeRedis
 from clientes.models import Cliente
 from agendamentos.models import Agendamento
 from financeiro.models import Financeiro
-from .models import Notificacao
-from .tasks import criar_notificacao_lembrete_agendamento, criar_notificacoes_vencimento
+from . import emails
+from .models import EmailOutbox, Notificacao, NotificacaoArquivada, NotificacaoOutbox
+from .tasks import (
+    _inserir_em_lotes,
+    _metricas,
+    arquivar_notificacoes,
+    criar_notificacao_lembrete_agendamento,
+    criar_notificacoes_vencimento,
+    enviar_emails,
+    disparar_lembretes_agendamento,
+    faixa_usuarios,
+    processar_outbox,
+    publicar_emails,
+    publicar_outbox,
+    reconciliar_nao_lidas,
+)
+from .contador import contador_key
+from .views import nao_lidas_stream_async, nao_lidas_stream_token
 
 User = get_user_model()
 
@@ -28,3 +57,362 @@ class NotificacoesTasksTests(APITestCase):
         Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=200, status="pendente", vencimento=(timezone.now() - timezone.timedelta(days=2)).date())
         criar_notificacoes_vencimento()
         self.assertTrue(Notificacao.objects.filter(usuario=self.user, tipo__in=["financeiro_vencimento", "financeiro_vencido"]).exists())
+
+
+class NotificacoesEmLoteTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="lote@example.com", password="strongpass123")
+        self.other = User.objects.create_user(email="lote2@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.cliente_other = Cliente.objects.create(usuario=self.other, nome="Cliente B")
+
+    def test_lembretes_sao_idempotentes_e_reportam_metricas(self):
+        amanha = timezone.now() + timezone.timedelta(days=1)
+        for cliente in (self.cliente, self.cliente, self.cliente_other):
+            Agendamento.objects.create(usuario=cliente.usuario, cliente=cliente, data_hora=amanha)
+
+        metricas = criar_notificacao_lembrete_agendamento()
+        self.assertEqual(metricas, {"lidos": 3, "criados": 3, "ignorados": 0})
+        self.assertEqual(Notificacao.objects.filter(usuario=self.other, tipo="agendamento_lembrete").count(), 1)
+
+        metricas = criar_notificacao_lembrete_agendamento()
+        self.assertEqual(metricas, {"lidos": 3, "criados": 0, "ignorados": 3})
+        self.assertEqual(Notificacao.objects.filter(tipo="agendamento_lembrete").count(), 3)
+
+    def test_vencimentos_em_lote_com_consultas_constantes(self):
+        hoje = timezone.now().date()
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=100, data_vencimento=hoje)
+        Financeiro.objects.create(
+            usuario=self.user, cliente=self.cliente, valor=200, data_vencimento=hoje + timezone.timedelta(days=2)
+        )
+
+        # Leitura + consulta de existentes + insert + ids inseridos, independente do número de linhas
+        with self.assertNumQueries(4):
+            metricas = criar_notificacoes_vencimento()
+        self.assertEqual(metricas["criados"], 2)
+        self.assertEqual(
+            set(Notificacao.objects.filter(usuario=self.user).values_list("tipo", flat=True)),
+            {"financeiro_vencido", "financeiro_vencimento"},
+        )
+        self.assertEqual(criar_notificacoes_vencimento()["ignorados"], 2)
+
+    def test_conflitos_ignorados_no_insert_nao_contam_como_criados(self):
+        agendamento = Agendamento.objects.create(
+            usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timezone.timedelta(days=1)
+        )
+
+        def montar(linha):
+            return Notificacao(
+                usuario_id=self.user.id, tipo="agendamento_lembrete", agendamento_id=linha["id"], titulo="t", mensagem="m"
+            )
+
+        # A mesma referência duas vezes no lote: a consulta de existentes não vê nenhuma,
+        # como numa execução concorrente, e a constraint descarta a segunda
+        with mock.patch("notificacoes.tasks.contador.incrementar_por_notificacoes") as incrementar:
+            metricas = _inserir_em_lotes([{"id": agendamento.id}] * 2, "agendamento_id", montar, _metricas())
+        self.assertEqual(metricas, {"lidos": 2, "criados": 1, "ignorados": 1})
+        self.assertEqual(len(incrementar.call_args.args[0]), 1)
+        self.assertEqual(Notificacao.objects.filter(agendamento_id=agendamento.id).count(), 1)
+
+    def test_fatias_cobrem_todos_os_usuarios_sem_sobreposicao(self):
+        amanha = timezone.now() + timezone.timedelta(days=1)
+        usuarios = [self.user, self.other] + [
+            User.objects.create_user(email=f"shard{i}@example.com", password="strongpass123") for i in range(6)
+        ]
+        for usuario in usuarios:
+            cliente = Cliente.objects.create(usuario=usuario, nome=f"Cliente {usuario.email}")
+            Agendamento.objects.create(usuario=usuario, cliente=cliente, data_hora=amanha)
+
+        dia = amanha.date().isoformat()
+        lidos = [criar_notificacao_lembrete_agendamento(shard=i, shards=4, dia=dia)["lidos"] for i in range(4)]
+        self.assertEqual(sum(lidos), len(usuarios))
+        self.assertEqual(Notificacao.objects.filter(tipo="agendamento_lembrete").count(), len(usuarios))
+
+        # Coordenador: chord executado de forma síncrona, fatias e consolidação; não duplica nada
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", celery_app.conf.task_always_eager)
+        celery_app.conf.task_always_eager = True
+        with self.assertLogs("notificacoes") as logs:
+            disparar_lembretes_agendamento(shards=3)
+        self.assertEqual(Notificacao.objects.filter(tipo="agendamento_lembrete").count(), len(usuarios))
+        consolidado = [r for r in logs.records if r.getMessage() == "notificacoes_lembrete_agendamento"]
+        self.assertEqual(len(consolidado), 1)
+        self.assertEqual(
+            (consolidado[0].shards, consolidado[0].lidos, consolidado[0].criados, consolidado[0].ignorados),
+            (3, len(usuarios), 0, len(usuarios)),
+        )
+
+        self.assertEqual(faixa_usuarios(0, 4)[0].int, 0)
+        self.assertEqual(faixa_usuarios(1, 4)[1], faixa_usuarios(2, 4)[0])
+        self.assertIsNone(faixa_usuarios(3, 4)[1])
+
+
+class NotificacaoOutboxTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="outbox@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente O")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def criar_agendamento(self, hora):
+        payload = {"cliente": str(self.cliente.id), "data_hora": f"2030-01-01T{hora:02d}:00:00Z"}
+        resp = self.client.post("/api/agendamentos/", payload, format="json")
+        self.assertEqual(resp.status_code, 201)
+
+    def test_criacao_grava_outbox_e_relay_publica_em_lote(self):
+        with mock.patch.object(processar_outbox, "delay") as delay:
+            for hora in (8, 9, 10):
+                self.criar_agendamento(hora)
+        delay.assert_not_called()
+        self.assertEqual(NotificacaoOutbox.objects.count(), 3)
+        self.assertFalse(Notificacao.objects.exists())
+
+        # Uma única tarefa para o lote inteiro
+        with mock.patch.object(processar_outbox, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(publicar_outbox(), 3)
+        delay.assert_called_once()
+        # Já publicados: o relay não republica antes do prazo
+        self.assertEqual(publicar_outbox(), 0)
+
+        processar_outbox(delay.call_args.args[0])
+        self.assertFalse(NotificacaoOutbox.objects.exists())
+        mensagens = list(Notificacao.objects.filter(tipo="agendamento_criado").values_list("mensagem", flat=True))
+        self.assertEqual(len(mensagens), 3)
+        self.assertTrue(all(m.startswith("Agendamento para Cliente O em 01/01/2030") for m in mensagens))
+
+        # Reprocessar o mesmo lote não duplica notificações
+        processar_outbox(delay.call_args.args[0])
+        self.assertEqual(Notificacao.objects.filter(tipo="agendamento_criado").count(), 3)
+
+
+class ContadorNaoLidasTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="contador@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente C")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.redis = FakeRedis()
+        patcher = mock.patch("notificacoes.contador.get_redis_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.key = contador_key(self.user.pk)
+
+    def nao_lidas(self):
+        resp = self.client.get("/api/notificacoes/nao-lidas/")
+        self.assertEqual(resp.status_code, 200)
+        return resp.data["nao_lidas"]
+
+    def test_tarefas_somam_e_marcar_como_lida_subtrai(self):
+        # Primeira leitura conta no banco e grava a chave
+        self.assertEqual(self.nao_lidas(), 0)
+        self.assertEqual(self.redis.data[self.key], 0)
+
+        amanha = timezone.now() + timezone.timedelta(days=1)
+        for hora in (1, 2):
+            Agendamento.objects.create(
+                usuario=self.user, cliente=self.cliente, data_hora=amanha + timezone.timedelta(hours=hora)
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_notificacao_lembrete_agendamento()
+        self.assertEqual(self.redis.data[self.key], 2)
+        self.assertEqual(self.nao_lidas(), 2)
+
+        notificacao = Notificacao.objects.filter(usuario=self.user).first()
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(f"/api/notificacoes/{notificacao.pk}/marcar-lida/")
+            self.assertEqual(resp.status_code, 204)
+        # Marcar de novo não subtrai outra vez
+        self.assertEqual(self.redis.data[self.key], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/notificacoes/marcar-todas-lidas/")
+        self.assertEqual(self.nao_lidas(), 0)
+
+    def test_incremento_sem_chave_descarta_e_reconta(self):
+        Notificacao.objects.create(usuario=self.user, tipo="agendamento_criado", titulo="A", mensagem="a")
+        amanha = timezone.now() + timezone.timedelta(days=1)
+        Agendamento.objects.create(usuario=self.user, cliente=self.cliente, data_hora=amanha)
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_notificacao_lembrete_agendamento()
+        # O INCRBY criaria a chave com 1; ela é descartada e a leitura reconta
+        self.assertNotIn(self.key, self.redis.data)
+        self.assertEqual(self.nao_lidas(), 2)
+
+    def test_reconciliacao_corrige_apenas_chaves_divergentes(self):
+        outro = User.objects.create_user(email="contador2@example.com", password="strongpass123")
+        Notificacao.objects.create(usuario=self.user, tipo="agendamento_criado", titulo="A", mensagem="a")
+        self.redis.set(self.key, 7)
+        self.redis.set(contador_key(outro.pk), 0)
+
+        self.assertEqual(reconciliar_nao_lidas(), 1)
+        self.assertEqual(self.redis.data[self.key], 1)
+        self.assertEqual(self.redis.data[contador_key(outro.pk)], 0)
+
+    @override_settings(NOTIFICACAO_SSE_DURACAO=0)
+    def test_stream_asgi_com_token_de_conexao(self):
+        # No modo WSGI (o dos testes) a rota não existe: o cliente fica no polling
+        self.assertEqual(self.client.get("/api/notificacoes/nao-lidas/stream/").status_code, 404)
+
+        Notificacao.objects.create(usuario=self.user, tipo="agendamento_criado", titulo="A", mensagem="a")
+        request = APIRequestFactory().post("/api/notificacoes/nao-lidas/stream/token/")
+        force_authenticate(request, user=self.user)
+        token = nao_lidas_stream_token(request).data["token"]
+
+        async def abrir(params):
+            resp = await async_get_view(nao_lidas_stream_async)(
+                AsyncRequestFactory().get("/api/notificacoes/nao-lidas/stream/", params)
+            )
+            if resp.status_code != 200:
+                return resp, None
+            return resp, b"".join([parte async for parte in resp.streaming_content]).decode()
+
+        resp, corpo = async_to_sync(abrir)({"token": token})
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertIn("retry: ", corpo)
+        self.assertIn('event: nao_lidas\ndata: {"nao_lidas": 1}\n\n', corpo)
+
+        self.assertEqual(async_to_sync(abrir)({"token": token + "x"})[0].status_code, 401)
+        self.assertEqual(async_to_sync(abrir)({})[0].status_code, 401)
+
+
+@override_settings(NOTIFICACAO_RETENCAO_DIAS=30, NOTIFICACAO_RETENCAO_LOTE=2)
+class RetencaoNotificacoesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="retencao@example.com", password="strongpass123")
+        antiga = timezone.now() - timezone.timedelta(days=40)
+        self.antigas_lidas = [
+            self.criar(f"Lida {i}", lida=True, criado_em=antiga + timezone.timedelta(minutes=i)) for i in range(3)
+        ]
+        self.antiga_nao_lida = self.criar("Não lida", lida=False, criado_em=antiga)
+        self.recente_lida = self.criar("Recente", lida=True, criado_em=timezone.now())
+
+    def criar(self, titulo, **campos):
+        return Notificacao.objects.create(usuario=self.user, tipo="agendamento_criado", titulo=titulo, mensagem="m", **campos)
+
+    def test_arquiva_lidas_antigas_em_lotes(self):
+        metricas = arquivar_notificacoes()
+        self.assertEqual((metricas["processados"], metricas["lotes"]), (3, 2))
+        self.assertIn("linhas_por_segundo", metricas)
+        self.assertEqual(
+            set(Notificacao.objects.values_list("id", flat=True)), {self.antiga_nao_lida.id, self.recente_lida.id}
+        )
+        arquivadas = NotificacaoArquivada.objects.order_by("criado_em")
+        self.assertEqual([a.titulo for a in arquivadas], ["Lida 0", "Lida 1", "Lida 2"])
+        self.assertEqual(arquivadas[0].criado_em, self.antigas_lidas[0].criado_em)
+        # Nada mais a fazer na próxima execução
+        self.assertEqual(arquivar_notificacoes()["processados"], 0)
+
+    @override_settings(NOTIFICACAO_RETENCAO_LOTE=100)
+    def test_uma_troca_de_versao_por_lote(self):
+        outro = User.objects.create_user(email="retencao2@example.com", password="strongpass123")
+        antiga = timezone.now() - timezone.timedelta(days=40)
+        for i in range(50):
+            Notificacao.objects.create(
+                usuario=outro if i % 2 else self.user, tipo="agendamento_criado", titulo=f"T{i}", mensagem="m",
+                lida=True, criado_em=antiga,
+            )
+        antes = get_versions(self.user.pk, ["notificacoes"])
+        with mock.patch("dashboard.signals.touch") as touch_por_linha:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertEqual(arquivar_notificacoes()["processados"], 53)
+        self.assertEqual(touch_por_linha.call_count, 0)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_versions(self.user.pk, ["notificacoes"]), antes)
+        self.assertEqual(Notificacao.objects.count(), 2)
+
+    def test_modo_excluir_nao_arquiva(self):
+        self.assertEqual(arquivar_notificacoes(modo="excluir")["processados"], 3)
+        self.assertEqual(Notificacao.objects.count(), 2)
+        self.assertFalse(NotificacaoArquivada.objects.exists())
+
+
+class FilaEmailsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="fila@example.com", password="strongpass123")
+
+    def publicar(self):
+        with mock.patch.object(enviar_emails, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                publicar_emails()
+        return [call.args[0] for call in delay.call_args_list]
+
+    def test_pedido_de_redefinicao_enfileira_sem_enviar_e_deduplica(self):
+        with mock.patch.object(publicar_emails, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(2):
+                    resp = self.client.post("/api/auth/password-reset/", {"email": self.user.email}, format="json")
+                    self.assertEqual(resp.status_code, 200)
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        # Nenhum campo guarda o link com o token
+        self.assertEqual(
+            list(EmailOutbox.objects.values_list("modelo", "usuario_id")),
+            [(EmailOutbox.Modelo.REDEFINICAO_SENHA, self.user.pk)],
+        )
+
+        lotes = self.publicar()
+        self.assertEqual(len(lotes), 1)
+        self.assertEqual(enviar_emails(lotes[0]), {"enviados": 1, "falhas": 0})
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertIn("/reset-password/", mail.outbox[0].body)
+        # Já enviado: nem o relay nem uma reexecução do lote reenviam
+        self.assertEqual(self.publicar(), [])
+        self.assertEqual(enviar_emails(lotes[0])["enviados"], 0)
+
+    @override_settings(EMAIL_MAX_TENTATIVAS=2)
+    def test_falha_volta_para_a_fila_com_espera_ate_desistir(self):
+        emails.enfileirar("teste:1", EmailOutbox.Modelo.VERIFICACAO_EMAIL, self.user)
+        falha = SMTPException("indisponível")
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=falha):
+            enviar_emails(self.publicar()[0])
+            email = EmailOutbox.objects.get()
+            self.assertEqual(email.tentativas, 1)
+            self.assertIsNone(email.publicado_em)
+            self.assertGreater(email.proxima_tentativa_em, timezone.now())
+            # Ainda esperando: o relay não publica antes da próxima tentativa
+            self.assertEqual(self.publicar(), [])
+
+            EmailOutbox.objects.update(proxima_tentativa_em=timezone.now())
+            enviar_emails(self.publicar()[0])
+        email.refresh_from_db()
+        self.assertEqual(email.tentativas, 2)
+        self.assertIsNotNone(email.falhou_em)
+        self.assertEqual(self.publicar(), [])
+
+    def test_lote_usa_uma_unica_conexao(self):
+        for i in range(3):
+            emails.enfileirar(f"teste:{i}", EmailOutbox.Modelo.VERIFICACAO_EMAIL, self.user)
+        with tempfile.TemporaryDirectory() as pasta, override_settings(
+            EMAIL_BACKEND="notificacoes.emails.SimuladoEmailBackend",
+            EMAIL_FILE_PATH=pasta,
+            EMAIL_SIMULADO_LATENCIA_CONEXAO=0,
+            EMAIL_SIMULADO_LATENCIA_MENSAGEM=0,
+        ):
+            self.assertEqual(enviar_emails(self.publicar()[0])["enviados"], 3)
+            # O backend de arquivo grava um arquivo por conexão
+            self.assertEqual(len(os.listdir(pasta)), 1)
+
+
+class NotificacaoListaPaginacaoTests(APITestCase):
+    def test_cursor_preserva_microssegundos(self):
+        user = User.objects.create_user(email="pagina@example.com", password="strongpass123")
+        base = timezone.now().replace(microsecond=500000)
+        # Todas no mesmo milissegundo: o cursor precisa do valor exato
+        criadas = [
+            Notificacao.objects.create(
+                usuario=user, tipo="agendamento_criado", titulo=str(i), mensagem="m",
+                criado_em=base + timezone.timedelta(microseconds=i * 100),
+            )
+            for i in range(6)
+        ]
+        client = APIClient()
+        client.force_authenticate(user=user)
+        vistos, url = [], "/api/notificacoes/?page_size=2"
+        while url:
+            resp = client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            vistos.extend(item["id"] for item in resp.data["results"])
+            url = resp.data["next"]
+        self.assertEqual(vistos, [str(n.id) for n in reversed(criadas)])
@@ -1,13 +1,28 @@
+from django.conf import settings
 from django.urls import path
 
+from config.async_views import async_get_view, async_list, read_route
+
 from .views import (
     NotificacaoListView,
     marcar_como_lida,
     marcar_todas_como_lidas,
+    nao_lidas_count,
+    nao_lidas_count_async,
+    nao_lidas_stream_async,
+    nao_lidas_stream_token,
 )
 
 urlpatterns = [
-    path("", NotificacaoListView.as_view(), name="notificacao-list"),
+    path("", read_route(NotificacaoListView.as_view(), async_list(NotificacaoListView)), name="notificacao-list"),
+    path("nao-lidas/", read_route(nao_lidas_count, nao_lidas_count_async), name="notificacao-nao-lidas"),
     path("<uuid:pk>/marcar-lida/", marcar_como_lida, name="notificacao-marcar-lida"),
     path("marcar-todas-lidas/", marcar_todas_como_lidas, name="notificacao-marcar-todas-lidas"),
 ]
+
+# Stream SSE só no modo ASGI; no WSGI a rota não existe (404) e o cliente faz polling de nao-lidas/
+if settings.SERVER_MODE == "asgi":
+    urlpatterns += [
+        path("nao-lidas/stream/", async_get_view(nao_lidas_stream_async), name="notificacao-nao-lidas-stream"),
+        path("nao-lidas/stream/token/", nao_lidas_stream_token, name="notificacao-nao-lidas-stream-token"),
+    ]
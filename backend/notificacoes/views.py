@@ -1,41 +1,142 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import exceptions, generics, permissions, status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 
+from accounts.authentication import ReadJWTAuthentication
+from config.conditional import ConditionalGetMixin, anot_modified, conditional_get, set_validators, touch
+from config.async_views import AsyncReadView, json_response, prepare_request
+
+from . import contador
 from .models import Notificacao
 from .serializers import NotificacaoSerializer
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.usuario == request.user
+        return obj.usuario_id == request.user.pk
 
 
-class NotificacaoListView(generics.ListAPIView):
+class NotificacaoListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = NotificacaoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ReadJWTAuthentication]
+    version_resources = ("notificacoes",)
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["tipo", "lida"]
+    ordering = ("-criado_em", "-id")
 
     def get_queryset(self):
-        return Notificacao.objects.filter(usuario=self.request.user).order_by("-criado_em")
+        return Notificacao.objects.filter(usuario=self.request.user).order_by(*self.ordering)
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+@conditional_get("notificacoes")
+def nao_lidas_count(request):
+    return Response({"nao_lidas": contador.obter(request.user.pk)})
+
+
+async def nao_lidas_count_async(request):
+    request = await prepare_request(request, AsyncReadView())
+    etag, last_modified, not_modified = await anot_modified(request, ("notificacoes",))
+    if not_modified is not None:
+        return not_modified
+    total = await sync_to_async(contador.obter)(request.user.pk)
+    return set_validators(json_response({"nao_lidas": total}), etag, last_modified)
+
+
+# Server-Sent Events, só no modo ASGI (no WSGI cada conexão prenderia um worker e a
+# rota não existe: o cliente fica no polling de nao-lidas/). O contador é consultado a
+# cada NOTIFICACAO_SSE_INTERVALO e enviado quando muda; a conexão dura
+# NOTIFICACAO_SSE_DURACAO e o navegador reconecta sozinho.
+HEARTBEAT_SEGUNDOS = 15
+STREAM_TOKEN_SALT = "notificacoes.nao_lidas_stream"
+
+
+def _evento(total):
+    return f"event: nao_lidas\ndata: {{\"nao_lidas\": {total}}}\n\n"
+
+
+async def _aeventos(usuario_id):
+    intervalo = settings.NOTIFICACAO_SSE_INTERVALO
+    obter = sync_to_async(contador.obter)
+    fim = time.monotonic() + settings.NOTIFICACAO_SSE_DURACAO
+    yield f"retry: {intervalo * 1000}\n\n"
+    ultimo, ultimo_envio = None, time.monotonic()
+    while True:
+        total = await obter(usuario_id)
+        if total != ultimo:
+            ultimo, ultimo_envio = total, time.monotonic()
+            yield _evento(total)
+        elif time.monotonic() - ultimo_envio >= HEARTBEAT_SEGUNDOS:
+            ultimo_envio = time.monotonic()
+            yield ": ping\n\n"
+        if time.monotonic() + intervalo >= fim:
+            return
+        await asyncio.sleep(intervalo)
 
 
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
-def marcar_como_lida(request, pk):
+def nao_lidas_stream_token(request):
+    """
+    Token curto para abrir o stream: o ``EventSource`` do navegador não envia o
+    cabeçalho ``Authorization``, então o token vai na query string
+    (``nao-lidas/stream/?token=...``). Só serve para o stream e só para conectar.
+    """
+    token = signing.dumps(str(request.user.pk), salt=STREAM_TOKEN_SALT)
+    return Response({"token": token, "expira_em": settings.NOTIFICACAO_SSE_TOKEN_TTL})
+
+
+def _usuario_do_stream_token(token):
     try:
-        notificacao = Notificacao.objects.get(id=pk, usuario=request.user)
-        notificacao.lida = True
-        notificacao.save()
-        return Response(status=status.HTTP_204_NO_CONTENT)
-    except Notificacao.DoesNotExist:
+        return signing.loads(token, salt=STREAM_TOKEN_SALT, max_age=settings.NOTIFICACAO_SSE_TOKEN_TTL)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed("Token inválido ou expirado.")
+
+
+async def nao_lidas_stream_async(request):
+    token = request.GET.get("token")
+    if token:
+        usuario_id = _usuario_do_stream_token(token)
+    else:
+        usuario_id = (await prepare_request(request, AsyncReadView())).user.pk
+    response = StreamingHttpResponse(_aeventos(usuario_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Sem buffer no nginx, para cada evento sair na hora
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def marcar_como_lida(request, pk):
+    notificacoes = Notificacao.objects.filter(id=pk, usuario=request.user)
+    # update() filtrado: só conta a notificação que ainda não estava lida
+    marcadas = notificacoes.filter(lida=False).update(lida=True)
+    if not marcadas and not notificacoes.exists():
         return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    if marcadas:
+        # update() não dispara post_save
+        touch(request.user.pk, "notificacoes")
+        contador.ajustar({request.user.pk: -marcadas})
+    return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 def marcar_todas_como_lidas(request):
-    Notificacao.objects.filter(usuario=request.user, lida=False).update(lida=True)
+    marcadas = Notificacao.objects.filter(usuario=request.user, lida=False).update(lida=True)
+    # update() não dispara post_save
+    touch(request.user.pk, "notificacoes")
+    contador.ajustar({request.user.pk: -marcadas})
     return Response(status=status.HTTP_204_NO_CONTENT)
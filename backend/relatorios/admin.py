@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import ImportacaoJob, RelatorioJob
+
+
+@admin.register(RelatorioJob)
+class RelatorioJobAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "relatorio", "status", "criado_em", "expira_em")
+    list_filter = ("relatorio", "status")
+    list_select_related = ("usuario",)
+    readonly_fields = ("id", "fingerprint", "criado_em", "concluido_em")
+
+
+@admin.register(ImportacaoJob)
+class ImportacaoJobAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "tipo", "status", "processadas", "importadas", "com_erro", "criado_em")
+    list_filter = ("tipo", "status")
+    list_select_related = ("usuario",)
+    readonly_fields = ("id", "arquivo", "erros", "criado_em", "concluido_em")
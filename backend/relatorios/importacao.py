@@ -0,0 +1,351 @@
+"""
+Importação de clientes e lançamentos a partir de CSV (opcionalmente gzip) ou
+XLSX, no mesmo layout de colunas da exportação (``CLIENTES_HEADERS`` e
+``FINANCEIRO_HEADERS``).
+
+O arquivo é lido linha a linha (``csv.reader`` sobre o stream, openpyxl em modo
+``read_only``) e processado em lotes de ``IMPORT_BATCH_SIZE``: cada lote é
+validado, gravado com ``bulk_create`` e tem o progresso do job salvo na mesma
+transação. A memória fica limitada ao lote mais o índice de clientes do
+usuário; se a tarefa for reexecutada, retoma depois da última linha gravada.
+"""
+import csv
+import gzip
+import io
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from clientes.models import Cliente
+from config.conditional import touch
+from dashboard.cache import invalidate_dashboard
+from financeiro.models import Financeiro
+from financeiro.rollup import registrar_alteracoes, snapshot
+
+from .reports import CLIENTES_HEADERS, FINANCEIRO_HEADERS
+
+IMPORT_BATCH_SIZE = 1000
+# Erros por linha guardados no job; os demais só entram na contagem
+IMPORT_MAX_ERROS = 100
+
+
+class ImportacaoInvalida(Exception):
+    """Arquivo que não pode ser importado (formato ou cabeçalho)."""
+
+
+def normalizar_nome(value):
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.casefold().split())
+
+
+def normalizar_email(value):
+    return str(value or "").strip().lower()
+
+
+def normalizar_telefone(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    # DDI do Brasil é opcional na planilha
+    if len(digits) > 11 and digits.startswith("55"):
+        digits = digits[2:]
+    return digits
+
+
+class IndiceClientes:
+    """
+    Clientes ativos do usuário em memória, por nome, email e telefone
+    normalizados. Uma linha é duplicada se o email ou o telefone já existem;
+    sem nenhum dos dois, se o nome já existe. Linhas importadas entram no
+    índice, então duplicatas dentro do próprio arquivo também são ignoradas.
+    Nomes de mais de um cliente ficam em ``ambiguos``: lançamentos não são
+    vinculados a eles.
+    """
+
+    def __init__(self, usuario_id):
+        self.por_nome = {}
+        self.ambiguos = set()
+        self.emails = set()
+        self.telefones = set()
+        clientes = Cliente.objects.filter(usuario_id=usuario_id, ativo=True).values_list(
+            "id", "nome", "email", "telefone"
+        )
+        for pk, nome, email, telefone in clientes.iterator(chunk_size=IMPORT_BATCH_SIZE):
+            self.adicionar(pk, nome, email, telefone)
+
+    def adicionar(self, pk, nome, email, telefone):
+        nome = normalizar_nome(nome)
+        if self.por_nome.setdefault(nome, pk) != pk:
+            self.ambiguos.add(nome)
+        if email := normalizar_email(email):
+            self.emails.add(email)
+        if telefone := normalizar_telefone(telefone):
+            self.telefones.add(telefone)
+
+    def duplicado(self, nome, email, telefone):
+        email, telefone = normalizar_email(email), normalizar_telefone(telefone)
+        if email or telefone:
+            return email in self.emails or telefone in self.telefones
+        return normalizar_nome(nome) in self.por_nome
+
+    def cliente_id(self, nome):
+        """Id do cliente com o nome; ``ValueError`` se não há nenhum ou há mais de um."""
+        nome = normalizar_nome(nome)
+        if nome in self.ambiguos:
+            raise ValueError("Mais de um cliente com este nome.")
+        if nome not in self.por_nome:
+            raise ValueError("Cliente não encontrado.")
+        return self.por_nome[nome]
+
+
+# Leitura
+
+
+def ler_linhas(arquivo, formato):
+    """Linhas do arquivo (cabeçalho incluído) como listas, sem carregá-lo inteiro."""
+    if formato == "xlsx":
+        yield from _linhas_xlsx(arquivo)
+        return
+    if formato == "csv.gz":
+        arquivo = gzip.GzipFile(fileobj=arquivo)
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    try:
+        primeira = texto.readline()
+    except UnicodeDecodeError:
+        raise ImportacaoInvalida("O arquivo CSV deve estar em UTF-8.")
+    # Planilhas salvas pelo Excel em português costumam usar ";"
+    delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+    try:
+        yield from csv.reader(chain([primeira], texto), delimiter=delimitador)
+    except UnicodeDecodeError:
+        raise ImportacaoInvalida("O arquivo CSV deve estar em UTF-8.")
+
+
+def _linhas_xlsx(arquivo):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception:
+        raise ImportacaoInvalida("Arquivo XLSX inválido.")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def _texto(value):
+    return str(value).strip() if value is not None else ""
+
+
+def _vazia(valores):
+    return not any(_texto(v) for v in valores)
+
+
+# Conversão de campos
+
+
+def _opcoes(choices):
+    """Valor e rótulo normalizados -> valor, para aceitar qualquer um dos dois na planilha."""
+    opcoes = {}
+    for key, label in choices:
+        opcoes[normalizar_nome(key)] = key
+        opcoes[normalizar_nome(label)] = key
+    return opcoes
+
+
+TIPOS_PISCINA = _opcoes(Cliente.TipoPiscina.choices)
+TIPOS_FINANCEIRO = _opcoes(Financeiro.Tipo.choices)
+STATUS_FINANCEIRO = _opcoes(Financeiro.Status.choices)
+
+
+def _escolha(value, opcoes, default):
+    value = normalizar_nome(value)
+    if not value:
+        return default
+    if value not in opcoes:
+        raise ValueError(f'"{value}" não é uma opção válida.')
+    return opcoes[value]
+
+
+def _decimal(value):
+    if isinstance(value, (int, float, Decimal)):
+        number = Decimal(str(value))
+    else:
+        raw = _texto(value).replace("R$", "").replace(" ", "")
+        if raw.rfind(",") > raw.rfind("."):
+            # Formato brasileiro: 1.234,56
+            raw = raw.replace(".", "").replace(",", ".")
+        else:
+            raw = raw.replace(",", "")
+        try:
+            number = Decimal(raw)
+        except InvalidOperation:
+            raise ValueError("Valor inválido.")
+    if not number.is_finite() or number < 0:
+        raise ValueError("Valor inválido.")
+    number = number.quantize(Decimal("0.01"))
+    if number >= Decimal("100000000"):
+        raise ValueError("Valor acima do permitido.")
+    return number
+
+
+def _data(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    raw = _texto(value)
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("Data inválida (use dd/mm/aaaa).")
+
+
+def _limitar(erros, campo, value, max_length):
+    if len(value) > max_length:
+        erros[campo] = f"Máximo de {max_length} caracteres."
+    return value
+
+
+def _coluna(valores, i):
+    return valores[i] if i < len(valores) else ""
+
+
+def _cliente(valores, usuario_id, indice):
+    """Cliente a gravar, ``None`` se duplicado; erros de validação em ``ValueError(dict)``."""
+    erros = {}
+    nome = _limitar(erros, "nome", _texto(_coluna(valores, 0)), 150)
+    email = normalizar_email(_coluna(valores, 1))
+    telefone = _limitar(erros, "telefone", _texto(_coluna(valores, 2)), 30)
+    endereco = _texto(_coluna(valores, 3))
+    if not nome:
+        erros["nome"] = "Obrigatório."
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            erros["email"] = "Email inválido."
+        _limitar(erros, "email", email, 254)
+    try:
+        tipo_piscina = _escolha(_coluna(valores, 4), TIPOS_PISCINA, Cliente.TipoPiscina.RESIDENCIAL)
+    except ValueError as exc:
+        erros["tipo_piscina"] = str(exc)
+    if erros:
+        raise ValueError(erros)
+
+    if indice.duplicado(nome, email, telefone):
+        return None
+    cliente = Cliente(
+        usuario_id=usuario_id, nome=nome, email=email, telefone=telefone, endereco=endereco, tipo_piscina=tipo_piscina
+    )
+    indice.adicionar(cliente.pk, nome, email, telefone)
+    return cliente
+
+
+def _financeiro(valores, usuario_id, indice):
+    erros = {}
+    try:
+        cliente_id = indice.cliente_id(_coluna(valores, 0))
+    except ValueError as exc:
+        erros["cliente"] = str(exc)
+    descricao = _limitar(erros, "descricao", _texto(_coluna(valores, 2)), 200)
+    campos = {}
+    for campo, conversor, i in (
+        ("tipo", lambda v: _escolha(v, TIPOS_FINANCEIRO, Financeiro.Tipo.SERVICO), 1),
+        ("valor", _decimal, 3),
+        ("data_vencimento", _data, 4),
+        ("status", lambda v: _escolha(v, STATUS_FINANCEIRO, Financeiro.Status.PENDENTE), 5),
+    ):
+        try:
+            campos[campo] = conversor(_coluna(valores, i))
+        except ValueError as exc:
+            erros[campo] = str(exc)
+    if erros:
+        raise ValueError(erros)
+    return Financeiro(usuario_id=usuario_id, cliente_id=cliente_id, descricao=descricao, **campos)
+
+
+# Gravação
+
+
+def _gravar_clientes(objs, usuario_id):
+    Cliente.objects.bulk_create(objs)
+    touch(usuario_id, "clientes")
+
+
+def _gravar_financeiro(objs, usuario_id):
+    Financeiro.objects.bulk_create(objs)
+    # bulk_create não passa por Financeiro.save: resumo mensal atualizado aqui
+    registrar_alteracoes([(None, snapshot(obj)) for obj in objs])
+    touch(usuario_id, "financeiro")
+
+
+IMPORTADORES = {
+    "clientes": (CLIENTES_HEADERS, _cliente, _gravar_clientes),
+    "financeiro": (FINANCEIRO_HEADERS, _financeiro, _gravar_financeiro),
+}
+
+
+def _conferir_cabecalho(cabecalho, esperado):
+    recebido = [normalizar_nome(c) for c in (cabecalho or [])]
+    while recebido and not recebido[-1]:
+        recebido.pop()
+    if recebido != [normalizar_nome(c) for c in esperado]:
+        raise ImportacaoInvalida(f"Cabeçalho inválido; esperado: {', '.join(esperado)}.")
+
+
+def importar(job, arquivo):
+    """Processa o arquivo do job em lotes, atualizando o progresso a cada lote."""
+    headers, converter, gravar = IMPORTADORES[job.tipo]
+    linhas = ler_linhas(arquivo, job.formato)
+    _conferir_cabecalho(next(linhas, None), headers)
+
+    indice = IndiceClientes(job.usuario_id)
+    # Número da linha na planilha (o cabeçalho é a linha 1); retoma após o que já foi gravado
+    numeradas = islice(enumerate(linhas, start=2), job.processadas, None)
+    while lote := list(islice(numeradas, IMPORT_BATCH_SIZE)):
+        objs = []
+        for numero, valores in lote:
+            if _vazia(valores):
+                continue
+            try:
+                obj = converter(valores, job.usuario_id, indice)
+            except ValueError as exc:
+                job.com_erro += 1
+                if len(job.erros) < IMPORT_MAX_ERROS:
+                    job.erros.append({"linha": numero, "erros": exc.args[0]})
+                continue
+            if obj is None:
+                job.duplicadas += 1
+            else:
+                objs.append(obj)
+
+        with transaction.atomic():
+            if objs:
+                gravar(objs, job.usuario_id)
+            job.processadas += len(lote)
+            job.importadas += len(objs)
+            job.save(update_fields=["processadas", "importadas", "duplicadas", "com_erro", "erros"])
+        if objs:
+            invalidate_dashboard(job.usuario_id)
+    return job
+
+
+def detectar_formato(nome):
+    nome = nome.lower()
+    if nome.endswith(".csv.gz"):
+        return "csv.gz"
+    if nome.endswith(".csv"):
+        return "csv"
+    if nome.endswith(".xlsx"):
+        return "xlsx"
+    return None
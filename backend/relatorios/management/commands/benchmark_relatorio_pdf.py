@@ -0,0 +1,69 @@
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.models import Cliente
+from financeiro.models import Financeiro
+from relatorios.pdf import render_pdf
+from relatorios.reports import REPORTS, FinanceiroTotals, financeiro_row
+
+
+class Command(BaseCommand):
+    help = "Mede tempo e crescimento do pico de memória ao renderizar o PDF financeiro com linhas sintéticas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000)
+        # O reportlab guarda as páginas até gravar o PDF, então o orçamento de memória
+        # é uma base fixa mais um custo por linha
+        parser.add_argument("--memoria-base-mb", type=float, default=16.0)
+        parser.add_argument("--max-kb-por-linha", type=float, default=1.5)
+
+    def handle(self, *args, **options):
+        total = options["rows"]
+        limite = options["memoria_base_mb"] + total * options["max_kb_por_linha"] / 1024
+        report = REPORTS["financeiro"]
+        cliente = Cliente(nome="Condomínio Residencial Exemplo", endereco="Rua das Piscinas, 123")
+        descricao = "Manutenção semanal com limpeza de filtro, aspiração e correção de pH " * 2
+
+        def linhas(totals):
+            inicio = date(2030, 1, 1)
+            for i in range(total):
+                f = Financeiro(
+                    cliente=cliente,
+                    tipo=Financeiro.Tipo.SERVICO,
+                    descricao=descricao[: 40 + i % 120],
+                    valor=Decimal("150.00") + i % 50,
+                    data_vencimento=inicio + timedelta(days=i % 365),
+                    status=Financeiro.Status.PAGO if i % 3 else Financeiro.Status.PENDENTE,
+                )
+                totals.add(f)
+                yield financeiro_row(f)
+
+        totals = FinanceiroTotals()
+        # ru_maxrss é o pico de RSS do processo (KB no Linux); medimos o quanto cresceu
+        rss_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        inicio = time.perf_counter()
+        with tempfile.TemporaryFile() as output:
+            render_pdf(
+                output,
+                report["title"],
+                report["headers"],
+                linhas(totals),
+                col_widths=report["col_widths"],
+                totals=totals,
+            )
+            tamanho = output.tell()
+        duracao = time.perf_counter() - inicio
+        pico_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_antes) / 1024
+        self.stdout.write(
+            f"linhas={total} tempo={duracao:.1f}s pico_memoria={pico_mb:.1f}MB "
+            f"limite={limite:.1f}MB kb_por_linha={pico_mb * 1024 / total:.2f} "
+            f"pdf={tamanho / (1024 * 1024):.1f}MB linhas_por_s={total / duracao:.0f}"
+        )
+        if pico_mb > limite:
+            raise CommandError(f"Pico de memória {pico_mb:.1f}MB acima do limite de {limite:.1f}MB")
+        self.stdout.write(self.style.SUCCESS("Benchmark dentro do limite de memória."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relatorios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('clientes', 'Clientes'), ('financeiro', 'Financeiro')], max_length=20)),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('csv.gz', 'CSV (gzip)'), ('xlsx', 'Excel')], max_length=10)),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255)),
+                ('arquivo', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=15)),
+                ('processadas', models.IntegerField(default=0)),
+                ('importadas', models.IntegerField(default=0)),
+                ('duplicadas', models.IntegerField(default=0)),
+                ('com_erro', models.IntegerField(default=0)),
+                ('erros', models.JSONField(blank=True, default=list)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacao_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+from accounts.models import User
+
+
+class RelatorioJob(models.Model):
+    class Relatorio(models.TextChoices):
+        CLIENTES = "clientes", "Clientes"
+        AGENDAMENTOS = "agendamentos", "Agendamentos"
+        FINANCEIRO = "financeiro", "Financeiro"
+
+    class Status(models.TextChoices):
+        PENDENTE = "pendente", "Pendente"
+        PROCESSANDO = "processando", "Processando"
+        CONCLUIDO = "concluido", "Concluído"
+        ERRO = "erro", "Erro"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="relatorio_jobs")
+    relatorio = models.CharField(max_length=20, choices=Relatorio.choices)
+    filtros = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=15, choices=Status.choices, default=Status.PENDENTE)
+    arquivo = models.CharField(max_length=255, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    expira_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["usuario", "fingerprint"]),
+            models.Index(fields=["expira_em"]),
+        ]
+        ordering = ["-criado_em"]
+
+    def __str__(self):
+        return f"{self.relatorio} ({self.status})"
+
+
+class ImportacaoJob(models.Model):
+    """Importação assíncrona de uma planilha (mesmo layout de colunas da exportação)."""
+
+    class Tipo(models.TextChoices):
+        CLIENTES = "clientes", "Clientes"
+        FINANCEIRO = "financeiro", "Financeiro"
+
+    class Formato(models.TextChoices):
+        CSV = "csv", "CSV"
+        CSV_GZ = "csv.gz", "CSV (gzip)"
+        XLSX = "xlsx", "Excel"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name="importacao_jobs")
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    formato = models.CharField(max_length=10, choices=Formato.choices)
+    nome_arquivo = models.CharField(max_length=255, blank=True)
+    arquivo = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=15, choices=RelatorioJob.Status.choices, default=RelatorioJob.Status.PENDENTE)
+    # Progresso: linhas lidas (inclui duplicadas e com erro), gravadas, ignoradas e recusadas
+    processadas = models.IntegerField(default=0)
+    importadas = models.IntegerField(default=0)
+    duplicadas = models.IntegerField(default=0)
+    com_erro = models.IntegerField(default=0)
+    # Amostra dos erros por linha: [{"linha": n, "erros": {...}}]
+    erros = models.JSONField(default=list, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(default=timezone.now)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+
+    def __str__(self):
+        return f"importação {self.tipo} ({self.status})"
@@ -0,0 +1,164 @@
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 8
+HEADER_FONT_SIZE = 9
+LEADING = 10
+CELL_PADDING = 3
+# Textos maiores são cortados para que uma única linha nunca exceda a página
+MAX_CELL_CHARS = 1500
+
+HEADER_STYLE = ParagraphStyle("header", fontName=FONT_BOLD, fontSize=HEADER_FONT_SIZE, leading=LEADING + 1)
+
+# Um único TableStyle compartilhado por todos os blocos; comandos por faixa, não por célula
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#dddddd")),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f6f6f6")]),
+    ("FONTNAME", (0, 1), (-1, -1), FONT),
+    ("FONTSIZE", (0, 1), (-1, -1), FONT_SIZE),
+    ("LEADING", (0, 1), (-1, -1), LEADING),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+    ("TOPPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#999999")),
+])
+
+
+class _LazyStory(list):
+    """
+    Lista de flowables alimentada sob demanda por um gerador.
+
+    O ``build`` do reportlab consome a lista pela frente enquanto ``len()`` for
+    positivo, então nem as linhas nem as tabelas são materializadas de uma vez.
+    As páginas já diagramadas, porém, ficam no documento até o ``build`` gravar o
+    arquivo: a memória cresce com o número de páginas (cerca de 1 KB por linha).
+    """
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def __len__(self):
+        if not super().__len__():
+            nxt = next(self._source, None)
+            if nxt is not None:
+                self.append(nxt)
+        return super().__len__()
+
+
+def _column_widths(total_width, headers, col_widths):
+    weights = col_widths or [1] * len(headers)
+    total = float(sum(weights))
+    return [total_width * w / total for w in weights]
+
+
+def _cell(text, width):
+    """Retorna (texto, altura), quebrando em linhas o que não cabe na coluna."""
+    text = "" if text is None else str(text)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[: MAX_CELL_CHARS - 1] + "…"
+    inner = width - 2 * CELL_PADDING
+    # Nenhum glifo da Helvetica é mais largo que 1em: textos curtos dispensam medição
+    if "\n" not in text and (len(text) * FONT_SIZE <= inner or stringWidth(text, FONT, FONT_SIZE) <= inner):
+        return text, LEADING + 2 * CELL_PADDING
+    lines = []
+    for part in text.splitlines() or [""]:
+        lines.extend(simpleSplit(part, FONT, FONT_SIZE, inner) or [""])
+    return "\n".join(lines), len(lines) * LEADING + 2 * CELL_PADDING
+
+
+def _page_tables(rows, headers, widths, first_page_height, page_height):
+    header_cells = []
+    header_height = 0
+    for text, width in zip(headers, widths):
+        para = Paragraph(escape(text), HEADER_STYLE)
+        _, height = para.wrap(width - 2 * CELL_PADDING, 10_000)
+        header_cells.append(para)
+        header_height = max(header_height, height + 2 * CELL_PADDING)
+
+    available = first_page_height
+    data, heights = [header_cells], [header_height]
+    used = header_height
+    for row in rows:
+        cells, row_height = [], 0
+        for text, width in zip(row, widths):
+            content, height = _cell(text, width)
+            cells.append(content)
+            row_height = max(row_height, height)
+        if used + row_height > available and len(data) > 1:
+            yield Table(data, colWidths=widths, rowHeights=heights, style=TABLE_STYLE, hAlign="LEFT")
+            yield PageBreak()
+            available = page_height
+            data, heights = [header_cells], [header_height]
+            used = header_height
+        data.append(cells)
+        heights.append(row_height)
+        used += row_height
+    if len(data) > 1:
+        yield Table(data, colWidths=widths, rowHeights=heights, style=TABLE_STYLE, hAlign="LEFT")
+
+
+def _draw_footer(title):
+    gerado_em = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    def on_page(canvas, doc):
+        canvas.saveState()
+        canvas.setFont(FONT, 7)
+        canvas.drawString(doc.leftMargin, 1 * cm, f"{title} - gerado em {gerado_em}")
+        canvas.drawRightString(doc.leftMargin + doc.width, 1 * cm, f"Página {canvas.getPageNumber()}")
+        canvas.restoreState()
+
+    return on_page
+
+
+def render_pdf(output, title: str, headers: list[str], rows, col_widths=None, totals=None):
+    """
+    Renderiza um relatório tabular a partir de um iterável de linhas.
+
+    As linhas são medidas e agrupadas em tabelas do tamanho de uma página, cada
+    uma com o cabeçalho repetido. ``totals`` (opcional) expõe ``lines()`` e é lido
+    depois que todas as linhas foram consumidas.
+    """
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        leftMargin=1.5 * cm,
+        rightMargin=1.5 * cm,
+        topMargin=1.5 * cm,
+        bottomMargin=2 * cm,
+        title=title,
+    )
+    styles = getSampleStyleSheet()
+    widths = _column_widths(doc.width, headers, col_widths)
+
+    title_para = Paragraph(escape(title), styles["Title"])
+    _, title_height = title_para.wrap(doc.width, doc.height)
+    spacer = Spacer(1, 0.3 * cm)
+    # Folga para o espaçamento que o Frame aplica entre flowables
+    first_page_height = doc.height - title_height - title_para.getSpaceAfter() - spacer.height - 12
+    page_height = doc.height - 12
+
+    def story():
+        yield title_para
+        yield spacer
+        yield from _page_tables(rows, headers, widths, first_page_height, page_height)
+        if totals is not None:
+            yield Spacer(1, 0.4 * cm)
+            for label, value in totals.lines():
+                yield Paragraph(f"<b>{escape(label)}:</b> {escape(value)}", styles["Normal"])
+
+    on_page = _draw_footer(title)
+    doc.build(_LazyStory(story()), onFirstPage=on_page, onLaterPages=on_page)
@@ -0,0 +1,181 @@
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from financeiro.models import Financeiro
+
+from .pdf import render_pdf
+
+# Linhas lidas do banco por vez; no Postgres o iterator usa cursor server-side.
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def apply_export_filters(qs, filtros, date_field, is_datetime=False):
+    inicio, fim = filtros.get("data_inicio"), filtros.get("data_fim")
+    if is_datetime:
+        if inicio:
+            qs = qs.filter(**{f"{date_field}__gte": _day_start(inicio)})
+        if fim:
+            qs = qs.filter(**{f"{date_field}__lt": _day_start(fim + timedelta(days=1))})
+    else:
+        if inicio:
+            qs = qs.filter(**{f"{date_field}__gte": inicio})
+        if fim:
+            qs = qs.filter(**{f"{date_field}__lte": fim})
+    if filtros.get("status"):
+        qs = qs.filter(status=filtros["status"])
+    return qs
+
+
+CLIENTES_HEADERS = ["Nome", "Email", "Telefone", "Endereço", "Tipo de Piscina"]
+AGENDAMENTOS_HEADERS = ["Cliente", "Data/Hora", "Status", "Observações"]
+FINANCEIRO_HEADERS = ["Cliente", "Tipo", "Descrição", "Valor", "Vencimento", "Status"]
+
+
+def cliente_row(c):
+    return [c.nome, c.email or "", c.telefone or "", c.endereco or "", c.tipo_piscina]
+
+
+def agendamento_row(a):
+    return [
+        a.cliente.nome,
+        a.data_hora.strftime("%d/%m/%Y %H:%M"),
+        a.status,
+        a.observacoes or "",
+    ]
+
+
+def financeiro_row(f):
+    return [
+        f.cliente.nome,
+        f.tipo,
+        f.descricao or "",
+        f"R$ {f.valor:.2f}",
+        f.data_vencimento.strftime("%d/%m/%Y"),
+        f.status,
+    ]
+
+
+def clientes_queryset(user, filtros):
+    qs = Cliente.objects.filter(usuario=user, ativo=True)
+    return apply_export_filters(qs, filtros, "criado_em", is_datetime=True).order_by("nome")
+
+
+def agendamentos_queryset(user, filtros):
+    qs = Agendamento.objects.filter(usuario=user, ativo=True).select_related("cliente")
+    return apply_export_filters(qs, filtros, "data_hora", is_datetime=True).order_by("data_hora")
+
+
+def financeiro_queryset(user, filtros):
+    qs = Financeiro.objects.filter(usuario=user, ativo=True).select_related("cliente")
+    return apply_export_filters(qs, filtros, "data_vencimento").order_by("data_vencimento")
+
+
+def iter_rows(qs, row_builder, totals=None):
+    for obj in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if totals is not None:
+            totals.add(obj)
+        yield row_builder(obj)
+
+
+class ReportTotals:
+    def __init__(self):
+        self.registros = 0
+
+    def add(self, obj):
+        self.registros += 1
+
+    def lines(self):
+        return [("Total de registros", str(self.registros))]
+
+
+class FinanceiroTotals(ReportTotals):
+    def __init__(self):
+        super().__init__()
+        self.valor = Decimal("0")
+        self.por_status = {}
+
+    def add(self, obj):
+        super().add(obj)
+        self.valor += obj.valor
+        self.por_status[obj.status] = self.por_status.get(obj.status, Decimal("0")) + obj.valor
+
+    def lines(self):
+        lines = super().lines()
+        lines.append(("Valor total", f"R$ {self.valor:.2f}"))
+        for st, valor in sorted(self.por_status.items()):
+            lines.append((f"Total {st}", f"R$ {valor:.2f}"))
+        return lines
+
+
+# Relatórios disponíveis; ``models`` lista as tabelas cujo conteúdo aparece no
+# relatório e entra na versão usada para reaproveitar artefatos já gerados.
+REPORTS = {
+    "clientes": {
+        "title": "Relatório de Clientes",
+        "headers": CLIENTES_HEADERS,
+        "queryset": clientes_queryset,
+        "row": cliente_row,
+        "status_choices": None,
+        "col_widths": [3, 3, 2, 4, 2],
+        "totals": ReportTotals,
+        "models": [Cliente],
+    },
+    "agendamentos": {
+        "title": "Relatório de Agendamentos",
+        "headers": AGENDAMENTOS_HEADERS,
+        "queryset": agendamentos_queryset,
+        "row": agendamento_row,
+        "status_choices": Agendamento.Status.values,
+        "col_widths": [3, 2, 2, 5],
+        "totals": ReportTotals,
+        "models": [Agendamento, Cliente],
+    },
+    "financeiro": {
+        "title": "Relatório Financeiro",
+        "headers": FINANCEIRO_HEADERS,
+        "queryset": financeiro_queryset,
+        "row": financeiro_row,
+        "status_choices": Financeiro.Status.values,
+        "col_widths": [3, 2, 4, 2, 2, 2],
+        "totals": FinanceiroTotals,
+        "models": [Financeiro, Cliente],
+    },
+}
+
+
+def data_version(user, relatorio):
+    """Contagem e último ``atualizado_em`` de cada tabela usada pelo relatório."""
+    version = []
+    for model in REPORTS[relatorio]["models"]:
+        agg = model.objects.filter(usuario=user).aggregate(total=Count("id"), ultimo=Max("atualizado_em"))
+        version.append([model._meta.label, agg["total"], agg["ultimo"]])
+    return version
+
+
+def report_fingerprint(user, relatorio, filtros):
+    payload = {
+        "usuario": str(user.pk),
+        "relatorio": relatorio,
+        "filtros": {k: v for k, v in sorted(filtros.items()) if k != "gzip"},
+        "versao": data_version(user, relatorio),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def render_report_pdf(output, relatorio, user, filtros):
+    report = REPORTS[relatorio]
+    totals = report["totals"]()
+    rows = iter_rows(report["queryset"](user, filtros), report["row"], totals)
+    render_pdf(output, report["title"], report["headers"], rows, col_widths=report["col_widths"], totals=totals)
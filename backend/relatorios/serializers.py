@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import serializers
+
+from .importacao import detectar_formato
+from .models import ImportacaoJob, RelatorioJob
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    data_inicio = serializers.DateField(required=False)
+    data_fim = serializers.DateField(required=False)
+    status = serializers.CharField(required=False)
+    gzip = serializers.BooleanField(required=False, default=False)
+
+    def __init__(self, *args, status_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.status_choices = status_choices
+
+    def validate_status(self, value):
+        if self.status_choices is None:
+            raise serializers.ValidationError("Filtro de status não disponível para este relatório.")
+        if value not in self.status_choices:
+            raise serializers.ValidationError(f'"{value}" não é um status válido.')
+        return value
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get("data_inicio"), attrs.get("data_fim")
+        if inicio and fim and inicio > fim:
+            raise serializers.ValidationError({"data_fim": "Deve ser igual ou posterior a data_inicio."})
+        return attrs
+
+
+class RelatorioJobCreateSerializer(serializers.Serializer):
+    relatorio = serializers.ChoiceField(choices=RelatorioJob.Relatorio.choices)
+
+
+class RelatorioJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RelatorioJob
+        fields = [
+            "id",
+            "relatorio",
+            "filtros",
+            "status",
+            "erro",
+            "criado_em",
+            "concluido_em",
+            "expira_em",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != RelatorioJob.Status.CONCLUIDO:
+            return None
+        url = reverse("relatorio-job-download", kwargs={"pk": obj.pk})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class ImportacaoJobCreateSerializer(serializers.Serializer):
+    tipo = serializers.ChoiceField(choices=ImportacaoJob.Tipo.choices)
+    arquivo = serializers.FileField()
+
+    def validate_arquivo(self, value):
+        if not detectar_formato(value.name):
+            raise serializers.ValidationError("Envie um arquivo .csv, .csv.gz ou .xlsx.")
+        if value.size > settings.IMPORT_MAX_UPLOAD_MB * 1024 * 1024:
+            raise serializers.ValidationError(f"Arquivo maior que {settings.IMPORT_MAX_UPLOAD_MB} MB.")
+        return value
+
+
+class ImportacaoJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportacaoJob
+        fields = [
+            "id",
+            "tipo",
+            "formato",
+            "nome_arquivo",
+            "status",
+            "processadas",
+            "importadas",
+            "duplicadas",
+            "com_erro",
+            "erros",
+            "erro",
+            "criado_em",
+            "concluido_em",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def get_artifact_storage():
+    """Armazenamento local dos arquivos de relatório gerados pelo worker."""
+    return FileSystemStorage(location=settings.REPORT_ARTIFACTS_ROOT)
+
+
+def artifact_name(job):
+    return f"{job.usuario_id}/{job.id}.pdf"
+
+
+def import_name(job):
+    return f"importacoes/{job.usuario_id}/{job.id}.{job.formato}"
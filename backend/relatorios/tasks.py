@@ -0,0 +1,112 @@
+import logging
+import os
+
+from celery import shared_task
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .importacao import ImportacaoInvalida, importar
+from .models import ImportacaoJob, RelatorioJob
+from .reports import REPORTS, render_report_pdf
+from .serializers import ExportFilterSerializer
+from .storage import artifact_name, get_artifact_storage
+
+logger = logging.getLogger("relatorios")
+
+
+@shared_task
+def gerar_relatorio_pdf(job_id):
+    job = RelatorioJob.objects.select_related("usuario").get(id=job_id)
+    if job.status == RelatorioJob.Status.CONCLUIDO:
+        return
+
+    job.status = RelatorioJob.Status.PROCESSANDO
+    job.save(update_fields=["status"])
+
+    report = REPORTS[job.relatorio]
+    storage = get_artifact_storage()
+    name = artifact_name(job)
+    path = storage.path(name)
+    try:
+        serializer = ExportFilterSerializer(data=job.filtros, status_choices=report["status_choices"])
+        serializer.is_valid(raise_exception=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        render_report_pdf(path, job.relatorio, job.usuario, serializer.validated_data)
+    except Exception as exc:
+        logger.exception("relatorio_job_failed", extra={"job_id": str(job.id)})
+        if storage.exists(name):
+            storage.delete(name)
+        job.status = RelatorioJob.Status.ERRO
+        job.erro = str(exc)
+        job.save(update_fields=["status", "erro"])
+        return
+
+    now = timezone.now()
+    job.status = RelatorioJob.Status.CONCLUIDO
+    job.arquivo = name
+    job.concluido_em = now
+    job.expira_em = now + timezone.timedelta(hours=settings.REPORT_ARTIFACT_TTL_HOURS)
+    job.save(update_fields=["status", "arquivo", "concluido_em", "expira_em"])
+
+
+@shared_task
+def limpar_relatorios_expirados():
+    storage = get_artifact_storage()
+    expirados = RelatorioJob.objects.filter(expira_em__lt=timezone.now())
+    removidos = 0
+    for job in expirados.only("id", "arquivo").iterator():
+        if job.arquivo and storage.exists(job.arquivo):
+            storage.delete(job.arquivo)
+        removidos += 1
+    expirados.delete()
+    return removidos
+
+
+# Falhas transitórias do banco: nova tentativa retoma após o último lote gravado
+RETRY_BANCO = {"autoretry_for": (DatabaseError,), "retry_backoff": True, "max_retries": 5}
+
+
+@shared_task(bind=True, acks_late=True, **RETRY_BANCO)
+def importar_planilha(self, job_id):
+    job = ImportacaoJob.objects.get(id=job_id)
+    if job.status in (RelatorioJob.Status.CONCLUIDO, RelatorioJob.Status.ERRO):
+        return
+
+    job.status = RelatorioJob.Status.PROCESSANDO
+    job.save(update_fields=["status"])
+
+    storage = get_artifact_storage()
+    try:
+        with storage.open(job.arquivo, "rb") as arquivo:
+            importar(job, arquivo)
+    except ImportacaoInvalida as exc:
+        job.status = RelatorioJob.Status.ERRO
+        job.erro = str(exc)
+    except DatabaseError as exc:
+        if self.request.retries < self.max_retries:
+            # Mantém o arquivo e o job em processamento para a nova tentativa
+            raise
+        logger.exception("importacao_job_failed", extra={"job_id": str(job.id)})
+        job.status = RelatorioJob.Status.ERRO
+        job.erro = str(exc)
+    except Exception as exc:
+        logger.exception("importacao_job_failed", extra={"job_id": str(job.id)})
+        job.status = RelatorioJob.Status.ERRO
+        job.erro = str(exc)
+    else:
+        job.status = RelatorioJob.Status.CONCLUIDO
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["status", "erro", "concluido_em"])
+    storage.delete(job.arquivo)
+    logger.info(
+        "importacao_job_done",
+        extra={
+            "job_id": str(job.id),
+            "status": job.status,
+            "processadas": job.processadas,
+            "importadas": job.importadas,
+            "duplicadas": job.duplicadas,
+            "com_erro": job.com_erro,
+        },
+    )
@@ -0,0 +1,315 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from reportlab.platypus import PageBreak, Table
+
+from clientes.models import Cliente
+from financeiro.models import Financeiro
+from financeiro.rollup import resumo_a_partir_dos_lancamentos, resumo_armazenado
+from .importacao import importar
+from .models import ImportacaoJob, RelatorioJob
+from .pdf import _page_tables, render_pdf
+from .reports import FinanceiroTotals
+from .storage import get_artifact_storage
+from .tasks import gerar_relatorio_pdf, importar_planilha, limpar_relatorios_expirados
+
+User = get_user_model()
+
+
+class RelatorioJobTests(APITestCase):
+    def setUp(self):
+        self.artifacts = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.artifacts, ignore_errors=True)
+        override = override_settings(REPORT_ARTIFACTS_ROOT=self.artifacts)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(email="owner@example.com", password="strongpass123")
+        self.other = User.objects.create_user(email="other@example.com", password="strongpass123")
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=10, data_vencimento="2030-01-01")
+        self.url = "/api/relatorios/jobs/"
+
+    def auth(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def enqueue(self, client, payload):
+        with mock.patch("relatorios.views.gerar_relatorio_pdf.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = client.post(self.url, payload, format="json")
+        for call in delay.call_args_list:
+            gerar_relatorio_pdf(*call.args)
+        return resp, delay
+
+    def test_job_lifecycle_and_cache(self):
+        c = self.auth(self.user)
+        resp, delay = self.enqueue(c, {"relatorio": "financeiro", "status": "pendente"})
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once()
+        job_id = resp.data["id"]
+
+        detail = c.get(f"{self.url}{job_id}/")
+        self.assertEqual(detail.data["status"], RelatorioJob.Status.CONCLUIDO)
+        self.assertTrue(detail.data["download_url"])
+
+        download = c.get(f"{self.url}{job_id}/download/")
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+        # Mesmo pedido sobre os mesmos dados reaproveita o artefato
+        again, delay = self.enqueue(c, {"relatorio": "financeiro", "status": "pendente"})
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["id"], job_id)
+        delay.assert_not_called()
+
+        # Dados alterados geram um novo job
+        Financeiro.objects.create(usuario=self.user, cliente=self.cliente, valor=20, data_vencimento="2030-02-01")
+        changed, _ = self.enqueue(c, {"relatorio": "financeiro", "status": "pendente"})
+        self.assertEqual(changed.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotEqual(changed.data["id"], job_id)
+
+        # Outro usuário não enxerga o job
+        self.assertEqual(self.auth(self.other).get(f"{self.url}{job_id}/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_job_pendente_so_e_reaproveitado_enquanto_recente(self):
+        c = self.auth(self.user)
+        payload = {"relatorio": "clientes"}
+        with mock.patch("relatorios.views.gerar_relatorio_pdf.delay"):
+            first = c.post(self.url, payload, format="json")
+            again = c.post(self.url, payload, format="json")
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["id"], first.data["id"])
+
+        # Worker caiu: o job ficou pendente além do limite e um novo é criado
+        RelatorioJob.objects.filter(id=first.data["id"]).update(
+            criado_em=timezone.now() - timezone.timedelta(minutes=settings.REPORT_JOB_STALE_MINUTES + 1)
+        )
+        with mock.patch("relatorios.views.gerar_relatorio_pdf.delay"):
+            retry = c.post(self.url, payload, format="json")
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotEqual(retry.data["id"], first.data["id"])
+
+    def test_invalid_request_and_expired_cleanup(self):
+        c = self.auth(self.user)
+        resp, delay = self.enqueue(c, {"relatorio": "clientes", "status": "pago"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        delay.assert_not_called()
+
+        resp, _ = self.enqueue(c, {"relatorio": "clientes"})
+        job = RelatorioJob.objects.get(id=resp.data["id"])
+        storage = get_artifact_storage()
+        self.assertTrue(storage.exists(job.arquivo))
+
+        RelatorioJob.objects.filter(id=job.id).update(expira_em=timezone.now() - timezone.timedelta(minutes=1))
+        self.assertEqual(limpar_relatorios_expirados(), 1)
+        self.assertFalse(storage.exists(job.arquivo))
+        self.assertFalse(RelatorioJob.objects.filter(id=job.id).exists())
+
+
+class PdfRenderingTests(SimpleTestCase):
+    def test_rows_are_split_into_page_tables_with_header(self):
+        headers = ["Cliente", "Observações"]
+        rows = ([f"Cliente {i}", "texto longo " * (i % 30)] for i in range(300))
+        flowables = list(_page_tables(rows, headers, [100, 200], 600, 700))
+
+        tables = [f for f in flowables if isinstance(f, Table)]
+        self.assertGreater(len(tables), 1)
+        self.assertEqual(sum(1 for f in flowables if isinstance(f, PageBreak)), len(tables) - 1)
+        for table in tables:
+            self.assertEqual(table._cellvalues[0][0].text, "Cliente")
+            self.assertLessEqual(sum(table._rowHeights), 700)
+        self.assertTrue(any("\n" in row[1] for t in tables for row in t._cellvalues[1:]))
+        self.assertEqual(sum(len(t._cellvalues) - 1 for t in tables), 300)
+
+    def test_render_pdf_from_generator_with_totals(self):
+        totals = FinanceiroTotals()
+        output = io.BytesIO()
+        render_pdf(output, "Relatório", ["A", "B"], ([str(i), "x" * 400] for i in range(200)), totals=totals)
+        self.assertTrue(output.getvalue().startswith(b"%PDF"))
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark_relatorio_pdf", rows=1000, stdout=out)
+        self.assertIn("linhas=1000", out.getvalue())
+        self.assertIn("limite=17.5MB", out.getvalue())
+
+    def test_benchmark_command_fails_above_per_row_budget(self):
+        # 100 MB de crescimento para 1000 linhas estoura 16 MB + 1.5 KB por linha
+        rusage = [mock.Mock(ru_maxrss=100_000), mock.Mock(ru_maxrss=202_400)]
+        with mock.patch(
+            "relatorios.management.commands.benchmark_relatorio_pdf.resource.getrusage", side_effect=rusage
+        ):
+            with self.assertRaises(CommandError):
+                call_command("benchmark_relatorio_pdf", rows=1000, stdout=io.StringIO())
+
+
+class ImportacaoTests(APITestCase):
+    url = "/api/relatorios/importacoes/"
+
+    def setUp(self):
+        self.artifacts = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.artifacts, ignore_errors=True)
+        override = override_settings(REPORT_ARTIFACTS_ROOT=self.artifacts)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(email="import@example.com", password="strongpass123")
+        self.existente = Cliente.objects.create(
+            usuario=self.user, nome="José da Silva", email="jose@example.com", telefone="(11) 99999-0000"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def enviar(self, tipo, nome, conteudo):
+        arquivo = SimpleUploadedFile(nome, conteudo)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(self.url, {"tipo": tipo, "arquivo": arquivo}, format="multipart")
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        return ImportacaoJob.objects.get(id=resp.data["id"])
+
+    def test_importa_clientes_csv_com_deduplicacao(self):
+        conteudo = "\n".join([
+            "Nome;Email;Telefone;Endereço;Tipo de Piscina",
+            "Ana;ana@example.com;;Rua A;comercial",
+            "JOSE DA SILVA;JOSE@example.com;;;",  # mesmo email do cliente existente
+            "Bruno;;+55 11 99999-0000;;",  # mesmo telefone do cliente existente
+            "Carla;;11 98888-7777;;Residencial",
+            "Carla Souza;;(11) 98888-7777;;",  # duplicada dentro do arquivo
+            ";;;;",
+            "Davi;email-invalido;;;piscina olímpica",
+        ]).encode("utf-8")
+        job = self.enviar("clientes", "clientes.csv", conteudo)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, RelatorioJob.Status.CONCLUIDO)
+        self.assertEqual((job.processadas, job.importadas, job.duplicadas, job.com_erro), (7, 2, 3, 1))
+        self.assertEqual(job.erros[0]["linha"], 8)
+        self.assertEqual(set(job.erros[0]["erros"]), {"email", "tipo_piscina"})
+        self.assertEqual(
+            set(Cliente.objects.filter(usuario=self.user).values_list("nome", flat=True)),
+            {"José da Silva", "Ana", "Carla"},
+        )
+        self.assertEqual(Cliente.objects.get(nome="Ana").tipo_piscina, "comercial")
+        self.assertFalse(get_artifact_storage().exists(job.arquivo))
+
+        detail = self.client.get(f"{self.url}{job.id}/")
+        self.assertEqual(detail.data["importadas"], 2)
+
+    def test_reimportar_a_propria_exportacao_nao_duplica(self):
+        exportado = b"".join(self.client.get("/api/relatorios/clientes/csv/").streaming_content)
+        job = self.enviar("clientes", "clientes.csv", exportado)
+        job.refresh_from_db()
+        self.assertEqual((job.importadas, job.duplicadas), (0, 1))
+
+    def test_importa_financeiro_xlsx_e_mantem_o_resumo(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(["Cliente", "Tipo", "Descrição", "Valor", "Vencimento", "Status"])
+        sheet.append(["jose da silva", "Serviço", "Manutenção", "R$ 1.234,56", "10/01/2030", "pendente"])
+        sheet.append(["José da Silva", "produto", "Cloro", 80.5, date(2030, 2, 1), "pago"])
+        sheet.append(["Desconhecido", "servico", "", "10", "2030-01-01", ""])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        job = self.enviar("financeiro", "financeiro.xlsx", buffer.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, RelatorioJob.Status.CONCLUIDO)
+        self.assertEqual((job.importadas, job.com_erro), (2, 1))
+        self.assertEqual(job.erros[0]["erros"], {"cliente": "Cliente não encontrado."})
+        self.assertEqual(
+            sorted(Financeiro.objects.filter(usuario=self.user).values_list("valor", flat=True)),
+            [Decimal("80.50"), Decimal("1234.56")],
+        )
+        self.assertEqual(resumo_armazenado(self.user.pk), resumo_a_partir_dos_lancamentos(self.user.pk))
+
+    def test_cabecalho_invalido_e_extensao_recusada(self):
+        job = self.enviar("clientes", "clientes.csv", b"nome,cpf\nAna,123\n")
+        job.refresh_from_db()
+        self.assertEqual(job.status, RelatorioJob.Status.ERRO)
+        self.assertIn("Cabeçalho", job.erro)
+
+        resp = self.client.post(
+            self.url, {"tipo": "clientes", "arquivo": SimpleUploadedFile("c.txt", b"x")}, format="multipart"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retoma_apos_o_ultimo_lote_gravado(self):
+        linhas = ["Nome,Email,Telefone,Endereço,Tipo de Piscina"] + [f"Cliente {i},,,," for i in range(5)]
+        job = ImportacaoJob.objects.create(usuario=self.user, tipo="clientes", formato="csv", processadas=3)
+        with mock.patch("relatorios.importacao.IMPORT_BATCH_SIZE", 2):
+            importar(job, io.BytesIO("\n".join(linhas).encode()))
+        self.assertEqual((job.processadas, job.importadas), (5, 2))
+        self.assertEqual(ImportacaoJob.objects.get(id=job.id).processadas, 5)
+        self.assertEqual(
+            set(Cliente.objects.filter(nome__startswith="Cliente ").values_list("nome", flat=True)),
+            {"Cliente 3", "Cliente 4"},
+        )
+
+    def test_erro_de_banco_mantem_o_arquivo_e_a_nova_tentativa_retoma(self):
+        linhas = ["Nome,Email,Telefone,Endereço,Tipo de Piscina"] + [f"Cliente {i},,,," for i in range(5)]
+        with mock.patch("relatorios.views.importar_planilha.delay"):
+            job = self.enviar("clientes", "clientes.csv", "\n".join(linhas).encode())
+        bulk_create = Cliente.objects.bulk_create
+        chamadas = []
+
+        def falha_no_segundo_lote(objs, *args, **kwargs):
+            chamadas.append(objs)
+            if len(chamadas) == 2:
+                raise OperationalError("database is locked")
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch("relatorios.importacao.IMPORT_BATCH_SIZE", 2), mock.patch.object(
+            Cliente.objects, "bulk_create", side_effect=falha_no_segundo_lote
+        ):
+            with self.assertRaises(OperationalError):
+                importar_planilha(str(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processadas), (RelatorioJob.Status.PROCESSANDO, 2))
+        self.assertTrue(get_artifact_storage().exists(job.arquivo))
+
+        with mock.patch("relatorios.importacao.IMPORT_BATCH_SIZE", 2):
+            importar_planilha(str(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processadas, job.importadas), (RelatorioJob.Status.CONCLUIDO, 5, 5))
+        self.assertEqual(Cliente.objects.filter(nome__startswith="Cliente ").count(), 5)
+        self.assertFalse(get_artifact_storage().exists(job.arquivo))
+
+    def test_erro_de_banco_na_ultima_tentativa_encerra_o_job(self):
+        with mock.patch("relatorios.views.importar_planilha.delay"):
+            job = self.enviar("clientes", "clientes.csv", b"Nome,Email,Telefone,Endere\xc3\xa7o,Tipo de Piscina\nAna,,,,\n")
+        with mock.patch.object(Cliente.objects, "bulk_create", side_effect=OperationalError("database is locked")):
+            importar_planilha.apply(args=[str(job.id)], retries=importar_planilha.max_retries)
+        job.refresh_from_db()
+        self.assertEqual(job.status, RelatorioJob.Status.ERRO)
+        self.assertFalse(get_artifact_storage().exists(job.arquivo))
+
+    def test_lancamento_de_nome_com_mais_de_um_cliente_e_recusado(self):
+        Cliente.objects.create(usuario=self.user, nome="Maria")
+        Cliente.objects.create(usuario=self.user, nome="MARIA", telefone="11 97777-6666")
+        conteudo = "\n".join([
+            "Cliente;Tipo;Descrição;Valor;Vencimento;Status",
+            "maria;servico;Limpeza;100;01/01/2030;pendente",
+            "José da Silva;servico;Limpeza;100;01/01/2030;pendente",
+        ]).encode("utf-8")
+        job = self.enviar("financeiro", "financeiro.csv", conteudo)
+        job.refresh_from_db()
+        self.assertEqual((job.importadas, job.com_erro), (1, 1))
+        self.assertEqual(job.erros[0], {"linha": 2, "erros": {"cliente": "Mais de um cliente com este nome."}})
+        self.assertFalse(Financeiro.objects.filter(cliente__nome__iexact="maria").exists())
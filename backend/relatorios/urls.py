@@ -7,6 +7,11 @@ from .views import (
     export_clientes_pdf,
     export_financeiro_csv,
     export_financeiro_pdf,
+    importacao_create,
+    importacao_detail,
+    relatorio_job_create,
+    relatorio_job_detail,
+    relatorio_job_download,
 )
 
 urlpatterns = [
@@ -16,4 +21,9 @@ urlpatterns = [
     path("agendamentos/pdf/", export_agendamentos_pdf, name="export-agendamentos-pdf"),
     path("financeiro/csv/", export_financeiro_csv, name="export-financeiro-csv"),
     path("financeiro/pdf/", export_financeiro_pdf, name="export-financeiro-pdf"),
+    path("jobs/", relatorio_job_create, name="relatorio-job-create"),
+    path("jobs/<uuid:pk>/", relatorio_job_detail, name="relatorio-job-detail"),
+    path("jobs/<uuid:pk>/download/", relatorio_job_download, name="relatorio-job-download"),
+    path("importacoes/", importacao_create, name="importacao-create"),
+    path("importacoes/<uuid:pk>/", importacao_detail, name="importacao-detail"),
 ]
@@ -1,50 +1,84 @@
 import csv
 import io
+import zlib
 
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
 from agendamentos.models import Agendamento
-from clientes.models import Cliente
 from financeiro.models import Financeiro
 
-
-def csv_response(filename: str, rows: list[list[str]], headers: list[str]) -> HttpResponse:
-    response = HttpResponse(content_type="text/csv")
+from .importacao import detectar_formato
+from .models import ImportacaoJob, RelatorioJob
+from .reports import (
+    AGENDAMENTOS_HEADERS,
+    CLIENTES_HEADERS,
+    FINANCEIRO_HEADERS,
+    REPORTS,
+    agendamento_row,
+    agendamentos_queryset,
+    cliente_row,
+    clientes_queryset,
+    financeiro_queryset,
+    financeiro_row,
+    iter_rows,
+    render_report_pdf,
+    report_fingerprint,
+)
+from .serializers import (
+    ExportFilterSerializer,
+    ImportacaoJobCreateSerializer,
+    ImportacaoJobSerializer,
+    RelatorioJobCreateSerializer,
+    RelatorioJobSerializer,
+)
+from .storage import get_artifact_storage, import_name
+from .tasks import gerar_relatorio_pdf, importar_planilha
+
+
+class Echo:
+    """Pseudo-buffer para o csv.writer: devolve a linha em vez de acumular."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, headers):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(filename: str, rows, headers: list[str], compress: bool = False) -> StreamingHttpResponse:
+    lines = _csv_lines(rows, headers)
+    if compress:
+        response = StreamingHttpResponse(_gzip_stream(lines), content_type="application/gzip")
+        filename = f"{filename}.gz"
+    else:
+        response = StreamingHttpResponse(lines, content_type="text/csv")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    writer = csv.writer(response)
-    writer.writerow(headers)
-    writer.writerows(rows)
     return response
 
 
-def pdf_response(filename: str, title: str, headers: list[str], rows: list[list[str]]) -> HttpResponse:
+def pdf_response(filename: str, relatorio: str, user, filtros) -> HttpResponse:
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    elements.append(Paragraph(title, styles["Title"]))
-    elements.append(Paragraph(" ", styles["Normal"]))
-
-    table = Table([headers] + rows, hAlign="LEFT")
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), "#dddddd"),
-        ("TEXTCOLOR", (0, 0), (-1, 0), (0, 0, 0)),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), "#f6f6f6"),
-        ("GRID", (0, 0), (-1, -1), 1, "#000000"),
-    ]))
-    elements.append(table)
-    doc.build(elements)
+    render_report_pdf(buffer, relatorio, user, filtros)
 
     buffer.seek(0)
     response = HttpResponse(buffer.read(), content_type="application/pdf")
@@ -52,91 +86,157 @@ def pdf_response(filename: str, title: str, headers: list[str], rows: list[list[
     return response
 
 
+def get_export_filters(request, status_choices=None):
+    serializer = ExportFilterSerializer(data=request.query_params, status_choices=status_choices)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_clientes_csv(request):
-    qs = Cliente.objects.filter(usuario=request.user, ativo=True).order_by("nome")
-    rows = [[c.nome, c.email or "", c.telefone or "", c.endereco or "", c.tipo_piscina] for c in qs]
-    headers = ["Nome", "Email", "Telefone", "Endereço", "Tipo de Piscina"]
-    return csv_response("clientes.csv", rows, headers)
+    filtros = get_export_filters(request)
+    rows = iter_rows(clientes_queryset(request.user, filtros), cliente_row)
+    return csv_response("clientes.csv", rows, CLIENTES_HEADERS, compress=filtros["gzip"])
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_clientes_pdf(request):
-    qs = Cliente.objects.filter(usuario=request.user, ativo=True).order_by("nome")
-    rows = [[c.nome, c.email or "", c.telefone or "", c.endereco or "", c.tipo_piscina] for c in qs]
-    headers = ["Nome", "Email", "Telefone", "Endereço", "Tipo de Piscina"]
-    return pdf_response("clientes.pdf", "Relatório de Clientes", headers, rows)
+    filtros = get_export_filters(request)
+    return pdf_response("clientes.pdf", "clientes", request.user, filtros)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_agendamentos_csv(request):
-    qs = Agendamento.objects.filter(usuario=request.user, ativo=True).order_by("data_hora")
-    rows = [
-        [
-            a.cliente.nome,
-            a.data_hora.strftime("%d/%m/%Y %H:%M"),
-            a.status,
-            a.observacoes or "",
-        ]
-        for a in qs
-    ]
-    headers = ["Cliente", "Data/Hora", "Status", "Observações"]
-    return csv_response("agendamentos.csv", rows, headers)
+    filtros = get_export_filters(request, Agendamento.Status.values)
+    rows = iter_rows(agendamentos_queryset(request.user, filtros), agendamento_row)
+    return csv_response("agendamentos.csv", rows, AGENDAMENTOS_HEADERS, compress=filtros["gzip"])
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_agendamentos_pdf(request):
-    qs = Agendamento.objects.filter(usuario=request.user, ativo=True).order_by("data_hora")
-    rows = [
-        [
-            a.cliente.nome,
-            a.data_hora.strftime("%d/%m/%Y %H:%M"),
-            a.status,
-            a.observacoes or "",
-        ]
-        for a in qs
-    ]
-    headers = ["Cliente", "Data/Hora", "Status", "Observações"]
-    return pdf_response("agendamentos.pdf", "Relatório de Agendamentos", headers, rows)
+    filtros = get_export_filters(request, Agendamento.Status.values)
+    return pdf_response("agendamentos.pdf", "agendamentos", request.user, filtros)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_financeiro_csv(request):
-    qs = Financeiro.objects.filter(usuario=request.user, ativo=True).order_by("data_vencimento")
-    rows = [
-        [
-            f.cliente.nome,
-            f.tipo,
-            f.descricao or "",
-            f"R$ {f.valor:.2f}",
-            f.data_vencimento.strftime("%d/%m/%Y"),
-            f.status,
-        ]
-        for f in qs
-    ]
-    headers = ["Cliente", "Tipo", "Descrição", "Valor", "Vencimento", "Status"]
-    return csv_response("financeiro.csv", rows, headers)
+    filtros = get_export_filters(request, Financeiro.Status.values)
+    rows = iter_rows(financeiro_queryset(request.user, filtros), financeiro_row)
+    return csv_response("financeiro.csv", rows, FINANCEIRO_HEADERS, compress=filtros["gzip"])
 
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def export_financeiro_pdf(request):
-    qs = Financeiro.objects.filter(usuario=request.user, ativo=True).order_by("data_vencimento")
-    rows = [
-        [
-            f.cliente.nome,
-            f.tipo,
-            f.descricao or "",
-            f"R$ {f.valor:.2f}",
-            f.data_vencimento.strftime("%d/%m/%Y"),
-            f.status,
-        ]
-        for f in qs
-    ]
-    headers = ["Cliente", "Tipo", "Descrição", "Valor", "Vencimento", "Status"]
-    return pdf_response("financeiro.pdf", "Relatório Financeiro", headers, rows)
+    filtros = get_export_filters(request, Financeiro.Status.values)
+    return pdf_response("financeiro.pdf", "financeiro", request.user, filtros)
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def relatorio_job_create(request):
+    serializer = RelatorioJobCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    relatorio = serializer.validated_data["relatorio"]
+
+    filtros_serializer = ExportFilterSerializer(
+        data=request.data, status_choices=REPORTS[relatorio]["status_choices"]
+    )
+    filtros_serializer.is_valid(raise_exception=True)
+    filtros = {k: v for k, v in filtros_serializer.data.items() if k != "gzip" and v is not None}
+    fingerprint = report_fingerprint(request.user, relatorio, filtros)
+
+    # Mesmo relatório sobre os mesmos dados: devolve o job já existente, se concluído ou
+    # ainda recente (um job parado há mais tempo provavelmente se perdeu)
+    now = timezone.now()
+    storage = get_artifact_storage()
+    existente = (
+        RelatorioJob.objects.filter(usuario=request.user, fingerprint=fingerprint, expira_em__gt=now)
+        .filter(
+            Q(status=RelatorioJob.Status.CONCLUIDO)
+            | Q(
+                status__in=[RelatorioJob.Status.PENDENTE, RelatorioJob.Status.PROCESSANDO],
+                criado_em__gt=now - timezone.timedelta(minutes=settings.REPORT_JOB_STALE_MINUTES),
+            )
+        )
+        .first()
+    )
+    if existente and (existente.status != RelatorioJob.Status.CONCLUIDO or storage.exists(existente.arquivo)):
+        data = RelatorioJobSerializer(existente, context={"request": request}).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    job = RelatorioJob.objects.create(
+        usuario=request.user,
+        relatorio=relatorio,
+        filtros=filtros,
+        fingerprint=fingerprint,
+        expira_em=now + timezone.timedelta(hours=settings.REPORT_ARTIFACT_TTL_HOURS),
+    )
+    transaction.on_commit(lambda: gerar_relatorio_pdf.delay(str(job.id)))
+    data = RelatorioJobSerializer(job, context={"request": request}).data
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def relatorio_job_detail(request, pk):
+    try:
+        job = RelatorioJob.objects.get(id=pk, usuario=request.user)
+    except RelatorioJob.DoesNotExist:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(RelatorioJobSerializer(job, context={"request": request}).data)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def relatorio_job_download(request, pk):
+    try:
+        job = RelatorioJob.objects.get(id=pk, usuario=request.user)
+    except RelatorioJob.DoesNotExist:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    storage = get_artifact_storage()
+    if job.status != RelatorioJob.Status.CONCLUIDO or not storage.exists(job.arquivo):
+        return Response({"detail": "Relatório ainda não está disponível."}, status=status.HTTP_409_CONFLICT)
+
+    return FileResponse(
+        storage.open(job.arquivo, "rb"),
+        as_attachment=True,
+        filename=f"{job.relatorio}.pdf",
+        content_type="application/pdf",
+    )
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def importacao_create(request):
+    serializer = ImportacaoJobCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    upload = serializer.validated_data["arquivo"]
+
+    job = ImportacaoJob(
+        usuario=request.user,
+        tipo=serializer.validated_data["tipo"],
+        formato=detectar_formato(upload.name),
+        nome_arquivo=upload.name[:255],
+    )
+    # O upload já está em disco (ou memória, se pequeno); a cópia é feita em blocos
+    job.arquivo = get_artifact_storage().save(import_name(job), upload)
+    job.save()
+    transaction.on_commit(lambda: importar_planilha.delay(str(job.id)))
+    return Response(ImportacaoJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def importacao_detail(request, pk):
+    try:
+        job = ImportacaoJob.objects.get(id=pk, usuario=request.user)
+    except ImportacaoJob.DoesNotExist:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ImportacaoJobSerializer(job).data)
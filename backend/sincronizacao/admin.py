@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import RegistroExclusao
+
+
+@admin.register(RegistroExclusao)
+class RegistroExclusaoAdmin(admin.ModelAdmin):
+    list_display = ("modelo", "objeto_id", "usuario_id", "excluido_em")
+    list_filter = ("modelo",)
+    search_fields = ("objeto_id", "usuario_id")
+    readonly_fields = ("id", "usuario_id", "modelo", "objeto_id", "excluido_em")
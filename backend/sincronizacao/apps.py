@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class SincronizacaoConfig(AppConfig):
+    name = "sincronizacao"
+
+    def ready(self):
+        from . import signals  # noqa: F401
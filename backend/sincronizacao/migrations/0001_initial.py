@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroExclusao',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('usuario_id', models.UUIDField()),
+                ('modelo', models.CharField(choices=[('cliente', 'Cliente'), ('agendamento', 'Agendamento'), ('financeiro', 'Financeiro')], max_length=20)),
+                ('objeto_id', models.UUIDField()),
+                ('excluido_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['excluido_em'],
+                'indexes': [models.Index(fields=['usuario_id', 'excluido_em', 'id'], name='sincronizac_usuario_1da792_idx'), models.Index(fields=['excluido_em'], name='sincronizac_excluid_254307_idx')],
+            },
+        ),
+    ]
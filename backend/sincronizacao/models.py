@@ -0,0 +1,36 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class RegistroExclusao(models.Model):
+    """
+    Exclusão física de um cliente, agendamento ou lançamento, para o sync delta.
+
+    Exclusões lógicas (``ativo=False``) já aparecem pelo ``atualizado_em`` da
+    própria linha; este registro cobre as linhas que deixaram de existir. O
+    usuário fica só como id (sem FK) para que as cascatas da remoção do próprio
+    usuário não esbarrem na constraint; a limpeza periódica remove o que expirou.
+    """
+
+    class Modelo(models.TextChoices):
+        CLIENTE = "cliente", "Cliente"
+        AGENDAMENTO = "agendamento", "Agendamento"
+        FINANCEIRO = "financeiro", "Financeiro"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario_id = models.UUIDField()
+    modelo = models.CharField(max_length=20, choices=Modelo.choices)
+    objeto_id = models.UUIDField()
+    excluido_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["usuario_id", "excluido_em", "id"]),
+            models.Index(fields=["excluido_em"]),
+        ]
+        ordering = ["excluido_em"]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id}"
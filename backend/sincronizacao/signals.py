@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from financeiro.models import Financeiro
+
+from .models import RegistroExclusao
+
+MODELOS = {
+    Cliente: RegistroExclusao.Modelo.CLIENTE,
+    Agendamento: RegistroExclusao.Modelo.AGENDAMENTO,
+    Financeiro: RegistroExclusao.Modelo.FINANCEIRO,
+}
+
+
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Agendamento)
+@receiver(post_delete, sender=Financeiro)
+def registrar_exclusao(sender, instance, **kwargs):
+    # Também disparado nas cascatas (hard delete do cliente leva agendamentos e lançamentos)
+    RegistroExclusao.objects.create(
+        usuario_id=instance.usuario_id,
+        modelo=MODELOS[sender],
+        objeto_id=instance.pk,
+    )
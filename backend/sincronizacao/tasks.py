@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RegistroExclusao
+
+
+@shared_task
+def limpar_registros_exclusao():
+    # Watermarks anteriores a este corte recebem reset (sync completo) em /api/sync/
+    corte = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    removidos, _ = RegistroExclusao.objects.filter(excluido_em__lt=corte).delete()
+    return removidos
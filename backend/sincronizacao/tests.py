@@ -0,0 +1,138 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from financeiro.models import Financeiro
+
+from .models import RegistroExclusao
+from .tasks import limpar_registros_exclusao
+from .views import encode_watermark
+
+User = get_user_model()
+
+
+@override_settings(SYNC_WATERMARK_LAG=0)
+class SyncDeltaTests(APITestCase):
+    url = "/api/sync/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="sync@example.com", password="strongpass123")
+        self.other = User.objects.create_user(email="other@example.com", password="strongpass123")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.cliente = Cliente.objects.create(usuario=self.user, nome="Cliente A")
+        self.agendamento = Agendamento.objects.create(
+            usuario=self.user, cliente=self.cliente, data_hora=timezone.now() + timedelta(days=1)
+        )
+        self.lancamento = Financeiro.objects.create(
+            usuario=self.user,
+            cliente=self.cliente,
+            valor=Decimal("100.00"),
+            data_vencimento=timezone.localdate(),
+        )
+        Cliente.objects.create(usuario=self.user, nome="Inativo", ativo=False)
+        Cliente.objects.create(usuario=self.other, nome="De outro usuário")
+
+    def sync(self, watermark=None):
+        params = {"watermark": watermark} if watermark else {}
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def ids(self, secao):
+        return {str(item["id"]) for item in secao["alterados"]}
+
+    def test_sync_completo_traz_so_linhas_ativas_do_usuario(self):
+        data = self.sync()
+        self.assertFalse(data["has_more"])
+        self.assertFalse(data["reset"])
+        self.assertEqual(self.ids(data["clientes"]), {str(self.cliente.id)})
+        self.assertEqual(self.ids(data["agendamentos"]), {str(self.agendamento.id)})
+        self.assertEqual(self.ids(data["financeiro"]), {str(self.lancamento.id)})
+        self.assertEqual(data["clientes"]["removidos"], [])
+
+    def test_sync_sem_mudancas_e_uma_consulta_por_modelo(self):
+        watermark = self.sync()["watermark"]
+        # registro de exclusões + clientes + agendamentos + financeiro
+        with self.assertNumQueries(4):
+            data = self.client.get(self.url, {"watermark": watermark}).data
+        for chave in ("clientes", "agendamentos", "financeiro"):
+            self.assertEqual(data[chave], {"alterados": [], "removidos": []})
+
+    def test_delta_com_alteracao_exclusao_logica_e_fisica(self):
+        watermark = self.sync()["watermark"]
+
+        self.cliente.nome = "Cliente A (editado)"
+        self.cliente.save()
+        self.agendamento.ativo = False
+        self.agendamento.save()
+        outro = Cliente.objects.create(usuario=self.user, nome="Cliente B")
+        lancamento_b = Financeiro.objects.create(
+            usuario=self.user, cliente=outro, valor=Decimal("50.00"), data_vencimento=timezone.localdate()
+        )
+        outro_id, lancamento_b_id = str(outro.id), str(lancamento_b.id)
+        outro.delete()  # cascata leva o lançamento junto
+
+        data = self.sync(watermark)
+        self.assertEqual(self.ids(data["clientes"]), {str(self.cliente.id)})
+        self.assertEqual(data["clientes"]["alterados"][0]["nome"], "Cliente A (editado)")
+        self.assertEqual(data["clientes"]["removidos"], [outro_id])
+        self.assertEqual(data["agendamentos"], {"alterados": [], "removidos": [str(self.agendamento.id)]})
+        self.assertEqual(data["financeiro"], {"alterados": [], "removidos": [lancamento_b_id]})
+
+        data = self.sync(data["watermark"])
+        for chave in ("clientes", "agendamentos", "financeiro"):
+            self.assertEqual(data[chave], {"alterados": [], "removidos": []})
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_paginacao_por_has_more(self):
+        esperados = {str(self.cliente.id)}
+        for i in range(4):
+            esperados.add(str(Cliente.objects.create(usuario=self.user, nome=f"Extra {i}").id))
+
+        recebidos, watermark, chamadas = set(), None, 0
+        while True:
+            data = self.sync(watermark)
+            recebidos |= self.ids(data["clientes"])
+            # Linhas inativas antigas não viram tombstone durante o sync completo
+            self.assertEqual(data["clientes"]["removidos"], [])
+            watermark, chamadas = data["watermark"], chamadas + 1
+            if not data["has_more"]:
+                break
+        self.assertEqual(recebidos, esperados)
+        self.assertEqual(chamadas, 3)
+
+    def test_watermark_invalido_ou_de_outro_usuario(self):
+        resp = self.client.get(self.url, {"watermark": "nao-e-um-watermark"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        watermark = self.sync()["watermark"]
+        outro_client = APIClient()
+        outro_client.force_authenticate(user=self.other)
+        resp = outro_client.get(self.url, {"watermark": watermark})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_watermark_anterior_a_retencao_forca_sync_completo(self):
+        antigo = (timezone.now() - timedelta(days=365)).isoformat()
+        posicoes = {chave: [antigo, None] for chave in ("clientes", "agendamentos", "financeiro", "exclusoes")}
+        data = self.sync(encode_watermark(self.user, posicoes))
+        self.assertTrue(data["reset"])
+        self.assertEqual(self.ids(data["clientes"]), {str(self.cliente.id)})
+
+    def test_limpeza_do_registro_de_exclusoes(self):
+        self.lancamento.delete()
+        RegistroExclusao.objects.create(
+            usuario_id=self.user.pk,
+            modelo=RegistroExclusao.Modelo.CLIENTE,
+            objeto_id=self.cliente.pk,
+            excluido_em=timezone.now() - timedelta(days=365),
+        )
+        self.assertEqual(limpar_registros_exclusao(), 1)
+        self.assertEqual(RegistroExclusao.objects.count(), 1)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import sync_view
+
+urlpatterns = [
+    path("", sync_view, name="sync"),
+]
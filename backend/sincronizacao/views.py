@@ -0,0 +1,153 @@
+"""
+Sync delta para clientes offline (app mobile).
+
+O cliente guarda o ``watermark`` devolvido pelo servidor e o reenvia no
+próximo ``GET /api/sync/?watermark=...``; a resposta traz só o que mudou desde
+então. Cada modelo é lido por keyset em ``(atualizado_em, id)`` a partir da
+posição gravada no watermark, usando o índice ``(usuario, atualizado_em, id)``:
+um sync sem mudanças custa uma sondagem de índice por modelo.
+
+- ``alterados``: linhas ativas criadas/alteradas;
+- ``removidos``: ids de linhas desativadas (``ativo=False``) ou excluídas
+  fisicamente (``RegistroExclusao``).
+
+O teto de cada leitura é ``agora - SYNC_WATERMARK_LAG``: uma linha cujo
+``atualizado_em`` foi carimbado antes do commit de uma transação lenta ainda
+cai acima do watermark no sync seguinte. Com ``has_more`` o cliente repete a
+chamada com o novo watermark até esvaziar.
+
+Sem watermark (ou com um mais antigo que a retenção das exclusões, quando a
+resposta vem com ``reset``) é feito um sync completo só com as linhas ativas.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import permissions
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.response import Response
+
+from accounts.authentication import ReadJWTAuthentication
+from agendamentos.models import Agendamento
+from agendamentos.serializers import AgendamentoSerializer
+from clientes.models import Cliente
+from clientes.serializers import ClienteSerializer
+from config.pagination import _keyset_filter
+from financeiro.models import Financeiro
+from financeiro.serializers import FinanceiroSerializer
+
+from .models import RegistroExclusao
+
+WATERMARK_SALT = "sincronizacao.watermark"
+
+# chave na resposta -> (modelo, serializer, select_related, valor em RegistroExclusao.modelo)
+SECOES = {
+    "clientes": (Cliente, ClienteSerializer, (), RegistroExclusao.Modelo.CLIENTE),
+    "agendamentos": (Agendamento, AgendamentoSerializer, ("cliente",), RegistroExclusao.Modelo.AGENDAMENTO),
+    "financeiro": (Financeiro, FinanceiroSerializer, ("cliente",), RegistroExclusao.Modelo.FINANCEIRO),
+}
+
+
+def encode_watermark(user, posicoes, inicio=None):
+    payload = {"u": str(user.pk), "p": posicoes}
+    if inicio is not None:
+        payload["i"] = inicio
+    return signing.dumps(payload, salt=WATERMARK_SALT, compress=True)
+
+
+def decode_watermark(user, watermark):
+    """Devolve ``(posicoes, inicio)``; watermark adulterado ou de outro usuário gera 400."""
+    try:
+        payload = signing.loads(watermark, salt=WATERMARK_SALT)
+        if payload["u"] != str(user.pk):
+            raise ValueError
+        posicoes = {}
+        for chave in (*SECOES, "exclusoes"):
+            ts, pk = payload["p"][chave]
+            momento = parse_datetime(ts)
+            if momento is None:
+                raise ValueError
+            posicoes[chave] = (momento, pk)
+        inicio = payload.get("i")
+        return posicoes, parse_datetime(inicio) if inicio else None
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise DRFValidationError({"watermark": "Watermark inválido."})
+
+
+def _ler(queryset, campo_data, posicao, ate, limite):
+    """Próximas ``limite`` linhas após ``posicao`` (``None`` = desde o início) até ``ate``."""
+    queryset = queryset.filter(**{f"{campo_data}__lte": ate}).order_by(campo_data, "id")
+    if posicao is not None:
+        momento, pk = posicao
+        if pk is None:
+            queryset = queryset.filter(**{f"{campo_data}__gt": momento})
+        else:
+            queryset = queryset.filter(_keyset_filter((campo_data, "id"), [momento, pk]))
+    linhas = list(queryset[: limite + 1])
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]
+        return linhas, [getattr(ultima, campo_data).isoformat(), str(ultima.pk)], True
+    # Sem id: no próximo sync, tudo com data estritamente maior que ``ate``
+    return linhas, [ate.isoformat(), None], False
+
+
+@api_view(["GET"])
+@authentication_classes([ReadJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def sync_view(request):
+    user = request.user
+    agora = timezone.now()
+    ate = agora - timedelta(seconds=settings.SYNC_WATERMARK_LAG)
+    limite = settings.SYNC_PAGE_SIZE
+    reset = False
+
+    watermark = request.query_params.get("watermark")
+    if watermark:
+        posicoes, inicio = decode_watermark(user, watermark)
+        # Exclusões mais antigas que a retenção já foram limpas: só um sync completo é confiável
+        retencao = agora - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if posicoes["exclusoes"][0] < retencao:
+            watermark, reset = None, True
+    if not watermark:
+        inicio = ate
+        posicoes = {chave: None for chave in SECOES}
+        posicoes["exclusoes"] = (ate, None)
+
+    data = {"reset": reset}
+    novas_posicoes = {}
+    has_more = False
+    exclusoes, novas_posicoes["exclusoes"], mais = _ler(
+        RegistroExclusao.objects.filter(usuario_id=user.pk),
+        "excluido_em",
+        posicoes["exclusoes"],
+        ate,
+        limite,
+    )
+    has_more |= mais
+    removidos_fisicos = {}
+    for registro in exclusoes:
+        removidos_fisicos.setdefault(registro.modelo, []).append(str(registro.objeto_id))
+
+    for chave, (model, serializer_class, relacionados, modelo_exclusao) in SECOES.items():
+        queryset = model.objects.filter(usuario=user).select_related(*relacionados)
+        if inicio is not None:
+            # Sync completo: as linhas inativas só interessam se mudaram depois do início
+            queryset = queryset.filter(Q(ativo=True) | Q(atualizado_em__gt=inicio))
+        linhas, novas_posicoes[chave], mais = _ler(queryset, "atualizado_em", posicoes[chave], ate, limite)
+        has_more |= mais
+        ativos = [linha for linha in linhas if linha.ativo]
+        removidos = [str(linha.pk) for linha in linhas if not linha.ativo]
+        data[chave] = {
+            "alterados": serializer_class(ativos, many=True).data,
+            "removidos": removidos + removidos_fisicos.get(modelo_exclusao, []),
+        }
+
+    # O modo "sync completo" vale até a última página ser entregue
+    data["has_more"] = has_more
+    data["watermark"] = encode_watermark(user, novas_posicoes, inicio.isoformat() if has_more and inicio else None)
+    return Response(data)
@@ -130,9 +130,44 @@ export async function initFromRefresh(): Promise<string> {
   return refreshAccessToken(csrf)
 }
 
-export async function getClientes(params?: { ativo?: boolean; tipo_piscina?: 'residencial' | 'comercial' }) {
+// Listagens paginadas por cursor: `next` é a URL absoluta da próxima página (ou null)
+export type Pagina<T> = {
+  next: string | null
+  previous: string | null
+  results: T[]
+}
+
+export async function getPagina<T>(url: string): Promise<Pagina<T>> {
+  return apiJson<Pagina<T>>(url)
+}
+
+// Segue `next` até a última página; para selects que precisam da lista completa
+export async function getTodasAsPaginas<T>(path: string): Promise<T[]> {
+  const itens: T[] = []
+  let url: string | null = path
+  while (url) {
+    const pagina: Pagina<T> = await getPagina<T>(url)
+    itens.push(...pagina.results)
+    url = pagina.next
+  }
+  return itens
+}
+
+function listagem(path: string, params?: Record<string, unknown>) {
   const q = params ? new URLSearchParams(params as any).toString() : ''
-  return apiJson(`/api/clientes/?${q}`)
+  return `${path}?${q}`
+}
+
+export async function getClientes(params?: { ativo?: boolean; tipo_piscina?: 'residencial' | 'comercial' }) {
+  return getPagina<any>(listagem('/api/clientes/', params))
+}
+
+export async function getTodosClientes(params?: { ativo?: boolean; tipo_piscina?: 'residencial' | 'comercial' }) {
+  return getTodasAsPaginas<any>(listagem('/api/clientes/', { page_size: 200, ...params }))
+}
+
+export async function getCliente(id: string) {
+  return apiJson<any>(`/api/clientes/${id}/`)
 }
 
 export async function createCliente(data: {
@@ -160,8 +195,15 @@ export async function softDeleteCliente(id: string) {
 }
 
 export async function getAgendamentos(params?: { status?: 'pendente' | 'confirmado' | 'cancelado' | 'realizado'; cliente?: string }) {
-  const q = params ? new URLSearchParams(params as any).toString() : ''
-  return apiJson(`/api/agendamentos/?${q}`)
+  return getPagina<any>(listagem('/api/agendamentos/', params))
+}
+
+export async function getTodosAgendamentos(params?: { status?: 'pendente' | 'confirmado' | 'cancelado' | 'realizado'; cliente?: string }) {
+  return getTodasAsPaginas<any>(listagem('/api/agendamentos/', { page_size: 200, ...params }))
+}
+
+export async function getAgendamento(id: string) {
+  return apiJson<any>(`/api/agendamentos/${id}/`)
 }
 
 export async function createAgendamento(data: {
@@ -187,8 +229,11 @@ export async function softDeleteAgendamento(id: string) {
 }
 
 export async function getFinanceiro(params?: { status?: 'pendente' | 'pago'; tipo?: 'servico' | 'produto' | 'multa' | 'outro'; cliente?: string }) {
-  const q = params ? new URLSearchParams(params as any).toString() : ''
-  return apiJson(`/api/financeiro/?${q}`)
+  return getPagina<any>(listagem('/api/financeiro/', params))
+}
+
+export async function getFinanceiroItem(id: string) {
+  return apiJson<any>(`/api/financeiro/${id}/`)
 }
 
 export async function createFinanceiro(data: {
@@ -309,8 +354,7 @@ export async function exportFinanceiroCSV() {
 }
 
 export async function getNotificacoes(params?: { tipo?: string; lida?: boolean }) {
-  const q = params ? new URLSearchParams(params as any).toString() : ''
-  return apiJson(`/api/notificacoes/?${q}`)
+  return getPagina<any>(listagem('/api/notificacoes/', params))
 }
 
 export async function marcarNotificacaoComoLida(id: string) {
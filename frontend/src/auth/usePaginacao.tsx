@@ -0,0 +1,42 @@
+import { useCallback, useState } from 'react'
+
+import { getPagina, type Pagina } from './api'
+
+// Lista paginada por cursor: `carregar` recebe a primeira página e `carregarMais` segue `next`
+export function usePaginacao<T>() {
+  const [itens, setItens] = useState<T[]>([])
+  const [next, setNext] = useState<string | null>(null)
+  const [carregandoMais, setCarregandoMais] = useState(false)
+
+  const carregar = useCallback((pagina: Pagina<T>) => {
+    setItens(pagina.results)
+    setNext(pagina.next)
+  }, [])
+
+  const carregarMais = useCallback(async () => {
+    if (!next) return
+    setCarregandoMais(true)
+    try {
+      const pagina = await getPagina<T>(next)
+      setItens((prev) => [...prev, ...pagina.results])
+      setNext(pagina.next)
+    } catch (err: any) {
+      alert(err?.detail || 'Erro ao carregar mais itens')
+    } finally {
+      setCarregandoMais(false)
+    }
+  }, [next])
+
+  return { itens, setItens, next, carregar, carregarMais, carregandoMais }
+}
+
+export function CarregarMais({ next, carregando, onClick }: { next: string | null; carregando: boolean; onClick: () => void }) {
+  if (!next) return null
+  return (
+    <div style={{ textAlign: 'center', marginTop: 16 }}>
+      <button onClick={onClick} disabled={carregando}>
+        {carregando ? 'Carregando…' : 'Carregar mais'}
+      </button>
+    </div>
+  )
+}
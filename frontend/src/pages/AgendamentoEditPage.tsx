@@ -1,5 +1,5 @@
 import { useNavigate, useParams } from 'react-router-dom'
-import { getAgendamentos, updateAgendamento } from '../auth/api'
+import { getAgendamento, getTodosClientes, updateAgendamento } from '../auth/api'
 import { useEffect, useState } from 'react'
 
 type Agendamento = {
@@ -32,12 +32,9 @@ export default function AgendamentoEditPage() {
     const fetch = async () => {
       if (!id) return
       try {
-        const list = await getAgendamentos()
-        const found = (Array.isArray(list) ? list : (list.results || [])).find((a: Agendamento) => a.id === id)
-        if (!found) throw new Error('Agendamento não encontrado')
-        setAgendamento(found)
+        setAgendamento(await getAgendamento(id))
       } catch (err: any) {
-        setError(err?.detail || 'Erro ao carregar agendamento')
+        setError(err?.status === 404 ? 'Agendamento não encontrado' : err?.detail || 'Erro ao carregar agendamento')
       } finally {
         setLoading(false)
       }
@@ -48,9 +45,7 @@ export default function AgendamentoEditPage() {
   useEffect(() => {
     const fetchClientes = async () => {
       try {
-        const data = await (await import('../auth/api')).getClientes()
-        const items = Array.isArray(data) ? data : (data.results || [])
-        setClientes(items)
+        setClientes(await getTodosClientes())
       } catch (err: any) {
         console.error('Erro ao carregar clientes', err)
       }
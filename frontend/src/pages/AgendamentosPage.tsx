@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom'
-import { createAgendamento, getAgendamentos, softDeleteAgendamento, exportAgendamentosCSV, exportAgendamentosPDF } from '../auth/api'
+import { createAgendamento, getAgendamentos, getTodosClientes, softDeleteAgendamento, exportAgendamentosCSV, exportAgendamentosPDF } from '../auth/api'
 import { useAuth } from '../auth/AuthContext'
+import { CarregarMais, usePaginacao } from '../auth/usePaginacao'
 import { useState, useEffect } from 'react'
 
 type Agendamento = {
@@ -22,7 +23,7 @@ type Cliente = {
 
 export default function AgendamentosPage() {
   const auth = useAuth()
-  const [agendamentos, setAgendamentos] = useState<Agendamento[]>([])
+  const { itens: agendamentos, next, carregar, carregarMais, carregandoMais } = usePaginacao<Agendamento>()
   const [clientes, setClientes] = useState<Cliente[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
@@ -30,9 +31,7 @@ export default function AgendamentosPage() {
 
   const fetchAgendamentos = async () => {
     try {
-      const data = await getAgendamentos()
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setAgendamentos(items)
+      carregar(await getAgendamentos())
     } catch (err: any) {
       setError(err?.detail || 'Erro ao carregar agendamentos')
     } finally {
@@ -42,9 +41,7 @@ export default function AgendamentosPage() {
 
   const fetchClientes = async () => {
     try {
-      const data = await (await import('../auth/api')).getClientes()
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setClientes(items)
+      setClientes(await getTodosClientes())
     } catch (err: any) {
       console.error('Erro ao carregar clientes', err)
     }
@@ -185,6 +182,7 @@ export default function AgendamentosPage() {
           </tbody>
         </table>
       )}
+      <CarregarMais next={next} carregando={carregandoMais} onClick={carregarMais} />
     </div>
   )
 }
@@ -1,5 +1,5 @@
 import { useNavigate, useParams } from 'react-router-dom'
-import { getClientes, updateCliente } from '../auth/api'
+import { getCliente, updateCliente } from '../auth/api'
 import { useEffect, useState } from 'react'
 
 type Cliente = {
@@ -26,12 +26,9 @@ export default function ClienteEditPage() {
     if (!id) return
     const fetch = async () => {
       try {
-        const list = await getClientes()
-        const found = (Array.isArray(list) ? list : (list.results || [])).find((c: Cliente) => c.id === id)
-        if (!found) throw new Error('Cliente não encontrado')
-        setCliente(found)
+        setCliente(await getCliente(id))
       } catch (err: any) {
-        setError(err?.detail || 'Erro ao carregar cliente')
+        setError(err?.status === 404 ? 'Cliente não encontrado' : err?.detail || 'Erro ao carregar cliente')
       } finally {
         setLoading(false)
       }
@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom'
 import { createCliente, getClientes, softDeleteCliente, exportClientesCSV, exportClientesPDF } from '../auth/api'
 import { useAuth } from '../auth/AuthContext'
+import { CarregarMais, usePaginacao } from '../auth/usePaginacao'
 import { useState, useEffect } from 'react'
 
 type Cliente = {
@@ -17,16 +18,14 @@ type Cliente = {
 
 export default function ClientesPage() {
   const auth = useAuth()
-  const [clientes, setClientes] = useState<Cliente[]>([])
+  const { itens: clientes, next, carregar, carregarMais, carregandoMais } = usePaginacao<Cliente>()
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [showForm, setShowForm] = useState(false)
 
   const fetchClientes = async () => {
     try {
-      const data = await getClientes({ ativo: true })
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setClientes(items)
+      carregar(await getClientes({ ativo: true }))
     } catch (err: any) {
       setError(err?.detail || 'Erro ao carregar clientes')
     } finally {
@@ -159,6 +158,7 @@ export default function ClientesPage() {
           </tbody>
         </table>
       )}
+      <CarregarMais next={next} carregando={carregandoMais} onClick={carregarMais} />
     </div>
   )
 }
@@ -1,5 +1,5 @@
 import { useNavigate, useParams } from 'react-router-dom'
-import { getFinanceiro, updateFinanceiro } from '../auth/api'
+import { getFinanceiroItem, getTodosAgendamentos, getTodosClientes, updateFinanceiro } from '../auth/api'
 import { useEffect, useState } from 'react'
 
 type Financeiro = {
@@ -42,12 +42,9 @@ export default function FinanceiroEditPage() {
     const fetch = async () => {
       if (!id) return
       try {
-        const list = await getFinanceiro()
-        const found = (Array.isArray(list) ? list : (list.results || [])).find((f: Financeiro) => f.id === id)
-        if (!found) throw new Error('Registro financeiro não encontrado')
-        setFinanceiro(found)
+        setFinanceiro(await getFinanceiroItem(id))
       } catch (err: any) {
-        setError(err?.detail || 'Erro ao carregar financeiro')
+        setError(err?.status === 404 ? 'Registro financeiro não encontrado' : err?.detail || 'Erro ao carregar financeiro')
       } finally {
         setLoading(false)
       }
@@ -58,9 +55,7 @@ export default function FinanceiroEditPage() {
   useEffect(() => {
     const fetchClientes = async () => {
       try {
-        const data = await (await import('../auth/api')).getClientes()
-        const items = Array.isArray(data) ? data : (data.results || [])
-        setClientes(items)
+        setClientes(await getTodosClientes())
       } catch (err: any) {
         console.error('Erro ao carregar clientes', err)
       }
@@ -71,9 +66,7 @@ export default function FinanceiroEditPage() {
   useEffect(() => {
     const fetchAgendamentos = async () => {
       try {
-        const data = await (await import('../auth/api')).getAgendamentos()
-        const items = Array.isArray(data) ? data : (data.results || [])
-        setAgendamentos(items)
+        setAgendamentos(await getTodosAgendamentos())
       } catch (err: any) {
         console.error('Erro ao carregar agendamentos', err)
       }
@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom'
-import { createFinanceiro, getFinanceiro, softDeleteFinanceiro, exportFinanceiroCSV, exportFinanceiroPDF } from '../auth/api'
+import { createFinanceiro, getFinanceiro, getTodosAgendamentos, getTodosClientes, softDeleteFinanceiro, exportFinanceiroCSV, exportFinanceiroPDF } from '../auth/api'
 import { useAuth } from '../auth/AuthContext'
+import { CarregarMais, usePaginacao } from '../auth/usePaginacao'
 import { useState, useEffect } from 'react'
 
 type Financeiro = {
@@ -31,7 +32,7 @@ type Agendamento = {
 
 export default function FinanceiroPage() {
   const auth = useAuth()
-  const [financeiros, setFinanceiros] = useState<Financeiro[]>([])
+  const { itens: financeiros, next, carregar, carregarMais, carregandoMais } = usePaginacao<Financeiro>()
   const [clientes, setClientes] = useState<Cliente[]>([])
   const [agendamentos, setAgendamentos] = useState<Agendamento[]>([])
   const [loading, setLoading] = useState(true)
@@ -40,9 +41,7 @@ export default function FinanceiroPage() {
 
   const fetchFinanceiros = async () => {
     try {
-      const data = await getFinanceiro()
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setFinanceiros(items)
+      carregar(await getFinanceiro())
     } catch (err: any) {
       setError(err?.detail || 'Erro ao carregar financeiros')
     } finally {
@@ -52,9 +51,7 @@ export default function FinanceiroPage() {
 
   const fetchClientes = async () => {
     try {
-      const data = await (await import('../auth/api')).getClientes()
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setClientes(items)
+      setClientes(await getTodosClientes())
     } catch (err: any) {
       console.error('Erro ao carregar clientes', err)
     }
@@ -62,9 +59,7 @@ export default function FinanceiroPage() {
 
   const fetchAgendamentos = async () => {
     try {
-      const data = await (await import('../auth/api')).getAgendamentos()
-      const items = Array.isArray(data) ? data : (data.results || [])
-      setAgendamentos(items)
+      setAgendamentos(await getTodosAgendamentos())
     } catch (err: any) {
       console.error('Erro ao carregar agendamentos', err)
     }
@@ -235,6 +230,7 @@ export default function FinanceiroPage() {
           </tbody>
         </table>
       )}
+      <CarregarMais next={next} carregando={carregandoMais} onClick={carregarMais} />
     </div>
   )
 }
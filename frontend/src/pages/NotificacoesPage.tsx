@@ -1,5 +1,6 @@
 import { getNotificacoes, marcarNotificacaoComoLida, marcarTodasNotificacoesComoLidas } from '../auth/api'
 import { useAuth } from '../auth/AuthContext'
+import { CarregarMais, usePaginacao } from '../auth/usePaginacao'
 import { useState, useEffect } from 'react'
 
 type Notificacao = {
@@ -15,7 +16,7 @@ type Notificacao = {
 
 export default function NotificacoesPage() {
   const auth = useAuth()
-  const [notificacoes, setNotificacoes] = useState<Notificacao[]>([])
+  const { itens: notificacoes, setItens: setNotificacoes, next, carregar, carregarMais, carregandoMais } = usePaginacao<Notificacao>()
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [filtro, setFiltro] = useState<'todas' | 'nao-lidas'>('nao-lidas')
@@ -24,8 +25,7 @@ export default function NotificacoesPage() {
     const fetch = async () => {
       try {
         const params = filtro === 'nao-lidas' ? { lida: 'false' } : {}
-        const data = await getNotificacoes(params)
-        setNotificacoes(data.results || data)
+        carregar(await getNotificacoes(params))
       } catch (err: any) {
         setError(err?.detail || 'Erro ao carregar notificações')
       } finally {
@@ -108,6 +108,7 @@ export default function NotificacoesPage() {
           ))}
         </ul>
       )}
+      <CarregarMais next={next} carregando={carregandoMais} onClick={carregarMais} />
     </div>
   )
 }